@@ -0,0 +1,125 @@
+# admission.py — admission control: batas ukuran body, request paralel, dan token bucket
+import json
+import math
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket sederhana: `rate` token/detik, kapasitas `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Ambil satu token. Mengembalikan (berhasil, detik_sampai_token_berikutnya)."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True, 0.0
+            return False, (1.0 - self.tokens) / self.rate
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI yang menolak request sebelum body dibaca/di-decode:
+    - 413 jika Content-Length (atau jumlah byte yang benar-benar diterima) > max_body_bytes
+    - 429 jika request yang sedang diproses sudah max_in_flight, atau token bucket habis
+    """
+
+    def __init__(self, app, paths, max_body_bytes, max_in_flight, rate_per_sec=0.0, burst=1):
+        self.app = app
+        self.paths = set(paths)
+        self.max_body_bytes = max_body_bytes
+        self.max_in_flight = max_in_flight
+        self.bucket = TokenBucket(rate_per_sec, burst) if rate_per_sec > 0 else None
+        self.in_flight = 0
+        self.stats = {"admitted": 0, "rejected_413": 0, "rejected_429": 0}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = None
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    pass
+                break
+        if content_length is not None and content_length > self.max_body_bytes:
+            self.stats["rejected_413"] += 1
+            await self._reject(send, 413, f"Request body too large (max {self.max_body_bytes} bytes)")
+            return
+
+        if self.in_flight >= self.max_in_flight:
+            self.stats["rejected_429"] += 1
+            await self._reject(send, 429, "Too many requests in flight", retry_after=1)
+            return
+        if self.bucket is not None:
+            ok, wait = self.bucket.try_acquire()
+            if not ok:
+                self.stats["rejected_429"] += 1
+                await self._reject(send, 429, "Rate limit exceeded", retry_after=math.ceil(wait))
+                return
+
+        # Body diteruskan ke app per chunk sambil dihitung (juga untuk upload chunked / Content-Length
+        # yang salah). Chunk yang melewati batas tidak pernah diteruskan: middleware mengirim 413 sendiri,
+        # app menerima http.disconnect, dan respons apa pun dari app setelah itu dibuang. Tidak ada
+        # exception dari dalam receive — parsing body FastAPI akan mengubahnya menjadi 400.
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    rejected = True
+                    self.stats["rejected_413"] += 1
+                    if not response_started:
+                        await self._reject(send, 413, f"Request body too large (max {self.max_body_bytes} bytes)")
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        self.in_flight += 1
+        self.stats["admitted"] += 1
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # App gagal karena "client disconnect" buatan di atas → 413 sudah terkirim
+            if not rejected:
+                raise
+        finally:
+            self.in_flight -= 1
+
+    @staticmethod
+    async def _reject(send, status, detail, retry_after=None):
+        body = json.dumps({"detail": detail}).encode()
+        headers = [(b"content-type", b"application/json"),
+                   (b"content-length", str(len(body)).encode())]
+        if retry_after is not None:
+            headers.append((b"retry-after", str(retry_after).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,93 @@
+# batcher.py — micro-batching untuk endpoint streaming
+import asyncio
+
+
+class LatestFrame:
+    """
+    Slot satu frame per koneksi: frame baru menimpa frame yang belum diproses.
+    Jika client lebih cepat dari inferensi, frame basi dibuang (dihitung di `dropped`).
+    """
+
+    def __init__(self):
+        self._item = None
+        self._event = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        if self._item is not None:
+            self.dropped += 1
+        self._item = item
+        self._event.set()
+
+    def close(self):
+        self.closed = True
+        self._event.set()
+
+    async def get(self):
+        """Tunggu frame terbaru. Mengembalikan None jika koneksi ditutup dan tidak ada frame."""
+        while self._item is None and not self.closed:
+            await self._event.wait()
+            self._event.clear()
+        item, self._item = self._item, None
+        return item
+
+
+class MicroBatcher:
+    """
+    Kumpulkan input dari banyak coroutine menjadi satu batch (maks `max_batch`,
+    menunggu paling lama `max_wait_ms`), lalu jalankan `infer_fn(list_input)` di thread pool.
+    `infer_fn` harus mengembalikan hasil per input dengan urutan yang sama.
+    """
+
+    def __init__(self, infer_fn, max_batch, max_wait_ms):
+        self.infer_fn = infer_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Koneksi yang sudah putus tidak perlu diproses
+            batch = [(item, fut) for item, fut in batch if not fut.cancelled()]
+            if not batch:
+                continue
+            try:
+                results = await loop.run_in_executor(None, self.infer_fn, [item for item, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
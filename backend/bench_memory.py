@@ -0,0 +1,74 @@
+# bench_memory.py — kirim upload paralel ke /classify dan laporkan latency + peak RSS server
+#
+# Contoh:
+#   python bench_memory.py --image ../trash_projek_python/test_image4.jpg --concurrency 16 --requests 200
+import argparse
+import json
+import mimetypes
+import os
+import time
+import uuid
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def get_json(url):
+    with urllib.request.urlopen(url) as resp:
+        return json.loads(resp.read())
+
+
+def post_image(url, filename, data, content_type):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    req = urllib.request.Request(url, data=body, method="POST",
+                                 headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memori /classify di bawah konkurensi")
+    parser.add_argument("--url", type=str, default="http://localhost:8000")
+    parser.add_argument("--image", type=str, required=True)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        data = f.read()
+    filename = os.path.basename(args.image)
+    content_type = mimetypes.guess_type(filename)[0] or "image/jpeg"
+
+    before = get_json(f"{args.url}/health").get("peak_rss_mb")
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(
+            lambda _: post_image(f"{args.url}/classify", filename, data, content_type),
+            range(args.requests)
+        ))
+    elapsed = time.perf_counter() - t0
+    after = get_json(f"{args.url}/health").get("peak_rss_mb")
+
+    latencies = sorted(ms for _, ms in results)
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    print(f"Requests: {args.requests} | concurrency: {args.concurrency} | {args.requests / elapsed:.1f} req/s")
+    print(f"Status: {statuses}")
+    print(f"Latency p50={p(0.5):.1f} ms  p95={p(0.95):.1f} ms  p99={p(0.99):.1f} ms")
+    print(f"Peak RSS server: {before} MB → {after} MB")
+
+
+if __name__ == "__main__":
+    main()
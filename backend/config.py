@@ -0,0 +1,67 @@
+# config.py — konfigurasi backend (bisa di-override lewat environment variable)
+import os
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+# Model
+CHECKPOINT_PATH = os.environ.get("WASTE_CHECKPOINT", "checkpoints/final_v3/best_model.pth")
+NUM_CLASSES = _env_int("WASTE_NUM_CLASSES", 6)
+INPUT_SIZE = (224, 224)
+
+# Buffer input: jumlah slot inferensi paralel × ukuran batch maksimum per slot
+MAX_BATCH_SIZE = _env_int("WASTE_MAX_BATCH_SIZE", 10)
+INFERENCE_SLOTS = _env_int("WASTE_INFERENCE_SLOTS", 4)
+
+# Batas memori per request: jumlah piksel maksimum gambar yang boleh di-decode
+MAX_IMAGE_PIXELS = _env_int("WASTE_MAX_IMAGE_PIXELS", 40_000_000)
+MAX_IMAGE_SIDE = _env_int("WASTE_MAX_IMAGE_SIDE", 8000)
+
+# Admission control (berlaku untuk endpoint klasifikasi)
+MAX_BODY_BYTES = _env_int("WASTE_MAX_BODY_BYTES", 20 * 1024 * 1024)
+MAX_IN_FLIGHT = _env_int("WASTE_MAX_IN_FLIGHT", 2 * INFERENCE_SLOTS)
+RATE_LIMIT_PER_SEC = float(os.environ.get("WASTE_RATE_LIMIT_PER_SEC", 0))  # 0 = nonaktif
+RATE_LIMIT_BURST = _env_int("WASTE_RATE_LIMIT_BURST", 20)
+ADMISSION_PATHS = ("/classify", "/classify-batch", "/similar")
+
+# Streaming (WebSocket): micro-batching frame dari semua koneksi
+STREAM_MAX_BATCH = min(_env_int("WASTE_STREAM_MAX_BATCH", 8), MAX_BATCH_SIZE)
+STREAM_MAX_WAIT_MS = float(os.environ.get("WASTE_STREAM_MAX_WAIT_MS", 5))
+
+# Token untuk endpoint /admin/* (header X-Admin-Token). Kosong = endpoint admin dinonaktifkan (403).
+ADMIN_TOKEN = os.environ.get("WASTE_ADMIN_TOKEN", "")
+
+# Model registry: direktori berisi versi model (<versi>/best_model.pth atau <versi>.pth)
+MODEL_DIR = os.environ.get("WASTE_MODEL_DIR", "checkpoints/registry")
+MODEL_POLL_SECONDS = float(os.environ.get("WASTE_MODEL_POLL_SECONDS", 10))
+# Persentase traffic (0-100) untuk model kandidat; 0 = versi baru langsung menggantikan model aktif
+CANDIDATE_PERCENT = float(os.environ.get("WASTE_CANDIDATE_PERCENT", 0))
+
+# Warm-up sebelum service dinyatakan ready: batch sintetis di setiap ukuran batch yang dipakai
+WARMUP_BATCH_SIZES = sorted({
+    int(b) for b in os.environ.get(
+        "WASTE_WARMUP_BATCH_SIZES", f"1,{STREAM_MAX_BATCH},{MAX_BATCH_SIZE}"
+    ).split(",") if b.strip()
+})
+WARMUP_MIN_ITERS = _env_int("WASTE_WARMUP_MIN_ITERS", 3)
+WARMUP_MAX_ITERS = _env_int("WASTE_WARMUP_MAX_ITERS", 20)
+# Warm-up dianggap selesai jika latency iterasi terakhir <= tolerance × median iterasi sebelumnya
+WARMUP_TOLERANCE = float(os.environ.get("WASTE_WARMUP_TOLERANCE", 1.2))
+
+# Cascade: model kecil (misal mobilenet_v3_small) dulu, model registry hanya jika confidence < threshold
+CASCADE_SMALL_CHECKPOINT = os.environ.get("WASTE_CASCADE_SMALL_CHECKPOINT", "")
+CASCADE_THRESHOLD = float(os.environ.get("WASTE_CASCADE_THRESHOLD", 0.9))
+
+# Ensemble: daftar checkpoint (dipisah koma, arsitektur sama) yang dijalankan dalam satu forward vmap.
+# Jika diset, menggantikan model registry untuk request tanpa TTA.
+ENSEMBLE_CHECKPOINTS = [p.strip() for p in os.environ.get("WASTE_ENSEMBLE_CHECKPOINTS", "").split(",") if p.strip()]
+
+# Index similarity (hasil trash_projek_python/build_index.py) untuk endpoint /similar
+INDEX_DIR = os.environ.get("WASTE_INDEX_DIR", "index")
+SIMILAR_MAX_K = _env_int("WASTE_SIMILAR_MAX_K", 50)
+
+# Prototype head (kelas baru hasil register_class.py / /admin/classes).
+# Kosong = prototype_head.pt di folder checkpoint model aktif.
+PROTOTYPE_HEAD = os.environ.get("WASTE_PROTOTYPE_HEAD", "")
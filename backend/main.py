@@ -1,14 +1,35 @@
 # backend/main.py
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import (FastAPI, File, Form, UploadFile, HTTPException, Query, Header, Depends,
+                     WebSocket, WebSocketDisconnect)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import torch
-from torchvision import transforms
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
+import asyncio
 import io
+import os
+import struct
+import sys
 import logging
+import secrets
 
-from model import WasteClassifier
+from model import load_model_from_checkpoint
+from preprocess import InputBufferPool, ImageTooLargeError, peak_rss_mb
+from admission import AdmissionMiddleware
+from batcher import LatestFrame, MicroBatcher
+from registry import ModelRegistry
+from warmup import warm_up
+import config
+
+# Paket bersama (label, preprocessing ringan) ada di trash_projek_python/waste_infer
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "trash_projek_python"))
+from waste_infer.labels import LABEL_MAP  # 0-indexed
+from waste_infer.index import VectorIndex
+from tta import tta_logits, MAX_VIEWS
+from cascade import cascade_forward
+from ensemble import VectorizedEnsemble, load_members
+from prototype_head import PrototypeHead, head_path_for
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -26,63 +47,191 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Label mapping (0-indexed)
-LABEL_MAP = {
-    0: "glass",
-    1: "paper",
-    2: "cardboard",
-    3: "plastic",
-    4: "metal",
-    5: "trash"
-}
+# Admission control: tolak cepat (413/429) sebelum upload dibaca atau di-decode
+app.add_middleware(
+    AdmissionMiddleware,
+    paths=config.ADMISSION_PATHS,
+    max_body_bytes=config.MAX_BODY_BYTES,
+    max_in_flight=config.MAX_IN_FLIGHT,
+    rate_per_sec=config.RATE_LIMIT_PER_SEC,
+    burst=config.RATE_LIMIT_BURST,
+)
 
 # Global variables
-model = None
+registry = None
 device = None
-transform = None
-
-# Image preprocessing transform
-def get_transform():
-    return transforms.Compose([
-        transforms.Resize((224, 224)),
-        transforms.ToTensor(),
-        transforms.Normalize(
-            mean=[0.485, 0.456, 0.406],
-            std=[0.229, 0.224, 0.225]
-        )
-    ])
+buffer_pool = None
+stream_batcher = None
+small_model = None
+ensemble = None
+similarity_index = None
+prototype_head = None
+cascade_stats = {"small_only": 0, "routed_to_large": 0}
+# Fase service: starting → warming_up → ready (atau failed)
+service_state = {"phase": "starting", "error": None, "task": None}
+
+# Batas keras PIL (decompression bomb) mengikuti batas per request
+Image.MAX_IMAGE_PIXELS = config.MAX_IMAGE_PIXELS
 
 @app.on_event("startup")
 async def load_model():
-    """Load model saat server start"""
-    global model, device, transform
+    """
+    Siapkan service saat server start. Load model + warm-up berjalan di latar
+    agar /livez sudah bisa dijawab; /readyz baru 200 setelah warm-up selesai.
+    """
+    global registry, device, buffer_pool, stream_batcher
     
     try:
-        logger.info("🚀 Loading model...")
-        
         # Set device
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         logger.info(f"📱 Using device: {device}")
         
-        # Load model
-        model = WasteClassifier(num_classes=6)
-        checkpoint_path = "checkpoints/final_v3/best_model.pth"
+        # Buffer input yang dipakai ulang (satu slot per inferensi paralel)
+        buffer_pool = InputBufferPool(
+            num_slots=config.INFERENCE_SLOTS,
+            max_batch=config.MAX_BATCH_SIZE,
+            input_size=config.INPUT_SIZE,
+            pin_memory=(device.type == "cuda"),
+        )
         
-        checkpoint = torch.load(checkpoint_path, map_location=device, weights_only=True)
-        model.load_state_dict(checkpoint['model_state_dict'])
-        model = model.to(device)
-        model.eval()
+        # Micro-batcher untuk frame dari endpoint streaming
+        stream_batcher = MicroBatcher(
+            infer_frames,
+            max_batch=config.STREAM_MAX_BATCH,
+            max_wait_ms=config.STREAM_MAX_WAIT_MS,
+        )
+        stream_batcher.start()
         
-        # Setup transform
-        transform = get_transform()
+        # Registry: versi terbaru di direktori model, atau checkpoint default
+        registry = ModelRegistry(
+            model_dir=config.MODEL_DIR,
+            build_fn=build_model,
+            warmup_fn=warmup_model,
+            fallback_checkpoint=config.CHECKPOINT_PATH,
+            candidate_percent=config.CANDIDATE_PERCENT,
+            poll_seconds=config.MODEL_POLL_SECONDS,
+        )
+        # Simpan referensi task agar tidak di-garbage-collect
+        service_state["task"] = asyncio.get_running_loop().create_task(run_in_threadpool(load_and_warm_up))
         
-        logger.info("✅ Model loaded successfully!")
-        logger.info(f"   - Validation Accuracy: {checkpoint.get('val_acc', 0):.2%}")
-        logger.info(f"   - Epoch: {checkpoint.get('epoch', 0)}")
+    except Exception as e:
+        service_state.update(phase="failed", error=str(e))
+        logger.error(f"❌ Failed to initialize service: {e}")
+        raise
+
+def load_and_warm_up():
+    """Load model aktif, warm-up di semua ukuran batch, lalu tandai service ready."""
+    try:
+        logger.info("🚀 Loading model...")
+        service_state["phase"] = "warming_up"
+        active = registry.load_initial()
+        registry.start_watcher()
+        load_small_model()
+        load_ensemble()
+        load_similarity_index()
+        load_prototype_head(active)
+        service_state["phase"] = "ready"
         
+        logger.info("✅ Model loaded and warmed up — ready for traffic")
+        logger.info(f"   - Version: {active.version}")
+        logger.info(f"   - Validation Accuracy: {active.val_acc or 0:.2%}")
+        logger.info(f"   - Epoch: {active.epoch or 0}")
     except Exception as e:
+        service_state.update(phase="failed", error=str(e))
         logger.error(f"❌ Failed to load model: {e}")
-        raise
+
+@app.on_event("shutdown")
+async def stop_registry():
+    if registry is not None:
+        registry.stop()
+
+def load_small_model():
+    """Muat & warm-up model kecil untuk cascade (jika WASTE_CASCADE_SMALL_CHECKPOINT diset)."""
+    global small_model
+    if not config.CASCADE_SMALL_CHECKPOINT:
+        return
+    checkpoint = torch.load(config.CASCADE_SMALL_CHECKPOINT, map_location='cpu', weights_only=True)
+    model = build_model(checkpoint)
+    warmup_model(model)
+    small_model = model
+    logger.info(f"🔀 Cascade enabled: {config.CASCADE_SMALL_CHECKPOINT} "
+                f"(threshold {config.CASCADE_THRESHOLD})")
+
+def load_ensemble():
+    """Muat & warm-up ensemble vmap (jika WASTE_ENSEMBLE_CHECKPOINTS diset)."""
+    global ensemble
+    if not config.ENSEMBLE_CHECKPOINTS:
+        return
+    model = VectorizedEnsemble(load_members(config.ENSEMBLE_CHECKPOINTS, config.NUM_CLASSES, device))
+    warmup_model(model)
+    ensemble = model
+    logger.info(f"🧩 Ensemble enabled: {model.num_models} models ({', '.join(config.ENSEMBLE_CHECKPOINTS)})")
+
+def load_similarity_index():
+    """Buka index similarity (memmap) untuk /similar jika direktorinya ada."""
+    global similarity_index
+    if not os.path.isfile(os.path.join(config.INDEX_DIR, "meta.json")):
+        logger.info(f"ℹ️  No similarity index at {config.INDEX_DIR} — /similar disabled")
+        return
+    similarity_index = VectorIndex(config.INDEX_DIR)
+    logger.info(f"🔎 Similarity index: {len(similarity_index)} vectors "
+                f"({similarity_index.meta['dtype']}, IVF={similarity_index.meta.get('ivf_lists') or 'off'})")
+
+def index_model(selected):
+    """
+    Model yang ruang fiturnya sama dengan index similarity: checkpoint tempat index dibangun.
+    Model pilihan registry dipakai jika cocok; jika tidak (canary/hot reload), model aktif/kandidat
+    lain yang cocok dipakai. None = checkpoint index tidak sedang dimuat.
+    """
+    target = os.path.realpath(similarity_index.meta.get("checkpoint") or "")
+    for loaded in (selected, registry.active, registry.candidate):
+        if loaded is not None and os.path.realpath(loaded.path) == target:
+            return loaded
+    return None
+
+def prototype_head_path(checkpoint_path):
+    """File prototype head milik checkpoint `checkpoint_path`."""
+    return config.PROTOTYPE_HEAD or head_path_for(checkpoint_path)
+
+def load_prototype_head(loaded):
+    """Muat kelas tambahan (prototype head) milik checkpoint aktif jika artefaknya ada."""
+    global prototype_head
+    path = prototype_head_path(loaded.path)
+    if not os.path.isfile(path):
+        return
+    prototype_head = PrototypeHead.load(path)
+    logger.info(f"🧷 Prototype head: {path} (extra classes: {', '.join(prototype_head.extra_classes) or '-'})")
+
+def head_for(loaded):
+    """Prototype head hanya berlaku untuk backbone tempat fiturnya diambil."""
+    head = prototype_head
+    if head is None or not hasattr(loaded.model, "forward_features"):
+        return None
+    if os.path.realpath(head.base_checkpoint) != os.path.realpath(loaded.path):
+        return None
+    return head
+
+def class_names():
+    """Nama kelas sesuai urutan kolom probabilitas (kelas bawaan + kelas prototype head)."""
+    return prototype_head.class_names if prototype_head else list(LABEL_MAP.values())
+
+def build_model(checkpoint):
+    """Bangun model dari checkpoint sesuai 'arch' (dipakai registry saat load/reload)."""
+    model = load_model_from_checkpoint(checkpoint, num_classes=config.NUM_CLASSES)
+    model = model.to(device)
+    model.eval()
+    return model
+
+def warmup_model(model):
+    """Warm-up di setiap ukuran batch yang dipakai agar request pertama secepat request berikutnya."""
+    return warm_up(
+        model, device, config.WARMUP_BATCH_SIZES, input_size=config.INPUT_SIZE,
+        min_iters=config.WARMUP_MIN_ITERS, max_iters=config.WARMUP_MAX_ITERS,
+        tolerance=config.WARMUP_TOLERANCE,
+    )
+
+def model_ready():
+    return service_state["phase"] == "ready" and registry is not None and registry.active is not None
 
 @app.get("/")
 async def root():
@@ -91,26 +240,125 @@ async def root():
         "status": "online",
         "message": "Waste Classification API is running",
         "device": str(device),
-        "model_loaded": model is not None
+        "model_loaded": model_ready()
     }
 
+@app.get("/livez")
+async def liveness():
+    """Liveness: proses hidup dan inisialisasi tidak gagal"""
+    if service_state["phase"] == "failed":
+        return JSONResponse(status_code=503, content={"status": "failed", "error": service_state["error"]})
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness: model sudah dimuat dan di-warm-up, siap menerima traffic"""
+    if not model_ready():
+        return JSONResponse(status_code=503, content={"status": service_state["phase"]})
+    return {"status": "ready"}
+
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
     return {
-        "status": "healthy",
-        "model_loaded": model is not None,
+        "status": "healthy" if model_ready() else service_state["phase"],
+        "phase": service_state["phase"],
+        "model_loaded": model_ready(),
+        "model": registry.status() if registry else None,
         "device": str(device),
-        "classes": list(LABEL_MAP.values())
+        "classes": class_names(),
+        "peak_rss_mb": peak_rss_mb(),
+        "admission": admission_stats(),
+        "cascade": dict(cascade_stats, threshold=config.CASCADE_THRESHOLD) if small_model else None,
+        "ensemble": config.ENSEMBLE_CHECKPOINTS if ensemble else None,
+        "similarity_index": similarity_index.meta if similarity_index else None
     }
 
+def admission_stats():
+    """Statistik AdmissionMiddleware (dicari di stack middleware yang sudah dibangun)."""
+    layer = app.middleware_stack
+    while layer is not None:
+        if isinstance(layer, AdmissionMiddleware):
+            return dict(layer.stats, in_flight=layer.in_flight)
+        layer = getattr(layer, "app", None)
+    return None
+
+
+def require_admin(x_admin_token: str = Header(None)):
+    """Dependency endpoint admin: header X-Admin-Token harus sama dengan config.ADMIN_TOKEN"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints disabled (WASTE_ADMIN_TOKEN not set)")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/admin/models/promote", dependencies=[Depends(require_admin)])
+async def promote_candidate():
+    """Jadikan model kandidat sebagai model aktif"""
+    if registry is None or not registry.promote():
+        raise HTTPException(status_code=404, detail="No candidate model")
+    return registry.status()
+
+@app.post("/admin/models/candidate", dependencies=[Depends(require_admin)])
+async def set_candidate_traffic(percent: float = Query(..., ge=0, le=100)):
+    """Atur persentase traffic (0-100) untuk model kandidat"""
+    if registry is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    registry.set_candidate_percent(percent)
+    return registry.status()
+
+@app.delete("/admin/models/candidate", dependencies=[Depends(require_admin)])
+async def discard_candidate():
+    """Buang model kandidat"""
+    if registry is None or not registry.discard_candidate():
+        raise HTTPException(status_code=404, detail="No candidate model")
+    return registry.status()
+
+
+def run_inference(batch, tta_views=1):
+    """
+    Forward satu batch dari buffer input → (probabilitas CPU, versi model).
+    tta_views > 1: semua view test-time augmentation dijalankan dalam satu forward pass.
+    Jika cascade aktif (tanpa TTA), model kecil dijalankan dulu dan hanya sampel dengan
+    confidence < threshold yang diteruskan ke model registry.
+    Jika ensemble aktif (tanpa TTA), semua checkpoint ensemble dijalankan dalam satu forward vmap.
+    Jika ada prototype head untuk model ini, kolom kelas tambahan ikut dihitung (cascade & ensemble
+    dilewati karena hanya mengenal kelas bawaan).
+    """
+    loaded = registry.select()
+    head = head_for(loaded)
+    with torch.no_grad():
+        batch = batch.to(device, non_blocking=True)
+        if head is not None:
+            model_fn = lambda x: head.logits(loaded.model, x)
+            output = tta_logits(model_fn, batch, tta_views) if tta_views > 1 else model_fn(batch)
+        elif tta_views > 1:
+            output = tta_logits(loaded.model, batch, tta_views)
+        elif ensemble is not None:
+            probs = torch.softmax(ensemble(batch), dim=1)
+            return probs.cpu(), f"ensemble-{ensemble.num_models}"
+        elif small_model is not None:
+            probs, routed = cascade_forward(small_model, loaded.model, batch, config.CASCADE_THRESHOLD)
+            n_routed = int(routed.sum())
+            cascade_stats["routed_to_large"] += n_routed
+            cascade_stats["small_only"] += len(routed) - n_routed
+            return probs.cpu(), loaded.version
+        else:
+            output = loaded.model(batch)
+        return torch.softmax(output, dim=1).cpu(), loaded.version
+
+
 @app.post("/classify")
-async def classify_image(file: UploadFile = File(...)):
+def classify_image(
+    file: UploadFile = File(...),
+    tta_views: int = Query(1, ge=1, le=MAX_VIEWS),
+):
     """
     Klasifikasi gambar sampah
     
     Parameters:
     - file: Gambar dalam format JPG, JPEG, atau PNG
+    - tta_views: Jumlah view test-time augmentation (1 = nonaktif); lebih akurat, lebih lambat
     
     Returns:
     - class: Kategori sampah (glass, paper, cardboard, plastic, metal, trash)
@@ -118,7 +366,7 @@ async def classify_image(file: UploadFile = File(...)):
     - probabilities: Dict semua probabilitas per kelas
     """
     
-    if model is None:
+    if not model_ready():
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     # Validate file type
@@ -129,29 +377,24 @@ async def classify_image(file: UploadFile = File(...)):
         )
     
     try:
-        # Read image
         logger.info(f"📥 Receiving file: {file.filename} ({file.content_type})")
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents)).convert("RGB")
-        logger.info(f"🖼️  Image size: {image.size}")
-        
-        # Preprocess
-        image_tensor = transform(image).unsqueeze(0).to(device)
-        
-        # Predict
-        with torch.no_grad():
-            output = model(image_tensor)
-            probabilities = torch.softmax(output, dim=1)[0]
-            predicted_idx = probabilities.argmax().item()
-            confidence = probabilities[predicted_idx].item()
+        # Decode langsung dari file upload (spooled) ke slot buffer, tanpa salinan bytes
+        with buffer_pool.acquire() as buf:
+            image_size = buffer_pool.fill(buf[0], file.file, config.MAX_IMAGE_PIXELS, config.MAX_IMAGE_SIDE)
+            logger.info(f"🖼️  Image size: {image_size}")
+            probabilities, model_version = run_inference(buf[:1], tta_views)
+            probabilities = probabilities[0]
+        predicted_idx = probabilities.argmax().item()
+        confidence = probabilities[predicted_idx].item()
         
         # Convert to dict
+        names = class_names()
         probs_dict = {
-            LABEL_MAP[i]: float(probabilities[i].item()) 
-            for i in range(len(LABEL_MAP))
+            names[i]: float(probabilities[i].item()) 
+            for i in range(len(probabilities))
         }
         
-        predicted_class = LABEL_MAP[predicted_idx]
+        predicted_class = names[predicted_idx]
         
         logger.info(f"✅ Prediction: {predicted_class} ({confidence:.2%})")
         
@@ -160,53 +403,277 @@ async def classify_image(file: UploadFile = File(...)):
             "class": predicted_class,
             "confidence": confidence,
             "probabilities": probs_dict,
+            "model_version": model_version,
             "message": f"Image classified as {predicted_class}"
         })
         
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnidentifiedImageError as e:
+        raise HTTPException(status_code=400, detail=f"Cannot decode image: {str(e)}")
     except Exception as e:
         logger.error(f"❌ Classification error: {e}")
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
 
 @app.post("/classify-batch")
-async def classify_batch(files: list[UploadFile] = File(...)):
+def classify_batch(
+    files: list[UploadFile] = File(...),
+    tta_views: int = Query(1, ge=1, le=MAX_VIEWS),
+):
     """
-    Klasifikasi multiple gambar sekaligus
+    Klasifikasi multiple gambar sekaligus (opsional dengan test-time augmentation)
     """
-    if model is None:
+    if not model_ready():
         raise HTTPException(status_code=503, detail="Model not loaded")
     
-    if len(files) > 10:
-        raise HTTPException(status_code=400, detail="Maximum 10 images per request")
+    if len(files) > config.MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Maximum {config.MAX_BATCH_SIZE} images per request")
     
-    results = []
+    results = [None] * len(files)
     
-    for idx, file in enumerate(files):
-        try:
-            contents = await file.read()
-            image = Image.open(io.BytesIO(contents)).convert("RGB")
-            image_tensor = transform(image).unsqueeze(0).to(device)
-            
+    with buffer_pool.acquire() as buf:
+        # Decode semua file yang valid ke baris buffer berurutan, lalu satu forward pass
+        decoded = []
+        for idx, file in enumerate(files):
+            try:
+                buffer_pool.fill(buf[len(decoded)], file.file, config.MAX_IMAGE_PIXELS, config.MAX_IMAGE_SIDE)
+                decoded.append(idx)
+            except Exception as e:
+                results[idx] = {
+                    "filename": file.filename,
+                    "error": str(e),
+                    "success": False
+                }
+        
+        if decoded:
+            probabilities, model_version = run_inference(buf[:len(decoded)], tta_views)
+            confidences, predicted = probabilities.max(dim=1)
+            names = class_names()
+            for row, idx in enumerate(decoded):
+                results[idx] = {
+                    "filename": files[idx].filename,
+                    "class": names[predicted[row].item()],
+                    "confidence": confidences[row].item(),
+                    "model_version": model_version,
+                    "success": True
+                }
+    
+    return JSONResponse(content={"results": results})
+
+@app.post("/similar")
+def similar_images(
+    file: UploadFile = File(...),
+    k: int = Query(10, ge=1, le=config.SIMILAR_MAX_K),
+    nprobe: int = Query(8, ge=1),
+):
+    """
+    Cari k gambar training paling mirip (cosine similarity embedding penultimate).
+    Satu forward pass menghasilkan embedding sekaligus prediksi model; prediksi kNN
+    (voting berbobot similarity dari tetangga) dikembalikan sebagai pembanding/fallback.
+    """
+    if not model_ready():
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    if similarity_index is None:
+        raise HTTPException(status_code=503, detail="Similarity index not loaded")
+    
+    # Embedding hanya bisa dibandingkan dengan index yang dibangun dari checkpoint yang sama
+    loaded = index_model(registry.select())
+    if loaded is None:
+        raise HTTPException(status_code=409, detail=(
+            f"Similarity index was built from {similarity_index.meta.get('checkpoint')}, "
+            f"which is not a loaded model version; rebuild the index for the active model"))
+    if not hasattr(loaded.model, "forward_features"):
+        raise HTTPException(status_code=501, detail="Active model does not expose features")
+    try:
+        with buffer_pool.acquire() as buf:
+            buffer_pool.fill(buf[0], file.file, config.MAX_IMAGE_PIXELS, config.MAX_IMAGE_SIDE)
             with torch.no_grad():
-                output = model(image_tensor)
-                probabilities = torch.softmax(output, dim=1)[0]
-                predicted_idx = probabilities.argmax().item()
-                confidence = probabilities[predicted_idx].item()
+                features = loaded.model.forward_features(buf[:1].to(device, non_blocking=True))
+                head = head_for(loaded)
+                logits = (head.logits_from_features(loaded.model, features) if head
+                          else loaded.model.classify_features(features))
+                probs = torch.softmax(logits, dim=1)[0].cpu()
+            features = features.float().cpu().numpy()
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnidentifiedImageError as e:
+        raise HTTPException(status_code=400, detail=f"Cannot decode image: {str(e)}")
+    
+    scores, ids = similarity_index.search(features, k=k, nprobe=nprobe)
+    knn = similarity_index.knn_probs(scores, ids)[0]
+    neighbors = [
+        {
+            "path": similarity_index.paths[i],
+            "label": LABEL_MAP[int(similarity_index.labels[i])],
+            "similarity": float(s),
+        }
+        for s, i in zip(scores[0].tolist(), ids[0].tolist()) if i >= 0
+    ]
+    predicted_idx = int(probs.argmax())
+    knn_idx = int(knn.argmax())
+    return JSONResponse(content={
+        "success": True,
+        "neighbors": neighbors,
+        "class": class_names()[predicted_idx],
+        "confidence": float(probs[predicted_idx]),
+        "knn_class": LABEL_MAP[knn_idx],
+        "knn_confidence": float(knn[knn_idx]),
+        "model_version": loaded.version,
+        "index_checkpoint": similarity_index.meta.get("checkpoint"),
+    })
+
+@app.get("/admin/classes", dependencies=[Depends(require_admin)])
+async def list_classes():
+    """Daftar kelas yang dilayani (bawaan + prototype head)"""
+    head = prototype_head
+    return {
+        "classes": class_names(),
+        "extra_classes": head.extra_classes if head else [],
+        "num_examples": head.num_examples if head else {},
+    }
+
+@app.post("/admin/classes", dependencies=[Depends(require_admin)])
+def register_class(name: str = Form(...), files: list[UploadFile] = File(...)):
+    """
+    Daftarkan kelas baru dari gambar contoh (disarankan beberapa puluh) tanpa retraining.
+    Fitur contoh diambil dari model aktif; head disimpan di sebelah checkpoint-nya dan langsung dilayani.
+    """
+    global prototype_head
+    if not model_ready():
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    loaded = registry.active
+    if not hasattr(loaded.model, "forward_features"):
+        raise HTTPException(status_code=501, detail="Active model does not expose features")
+    
+    features = []
+    skipped = []
+    for start in range(0, len(files), buffer_pool.max_batch):
+        chunk = files[start:start + buffer_pool.max_batch]
+        with buffer_pool.acquire() as buf:
+            n = 0
+            for file in chunk:
+                try:
+                    buffer_pool.fill(buf[n], file.file, config.MAX_IMAGE_PIXELS, config.MAX_IMAGE_SIDE)
+                    n += 1
+                except Exception as e:
+                    skipped.append({"filename": file.filename, "error": str(e)})
+            if n:
+                with torch.no_grad():
+                    features.append(loaded.model.forward_features(buf[:n].to(device, non_blocking=True)).cpu())
+    if not features:
+        raise HTTPException(status_code=400, detail="No decodable example images")
+    
+    current = head_for(loaded)
+    head = current.clone() if current else PrototypeHead(loaded.path, list(LABEL_MAP.values()))
+    try:
+        head.register(loaded.model, name, torch.cat(features))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    head.save(prototype_head_path(head.base_checkpoint))
+    prototype_head = head  # tukar referensi: request yang sedang berjalan tetap memakai head lama
+    logger.info(f"🧷 Registered class '{name}' from {sum(len(f) for f in features)} images")
+    return {"class": name, "num_examples": head.num_examples[name], "classes": head.class_names, "skipped": skipped}
+
+@app.delete("/admin/classes/{name}", dependencies=[Depends(require_admin)])
+def remove_class(name: str):
+    """Hapus kelas tambahan dari prototype head"""
+    global prototype_head
+    if prototype_head is None or name not in prototype_head.extra_classes:
+        raise HTTPException(status_code=404, detail=f"No registered class '{name}'")
+    head = prototype_head.clone()
+    head.remove(name)
+    # Simpan di sebelah checkpoint milik head (model aktif bisa sudah berganti karena hot reload)
+    head.save(prototype_head_path(head.base_checkpoint))
+    prototype_head = head
+    return {"classes": head.class_names}
+
+def decode_frame(data):
+    """Decode satu frame (bytes JPEG/PNG) menjadi tensor input (3, H, W) ternormalisasi."""
+    image = torch.empty((3,) + config.INPUT_SIZE, dtype=torch.float32)
+    buffer_pool.fill(image, io.BytesIO(data), config.MAX_IMAGE_PIXELS, config.MAX_IMAGE_SIDE)
+    return image
+
+
+def infer_frames(images):
+    """Dipanggil MicroBatcher: gabungkan frame ke satu slot buffer lalu satu forward pass."""
+    with buffer_pool.acquire() as buf:
+        batch = buf[:len(images)]
+        torch.stack(images, out=batch)
+        return run_inference(batch)[0]
+
+
+async def _read_frames(websocket, slot):
+    """Terima frame biner terus-menerus; hanya frame terbaru yang disimpan."""
+    seq = 0
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            data = message.get("bytes")
+            if data is None:
+                continue  # pesan teks diabaikan
+            slot.put((seq, data))
+            seq += 1
+    except (WebSocketDisconnect, RuntimeError, ConnectionError):
+        pass  # koneksi putus di tengah receive: sama dengan disconnect
+    finally:
+        slot.close()
+
+
+@app.websocket("/ws/classify")
+async def classify_stream(websocket: WebSocket, binary: bool = False):
+    """
+    Klasifikasi frame kamera lewat satu koneksi WebSocket.
+    
+    Client mengirim frame biner (JPEG/PNG). Nomor urut (seq) frame dihitung dari 0.
+    Frame yang menumpuk saat inferensi masih berjalan dibuang (hanya frame terbaru diproses).
+    
+    Hasil per frame:
+    - JSON: {"seq": n, "class": idx, "conf": p, "dropped": k}  (idx sesuai urutan /health "classes")
+    - binary=true: struct little-endian <I B f H> = seq, class, conf, dropped (11 byte)
+    """
+    await websocket.accept()
+    if not model_ready():
+        await websocket.close(code=1013)  # try again later
+        return
+    
+    slot = LatestFrame()
+    reader = asyncio.create_task(_read_frames(websocket, slot))
+    reported_dropped = 0
+    try:
+        while True:
+            item = await slot.get()
+            if item is None:
+                break
+            seq, data = item
+            dropped = slot.dropped - reported_dropped
+            reported_dropped = slot.dropped
             
-            results.append({
-                "filename": file.filename,
-                "class": LABEL_MAP[predicted_idx],
-                "confidence": confidence,
-                "success": True
-            })
+            if len(data) > config.MAX_BODY_BYTES:
+                await websocket.send_json({"seq": seq, "error": "frame too large"})
+                continue
+            try:
+                image = await run_in_threadpool(decode_frame, data)
+                probabilities = await stream_batcher.submit(image)
+            except Exception as e:
+                await websocket.send_json({"seq": seq, "error": str(e)})
+                continue
             
-        except Exception as e:
-            results.append({
-                "filename": file.filename,
-                "error": str(e),
-                "success": False
-            })
-    
-    return JSONResponse(content={"results": results})
+            predicted_idx = int(probabilities.argmax())
+            confidence = float(probabilities[predicted_idx])
+            if binary:
+                await websocket.send_bytes(struct.pack("<IBfH", seq, predicted_idx, confidence, min(dropped, 0xFFFF)))
+            else:
+                await websocket.send_json({"seq": seq, "class": predicted_idx,
+                                           "conf": round(confidence, 4), "dropped": dropped})
+    except (WebSocketDisconnect, RuntimeError, ConnectionError):
+        # Client sudah menutup koneksi: send_* melempar RuntimeError ("close message has been sent")
+        # atau error koneksi, bukan WebSocketDisconnect
+        pass
+    finally:
+        reader.cancel()
+        logger.info(f"🔌 Stream closed ({slot.dropped} stale frames dropped)")
 
 if __name__ == "__main__":
     import uvicorn
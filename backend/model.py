@@ -2,6 +2,7 @@
 import torch
 import torch.nn as nn
 from torchvision.models import resnet18, ResNet18_Weights
+from torchvision.models import mobilenet_v3_small, MobileNet_V3_Small_Weights
 
 class WasteClassifier(nn.Module):
     def __init__(self, num_classes=6, freeze_backbone=False):
@@ -25,6 +26,17 @@ class WasteClassifier(nn.Module):
     def forward(self, x):
         return self.backbone(x)
 
+    def forward_features(self, x):
+        """Fitur penultimate (B, 512): output avgpool ResNet18 sebelum head."""
+        b = self.backbone
+        x = b.maxpool(b.relu(b.bn1(b.conv1(x))))
+        x = b.layer4(b.layer3(b.layer2(b.layer1(x))))
+        return torch.flatten(b.avgpool(x), 1)
+
+    def classify_features(self, features):
+        """Head saja: fitur dari `forward_features` → logits."""
+        return self.backbone.fc(features)
+
     def init_weights(self, method="kaiming"):
         # Hanya inisialisasi ulang head layer (jika tidak freeze)
         for m in self.backbone.fc.modules():
@@ -33,4 +45,84 @@ class WasteClassifier(nn.Module):
                     nn.init.kaiming_normal_(m.weight, nonlinearity='relu')
                 elif method == "xavier":
                     nn.init.xavier_normal_(m.weight)
-                nn.init.constant_(m.bias, 0)
\ No newline at end of file
+                nn.init.constant_(m.bias, 0)
+
+
+class SmallWasteClassifier(nn.Module):
+    """MobileNetV3-Small pretrained — model kecil & cepat untuk tahap pertama cascade."""
+
+    def __init__(self, num_classes=6, freeze_backbone=False):
+        super().__init__()
+        weights = MobileNet_V3_Small_Weights.DEFAULT
+        self.backbone = mobilenet_v3_small(weights=weights)
+
+        if freeze_backbone:
+            for param in self.backbone.parameters():
+                param.requires_grad = False
+
+        # Ganti layer klasifikasi terakhir
+        in_features = self.backbone.classifier[-1].in_features
+        self.backbone.classifier[-1] = nn.Linear(in_features, num_classes)
+
+    def forward(self, x):
+        return self.backbone(x)
+
+    def forward_features(self, x):
+        """Fitur penultimate (B, 1024): input layer klasifikasi terakhir."""
+        b = self.backbone
+        x = torch.flatten(b.avgpool(b.features(x)), 1)
+        return b.classifier[:-1](x)
+
+    def classify_features(self, features):
+        return self.backbone.classifier[-1](features)
+
+    def init_weights(self, method="kaiming"):
+        m = self.backbone.classifier[-1]
+        if method == "kaiming":
+            nn.init.kaiming_normal_(m.weight, nonlinearity='relu')
+        elif method == "xavier":
+            nn.init.xavier_normal_(m.weight)
+        nn.init.constant_(m.bias, 0)
+
+
+# Arsitektur yang bisa dipilih lewat --arch dan disimpan di checkpoint ('arch')
+ARCHITECTURES = {
+    "resnet18": WasteClassifier,
+    "mobilenet_v3_small": SmallWasteClassifier,
+}
+
+
+def build_model(arch="resnet18", num_classes=6, **kwargs):
+    if arch not in ARCHITECTURES:
+        raise ValueError(f"Arsitektur tidak dikenal: {arch} (pilihan: {list(ARCHITECTURES)})")
+    return ARCHITECTURES[arch](num_classes=num_classes, **kwargs)
+
+
+def apply_channel_config(model, channel_config):
+    """
+    Ubah lebar channel tengah BasicBlock ResNet (conv1 → bn1 → conv2) sesuai hasil pruning,
+    misal {"layer1.0": 40, "layer3.1": 128}. Modul dibuat ulang (bobot dimuat setelahnya),
+    sehingga model benar-benar lebih kecil, bukan sekadar bobot nol.
+    """
+    for name, channels in channel_config.items():
+        block = model.backbone.get_submodule(name)
+        conv1, conv2 = block.conv1, block.conv2
+        block.conv1 = nn.Conv2d(conv1.in_channels, channels, conv1.kernel_size,
+                                stride=conv1.stride, padding=conv1.padding, bias=False)
+        block.bn1 = nn.BatchNorm2d(channels)
+        block.conv2 = nn.Conv2d(channels, conv2.out_channels, conv2.kernel_size,
+                                stride=conv2.stride, padding=conv2.padding, bias=False)
+    return model
+
+
+def load_model_from_checkpoint(checkpoint, num_classes=6):
+    """
+    Bangun model sesuai 'arch' di checkpoint (default resnet18 untuk checkpoint lama),
+    terapkan 'channel_config' jika model hasil pruning, lalu muat bobot.
+    """
+    arch = checkpoint.get('arch') or checkpoint.get('args', {}).get('arch', 'resnet18')
+    model = build_model(arch, num_classes=num_classes)
+    if checkpoint.get('channel_config'):
+        apply_channel_config(model, checkpoint['channel_config'])
+    model.load_state_dict(checkpoint['model_state_dict'])
+    return model
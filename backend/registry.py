@@ -0,0 +1,185 @@
+# registry.py — registry model berversi dengan hot reload dan traffic split ke kandidat
+import logging
+import os
+import random
+import threading
+import time
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+class LoadedModel:
+    """Satu versi model yang sudah dimuat dan di-warm-up."""
+
+    def __init__(self, version, path, model, checkpoint):
+        self.version = version
+        self.path = path
+        self.model = model
+        self.val_acc = checkpoint.get('val_acc')
+        self.epoch = checkpoint.get('epoch')
+        self.loaded_at = time.time()
+        self.warmup = None
+
+    def info(self):
+        return {
+            "version": self.version,
+            "path": self.path,
+            "val_acc": self.val_acc,
+            "epoch": self.epoch,
+            "loaded_at": self.loaded_at,
+            "warmup": self.warmup,
+        }
+
+
+class ModelRegistry:
+    """
+    Memantau `model_dir` secara berkala. Versi baru dimuat dan di-warm-up di thread latar,
+    lalu ditukar secara atomik (request yang sedang berjalan tetap memakai referensi lama).
+
+    Layout direktori: <model_dir>/<versi>/best_model.pth atau <model_dir>/<versi>.pth.
+    Versi terbaru ditentukan dari mtime file. Jika `candidate_percent` > 0, versi baru menjadi
+    kandidat yang menerima persentase traffic tersebut sampai di-promote.
+    """
+
+    def __init__(self, model_dir, build_fn, warmup_fn=None, fallback_checkpoint=None,
+                 candidate_percent=0.0, poll_seconds=10.0):
+        self.model_dir = model_dir
+        self.build_fn = build_fn
+        self.warmup_fn = warmup_fn
+        self.fallback_checkpoint = fallback_checkpoint
+        self.candidate_percent = candidate_percent
+        self.poll_seconds = poll_seconds
+        self.active = None
+        self.candidate = None
+        self._lock = threading.Lock()
+        self._seen = {}        # versi → (mtime, size) yang sudah dimuat / ditolak
+        self._pending = {}     # versi → (mtime, size) dari poll sebelumnya (menunggu file stabil)
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------- scanning ----------
+    def scan(self):
+        """Daftar versi di direktori: {versi: (path, mtime, size)}."""
+        versions = {}
+        if not os.path.isdir(self.model_dir):
+            return versions
+        for name in os.listdir(self.model_dir):
+            full = os.path.join(self.model_dir, name)
+            if os.path.isdir(full):
+                path = os.path.join(full, "best_model.pth")
+                version = name
+            elif name.endswith(".pth"):
+                path = full
+                version = name[:-len(".pth")]
+            else:
+                continue
+            if os.path.isfile(path):
+                st = os.stat(path)
+                versions[version] = (path, st.st_mtime, st.st_size)
+        return versions
+
+    def _load(self, version, path):
+        checkpoint = torch.load(path, map_location='cpu', weights_only=True)
+        model = self.build_fn(checkpoint)
+        loaded = LoadedModel(version, path, model, checkpoint)
+        if self.warmup_fn is not None:
+            loaded.warmup = self.warmup_fn(model)
+        return loaded
+
+    # ---------- lifecycle ----------
+    def load_initial(self):
+        """Muat versi terbaru (atau checkpoint fallback) secara sinkron saat startup."""
+        versions = self.scan()
+        if versions:
+            version = max(versions, key=lambda v: versions[v][1])
+            path, mtime, size = versions[version]
+            for v, (_, m, s) in versions.items():
+                self._seen[v] = (m, s)
+        elif self.fallback_checkpoint and os.path.isfile(self.fallback_checkpoint):
+            version, path = "default", self.fallback_checkpoint
+        else:
+            raise FileNotFoundError(
+                f"Tidak ada model di {self.model_dir} dan checkpoint fallback tidak ditemukan"
+            )
+        self.active = self._load(version, path)
+        logger.info(f"📦 Active model: {version} ({path})")
+        return self.active
+
+    def start_watcher(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"❌ Model registry poll failed: {e}")
+
+    def poll(self):
+        """Satu putaran pemantauan: muat versi baru yang file-nya sudah stabil."""
+        for version, (path, mtime, size) in sorted(self.scan().items(), key=lambda kv: kv[1][1]):
+            stamp = (mtime, size)
+            if self._seen.get(version) == stamp:
+                continue
+            # Tunggu satu poll lagi agar tidak memuat file yang masih ditulis train.py
+            if self._pending.get(version) != stamp:
+                self._pending[version] = stamp
+                continue
+            self._pending.pop(version, None)
+            self._seen[version] = stamp
+            try:
+                logger.info(f"🔄 Loading model version {version} in background...")
+                loaded = self._load(version, path)
+            except Exception as e:
+                logger.error(f"❌ Failed to load model version {version}: {e}")
+                continue
+            self._install(loaded)
+
+    def _install(self, loaded):
+        with self._lock:
+            if self.candidate_percent > 0 and self.active is not None:
+                self.candidate = loaded
+                logger.info(f"🧪 Candidate model: {loaded.version} ({self.candidate_percent:g}% traffic)")
+            else:
+                self.active = loaded
+                logger.info(f"✅ Active model swapped to {loaded.version}")
+
+    # ---------- routing ----------
+    def select(self):
+        """Pilih model untuk satu request (kandidat mendapat `candidate_percent`% traffic)."""
+        active, candidate = self.active, self.candidate
+        if candidate is not None and random.random() * 100 < self.candidate_percent:
+            return candidate
+        return active
+
+    def promote(self):
+        """Jadikan kandidat sebagai model aktif."""
+        with self._lock:
+            if self.candidate is None:
+                return False
+            self.active, self.candidate = self.candidate, None
+            logger.info(f"✅ Candidate {self.active.version} promoted to active")
+            return True
+
+    def discard_candidate(self):
+        with self._lock:
+            dropped, self.candidate = self.candidate, None
+            return dropped is not None
+
+    def set_candidate_percent(self, percent):
+        self.candidate_percent = max(0.0, min(100.0, float(percent)))
+
+    def status(self):
+        return {
+            "active": self.active.info() if self.active else None,
+            "candidate": self.candidate.info() if self.candidate else None,
+            "candidate_percent": self.candidate_percent,
+            "model_dir": self.model_dir,
+        }
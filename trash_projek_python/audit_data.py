@@ -0,0 +1,169 @@
+# audit_data.py — audit paralel data/pics: gambar rusak, ukuran, perceptual hash & near-duplicate lintas split
+import argparse
+import hashlib
+import io
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from manifest import MANIFEST_PATH, list_images, read_manifest, read_split_assignments, write_manifest
+from utils import print_time
+from waste_infer.labels import CLASS_NAMES
+
+SPLIT_LISTS = {
+    "train": "data/one-indexed-files-notrash_train.txt",
+    "val": "data/one-indexed-files-notrash_val.txt",
+    "test": "data/one-indexed-files-notrash_test.txt",
+}
+
+
+def dhash(img, size=8):
+    """Difference hash 64-bit: bandingkan piksel bertetangga pada grayscale (size+1)×size."""
+    pixels = list(img.convert("L").resize((size + 1, size), Image.BILINEAR).getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def inspect_image(args):
+    """
+    Dijalankan di worker: baca file sekali (hash isi + decode dari memori).
+    Gambar dianggap rusak jika verify() gagal atau decode penuh gagal (misal JPEG terpotong).
+    """
+    data_root, rel_path = args
+    full_path = os.path.join(data_root, rel_path)
+    st = os.stat(full_path)
+    record = {
+        "path": rel_path,
+        "class": rel_path.split("/", 1)[0],
+        "bytes": st.st_size,
+        "mtime": st.st_mtime,
+        "width": None, "height": None, "format": None,
+        "dhash": None, "ok": False, "error": "",
+    }
+    with open(full_path, "rb") as f:
+        data = f.read()
+    record["sha1"] = hashlib.sha1(data).hexdigest()
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.verify()
+        with Image.open(io.BytesIO(data)) as img:
+            record.update(width=img.width, height=img.height, format=img.format)
+            img.load()
+            record["dhash"] = f"{dhash(img):016x}"
+        record["ok"] = True
+    except Exception as e:
+        record["error"] = str(e) or e.__class__.__name__
+    return record
+
+
+def find_near_duplicates(records, bands=8, max_distance=6):
+    """
+    Near-duplicate lewat LSH banded: hash 64-bit dipecah menjadi `bands` potongan; dua gambar
+    menjadi kandidat jika minimal satu potongan identik, lalu dicek jarak Hamming penuh.
+    Dengan max_distance < bands, semua pasangan dalam jarak tersebut pasti ditemukan (pigeonhole),
+    tanpa membandingkan semua pasangan.
+    """
+    bits_per_band = 64 // bands
+    mask = (1 << bits_per_band) - 1
+    hashed = [(r["path"], int(r["dhash"], 16)) for r in records if r.get("dhash")]
+    buckets = defaultdict(list)
+    for i, (_, h) in enumerate(hashed):
+        for b in range(bands):
+            buckets[(b, (h >> (b * bits_per_band)) & mask)].append(i)
+
+    pairs = {}
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                i, j = members[x], members[y]
+                if (i, j) in pairs:
+                    continue
+                distance = bin(hashed[i][1] ^ hashed[j][1]).count("1")
+                if distance <= max_distance:
+                    pairs[(i, j)] = distance
+    return [(hashed[i][0], hashed[j][0], d) for (i, j), d in sorted(pairs.items(), key=lambda kv: kv[1])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit dataset: gambar rusak, ukuran, near-duplicate")
+    parser.add_argument("--data_root", type=str, default="data/pics")
+    parser.add_argument("--manifest", type=str, default=MANIFEST_PATH)
+    parser.add_argument("--report", type=str, default="data/audit_report.json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--bands", type=int, default=8, help="Jumlah potongan hash untuk LSH")
+    parser.add_argument("--max_distance", type=int, default=6, help="Jarak Hamming maksimum near-duplicate")
+    parser.add_argument("--full", action="store_true",
+                        help="Periksa ulang semua file (default: file dengan ukuran & mtime sama dipakai dari manifest)")
+    args = parser.parse_args()
+
+    if args.max_distance >= args.bands:
+        print_time(f"⚠️  max_distance {args.max_distance} ≥ bands {args.bands}: sebagian pasangan bisa terlewat")
+
+    previous = {} if args.full else read_manifest(args.manifest)
+    paths = list_images(args.data_root)
+    todo, records = [], {}
+    for rel_path in paths:
+        old = previous.get(rel_path)
+        st = os.stat(os.path.join(args.data_root, rel_path))
+        # Record dari generate_lists.py belum punya hasil audit ("ok") → tetap diperiksa
+        if old and "ok" in old and old.get("bytes") == st.st_size and old.get("mtime") == st.st_mtime:
+            records[rel_path] = old
+        else:
+            todo.append(rel_path)
+    print_time(f"🔍 {len(paths)} gambar ({len(todo)} baru/berubah) — {args.workers} proses")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        chunksize = max(1, len(todo) // (4 * max(1, args.workers)))
+        for record in pool.map(inspect_image, [(args.data_root, p) for p in todo], chunksize=chunksize):
+            records[record["path"]] = record
+
+    # Split diambil dari list file saat ini
+    splits = read_split_assignments(SPLIT_LISTS)
+    for rel_path, record in records.items():
+        if rel_path in splits:
+            record["split"] = splits[rel_path]
+    write_manifest(records, args.manifest)
+
+    corrupt = [r for r in records.values() if not r["ok"]]
+    duplicates = find_near_duplicates(list(records.values()), args.bands, args.max_distance)
+    cross_split = [
+        (a, b, d) for a, b, d in duplicates
+        if records[a].get("split") and records[b].get("split") and records[a]["split"] != records[b]["split"]
+    ]
+    exact = defaultdict(list)
+    for r in records.values():
+        exact[r["sha1"]].append(r["path"])
+
+    report = {
+        "num_images": len(records),
+        "per_class": {cls: sum(r["class"] == cls for r in records.values()) for cls in CLASS_NAMES},
+        "corrupt": [{"path": r["path"], "error": r["error"]} for r in corrupt],
+        "exact_duplicates": [group for group in exact.values() if len(group) > 1],
+        "near_duplicates": [{"a": a, "b": b, "distance": d} for a, b, d in duplicates],
+        "cross_split_near_duplicates": [
+            {"a": a, "split_a": records[a]["split"], "b": b, "split_b": records[b]["split"], "distance": d}
+            for a, b, d in cross_split
+        ],
+    }
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for cls, n in report["per_class"].items():
+        print(f"  {cls:10}: {n}")
+    print_time(f"❌ Rusak: {len(corrupt)} | 🧬 duplikat persis: {len(report['exact_duplicates'])} grup | "
+               f"near-duplicate: {len(duplicates)} pasang ({len(cross_split)} lintas split)")
+    print_time(f"📁 Manifest: {args.manifest} | laporan: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
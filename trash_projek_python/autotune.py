@@ -0,0 +1,198 @@
+# autotune.py — cari batch size & konfigurasi DataLoader tercepat untuk mesin ini
+import copy
+import os
+import time
+
+import torch
+from torch.utils.data import DataLoader
+
+from utils import print_time
+
+
+def available_memory_bytes(device):
+    """Memori yang masih bebas di device (GPU) atau RAM sistem (CPU)."""
+    if device.type == "cuda":
+        free, _ = torch.cuda.mem_get_info(device)
+        return free
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+
+def _peak_memory_bytes(device):
+    if device.type == "cuda":
+        return torch.cuda.max_memory_allocated(device)
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _train_step(model, optimizer, criterion, data, target):
+    optimizer.zero_grad()
+    loss = criterion(model(data), target)
+    loss.backward()
+    optimizer.step()
+
+
+def probe_batch_sizes(model, criterion, device, input_size, candidates, num_classes,
+                      headroom=0.8, steps=3):
+    """
+    Tahap 1 — batch size: untuk setiap kandidat (urut naik) jalankan beberapa langkah
+    forward/backward dengan input sintetis. Kandidat gagal jika OOM atau peak memori melebihi
+    `headroom` × memori yang tersedia. Mengembalikan {batch_size: sampel/detik (compute saja)}.
+    """
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.0)
+    budget = available_memory_bytes(device) * headroom
+    base_peak = _peak_memory_bytes(device)
+    results = {}
+    for bs in sorted(candidates):
+        data = torch.randn((bs, 3) + tuple(input_size), device=device)
+        target = torch.randint(0, num_classes, (bs,), device=device)
+        try:
+            if device.type == "cuda":
+                torch.cuda.reset_peak_memory_stats(device)
+            _train_step(model, optimizer, criterion, data, target)  # warm-up
+            if device.type == "cuda":
+                torch.cuda.synchronize(device)
+            t0 = time.perf_counter()
+            for _ in range(steps):
+                _train_step(model, optimizer, criterion, data, target)
+            if device.type == "cuda":
+                torch.cuda.synchronize(device)
+            elapsed = time.perf_counter() - t0
+        except RuntimeError as e:
+            if "out of memory" not in str(e).lower():
+                raise
+            print_time(f"   batch {bs}: OOM — berhenti")
+            break
+        finally:
+            del data, target
+            if device.type == "cuda":
+                torch.cuda.empty_cache()
+        used = _peak_memory_bytes(device) - (0 if device.type == "cuda" else base_peak)
+        if used > budget:
+            print_time(f"   batch {bs}: peak {used / 2**20:.0f} MB > budget {budget / 2**20:.0f} MB — berhenti")
+            break
+        results[bs] = bs * steps / elapsed
+        print_time(f"   batch {bs}: {results[bs]:.1f} sampel/s (compute), peak {used / 2**20:.0f} MB")
+    return results
+
+
+def measure_loader(model, criterion, dataset, device, batch_size, num_workers, persistent_workers,
+                   prefetch_factor, steps=10, passes=2, warmup_batches=2):
+    """
+    Tahap 2 — DataLoader: throughput end-to-end (data + train step) untuk `passes` putaran pendek.
+    Di setiap putaran, `warmup_batches` batch pertama (start worker, isi antrean prefetch) tidak dihitung,
+    sehingga laju dan stabilitas dinilai dari kondisi steady state. Waktu sampai batch pertama dicatat
+    terpisah (di sinilah persistent_workers menghemat waktu pada putaran kedua).
+    Mengembalikan (rata-rata sampel/detik steady state, stabil?, detik sampai batch pertama per putaran).
+    """
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.0)
+    loader = DataLoader(
+        dataset, batch_size=batch_size, shuffle=True, drop_last=True,
+        num_workers=num_workers, pin_memory=(device.type == 'cuda'),
+        persistent_workers=persistent_workers if num_workers > 0 else False,
+        prefetch_factor=prefetch_factor if num_workers > 0 else None,
+    )
+    # Minimal satu batch tersisa untuk diukur
+    warmup_batches = max(0, min(warmup_batches, len(loader) - 1))
+    rates, startup = [], []
+    for _ in range(passes):
+        seen = 0
+        t_pass = t0 = time.perf_counter()
+        for i, (data, target) in enumerate(loader):
+            if i >= warmup_batches + steps:
+                break
+            if i == 0:
+                startup.append(time.perf_counter() - t_pass)
+            _train_step(model, optimizer, criterion,
+                        data.to(device, non_blocking=True), target.to(device, non_blocking=True))
+            if i < warmup_batches:
+                if i == warmup_batches - 1:
+                    if device.type == "cuda":
+                        torch.cuda.synchronize(device)
+                    t0 = time.perf_counter()
+                continue
+            seen += data.size(0)
+        if device.type == "cuda":
+            torch.cuda.synchronize(device)
+        rates.append(seen / (time.perf_counter() - t0))
+    del loader
+    # Stabil jika throughput steady state antar putaran tidak berbeda lebih dari 25%
+    stable = min(rates) >= 0.75 * max(rates)
+    return sum(rates) / len(rates), stable, startup
+
+
+def auto_tune(model, criterion, dataset, device, input_size, num_classes, base_batch_size, base_lr,
+              batch_candidates=(8, 16, 32, 64, 128), lr_scaling="linear", headroom=0.8, steps=10):
+    """
+    Pilih konfigurasi training tercepat yang stabil. Bobot model dikembalikan seperti semula.
+    Mengembalikan dict: batch_size, num_workers, persistent_workers, prefetch_factor, lr, + hasil ukur.
+    """
+    state = copy.deepcopy(model.state_dict())
+    was_training = model.training
+    model.train()
+
+    print_time("🔧 Auto-tune tahap 1: batch size (memori & compute)")
+    compute = probe_batch_sizes(model, criterion, device, input_size, batch_candidates, num_classes,
+                                headroom=headroom)
+    if not compute:
+        raise RuntimeError("Auto-tune: tidak ada batch size yang muat di memori")
+    # Batch terkecil yang throughput-nya >= 95% dari yang terbaik (batch lebih kecil = generalisasi lebih baik)
+    best_rate = max(compute.values())
+    batch_size = min(bs for bs, r in compute.items() if r >= 0.95 * best_rate)
+    batch_size = min(batch_size, len(dataset))
+
+    print_time(f"🔧 Auto-tune tahap 2: DataLoader (batch {batch_size})")
+    cpu_count = os.cpu_count() or 1
+    worker_candidates = sorted({0, 2, 4, cpu_count // 2, cpu_count} & set(range(cpu_count + 1)))
+    configs = []
+    for workers in worker_candidates:
+        if workers == 0:
+            configs.append((0, False, None))
+            continue
+        for persistent in (False, True):
+            for prefetch in (2, 4):
+                configs.append((workers, persistent, prefetch))
+
+    measurements = []
+    for workers, persistent, prefetch in configs:
+        rate, stable, startup = measure_loader(model, criterion, dataset, device, batch_size, workers,
+                                               persistent, prefetch, steps=steps)
+        measurements.append({"num_workers": workers, "persistent_workers": persistent,
+                             "prefetch_factor": prefetch, "samples_per_sec": rate, "stable": stable,
+                             "first_batch_sec": startup})
+        print_time(f"   workers={workers:2d} persistent={persistent!s:5} prefetch={prefetch}: "
+                   f"{rate:.1f} sampel/s, batch pertama {' / '.join(f'{t:.2f}' for t in startup)} s"
+                   f"{'' if stable else ' (tidak stabil)'}")
+    candidates = [m for m in measurements if m["stable"]] or measurements
+    best = max(candidates, key=lambda m: m["samples_per_sec"])
+
+    # Skala learning rate mengikuti batch size
+    ratio = batch_size / base_batch_size
+    if lr_scaling == "linear":
+        lr = base_lr * ratio
+    elif lr_scaling == "sqrt":
+        lr = base_lr * ratio ** 0.5
+    else:
+        lr = base_lr
+
+    model.load_state_dict(state)
+    model.train(was_training)
+    return {
+        "batch_size": batch_size,
+        "num_workers": best["num_workers"],
+        "persistent_workers": best["persistent_workers"],
+        "prefetch_factor": best["prefetch_factor"] or 2,
+        "lr": lr,
+        "lr_scaling": lr_scaling,
+        "base_batch_size": base_batch_size,
+        "base_lr": base_lr,
+        "samples_per_sec": best["samples_per_sec"],
+        "compute_samples_per_sec": {str(k): v for k, v in compute.items()},
+        "loader_measurements": measurements,
+    }
@@ -0,0 +1,122 @@
+# build_index.py — bangun index nearest-neighbor (memmap) dari embedding seluruh korpus gambar
+import argparse
+import json
+import os
+
+import numpy as np
+import torch
+from torch.utils.data import ConcatDataset, DataLoader
+
+from dataset import WasteDataset
+from embeddings import extract_embeddings
+from model import load_model_from_checkpoint
+from utils import print_time
+from waste_infer.labels import CLASS_NAMES
+
+DEFAULT_LISTS = [
+    "data/one-indexed-files-notrash_train.txt",
+    "data/one-indexed-files-notrash_val.txt",
+    "data/one-indexed-files-notrash_test.txt",
+]
+
+
+def kmeans(x, n_lists, iters=20, seed=42):
+    """Spherical k-means (cosine) sederhana untuk partisi IVF. Mengembalikan (centroid, assignment)."""
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=n_lists, replace=False)].copy()
+    assign = np.zeros(len(x), dtype=np.int64)
+    for _ in range(iters):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = x[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+            else:
+                # Partisi kosong: pindahkan centroid ke vektor acak
+                centroids[c] = x[rng.integers(len(x))]
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids.astype(np.float32), assign
+
+
+def quantize(features, dtype):
+    """float16 langsung; int8 simetris per dimensi (v ≈ v_q * scale). Mengembalikan (vektor, scale)."""
+    if dtype == "float16":
+        return features.astype(np.float16), None
+    scale = np.maximum(np.abs(features).max(axis=0), 1e-12) / 127.0
+    q = np.clip(np.round(features / scale), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def write_index(output_dir, features, labels, paths, dtype="float16", ivf_lists=0, meta=None):
+    """Tulis index ke `output_dir` (format dibaca oleh waste_infer.index.VectorIndex)."""
+    os.makedirs(output_dir, exist_ok=True)
+    order = np.arange(len(features))
+    if ivf_lists:
+        centroids, assign = kmeans(features, ivf_lists)
+        # Susun ulang vektor per partisi → setiap partisi satu rentang baris yang kontigu
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(ivf_lists + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assign, minlength=ivf_lists))
+        np.save(os.path.join(output_dir, "ivf_centroids.npy"), centroids)
+        np.save(os.path.join(output_dir, "ivf_offsets.npy"), offsets)
+
+    vectors, scale = quantize(features[order], dtype)
+    out = np.lib.format.open_memmap(os.path.join(output_dir, "vectors.npy"), mode="w+",
+                                    dtype=vectors.dtype, shape=vectors.shape)
+    out[:] = vectors
+    out.flush()
+    del out
+    if scale is not None:
+        np.save(os.path.join(output_dir, "scale.npy"), scale)
+    np.save(os.path.join(output_dir, "labels.npy"), labels[order].astype(np.int8))
+    with open(os.path.join(output_dir, "paths.txt"), "w") as f:
+        f.writelines(paths[i] + "\n" for i in order)
+
+    meta = dict(meta or {}, dim=int(features.shape[1]), count=int(len(features)), dtype=dtype,
+                ivf_lists=int(ivf_lists), classes=list(CLASS_NAMES))
+    with open(os.path.join(output_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bangun index similarity dari embedding gambar")
+    parser.add_argument("--checkpoint", type=str, default="checkpoints/final_v3/best_model.pth")
+    parser.add_argument("--list_files", type=str, nargs="+", default=DEFAULT_LISTS)
+    parser.add_argument("--data_folder", type=str, default="data/pics")
+    parser.add_argument("--output_dir", type=str, default="index")
+    parser.add_argument("--dtype", type=str, default="float16", choices=["float16", "int8"])
+    parser.add_argument("--ivf_lists", type=int, default=0,
+                        help="Jumlah partisi IVF (0 = scan penuh; ~sqrt(N) cocok untuk korpus besar)")
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--num_workers", type=int, default=4)
+    parser.add_argument("--input_size", type=int, nargs=2, default=[224, 224])
+    parser.add_argument("--num_classes", type=int, default=6)
+    parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    ckpt = torch.load(args.checkpoint, map_location=device, weights_only=True)
+    model = load_model_from_checkpoint(ckpt, num_classes=args.num_classes).to(device)
+
+    datasets = [WasteDataset(lf, args.data_folder, input_size=args.input_size, augment=False)
+                for lf in args.list_files if os.path.isfile(lf)]
+    if not datasets:
+        raise FileNotFoundError(f"Tidak ada list file yang ditemukan: {args.list_files}")
+    corpus = ConcatDataset(datasets)
+    paths = [os.path.relpath(p, args.data_folder) for ds in datasets for p in ds.filepaths]
+    loader = DataLoader(corpus, batch_size=args.batch_size, shuffle=False,
+                        num_workers=args.num_workers, pin_memory=(device.type == "cuda"))
+
+    print_time(f"🧮 Ekstraksi embedding {len(corpus)} gambar ({args.checkpoint})")
+    features, labels = extract_embeddings(model, loader, device)
+    ivf_lists = min(args.ivf_lists, len(features))
+    meta = write_index(args.output_dir, features, labels, paths, args.dtype, ivf_lists,
+                       meta={"checkpoint": os.path.abspath(args.checkpoint), "arch": ckpt.get("arch", "resnet18")})
+    size_mb = os.path.getsize(os.path.join(args.output_dir, "vectors.npy")) / 1e6
+    print_time(f"✅ Index tersimpan di {args.output_dir}: {meta['count']} vektor × {meta['dim']} "
+               f"({args.dtype}, {size_mb:.1f} MB, IVF={ivf_lists or 'off'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# cascade.py — cascade 2 tahap: model kecil dulu, ResNet18 hanya untuk input yang tidak yakin
+import torch
+
+
+def cascade_forward(small_model, large_model, x, threshold):
+    """
+    Jalankan model kecil pada seluruh batch; sampel dengan confidence < threshold
+    dijalankan ulang di model besar. Mengembalikan (probabilitas (B, C), mask sampel yang diteruskan).
+    """
+    probs = torch.softmax(small_model(x), dim=1)
+    routed = probs.max(dim=1).values < threshold
+    if routed.any():
+        probs[routed] = torch.softmax(large_model(x[routed]), dim=1)
+    return probs, routed
+
+
+def evaluate_cascade(small_probs, large_probs, labels, threshold, pred_fn=None):
+    """Simulasikan cascade dari probabilitas yang sudah dihitung. Mengembalikan (acc, fraksi_diteruskan)."""
+    pred_fn = pred_fn or (lambda p: p.argmax(dim=1))
+    routed = small_probs.max(dim=1).values < threshold
+    probs = torch.where(routed.unsqueeze(1), large_probs, small_probs)
+    acc = pred_fn(probs).eq(labels).float().mean().item()
+    return acc, routed.float().mean().item()
+
+
+def calibrate_threshold(small_probs, large_probs, labels, max_acc_drop=0.0, pred_fn=None, steps=200):
+    """
+    Cari threshold terkecil (paling sedikit input ke model besar) yang akurasinya
+    >= akurasi model besar - max_acc_drop. Mengembalikan (threshold, acc, fraksi_diteruskan).
+    """
+    pred_fn = pred_fn or (lambda p: p.argmax(dim=1))
+    target = pred_fn(large_probs).eq(labels).float().mean().item() - max_acc_drop
+    for threshold in torch.linspace(0.0, 1.0, steps + 1).tolist():
+        acc, frac = evaluate_cascade(small_probs, large_probs, labels, threshold, pred_fn)
+        if acc >= target - 1e-9:
+            return threshold, acc, frac
+    # threshold > 1 → semua sampel ke model besar
+    acc, frac = evaluate_cascade(small_probs, large_probs, labels, 1.01, pred_fn)
+    return 1.01, acc, frac
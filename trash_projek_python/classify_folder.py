@@ -0,0 +1,277 @@
+# classify_folder.py — klasifikasi massal (folder / manifest) dengan hasil streaming
+import argparse
+import csv
+import json
+import os
+import time
+import torch
+from torch.utils.data import DataLoader, IterableDataset, get_worker_info
+from torchvision import transforms
+from PIL import Image
+
+from dataset import PackedPaths
+from model import load_model_from_checkpoint
+from utils import print_time
+from waste_infer.labels import CLASS_NAMES, ONE_INDEXED_LABEL_MAP
+from waste_infer.preprocess import load_image
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png')
+
+
+def iter_folder(root):
+    """Telusuri folder secara rekursif dengan urutan deterministik."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fname in sorted(filenames):
+            if fname.lower().endswith(IMAGE_EXTS):
+                yield os.path.join(dirpath, fname)
+
+
+def iter_manifest(manifest, data_root=None):
+    """
+    Baca manifest baris demi baris.
+    Format: satu path per baris, atau format list file <nama_file.jpg> <label_1_indexed>
+    (butuh --data_root, path jadi data_root/<kelas>/<nama_file>).
+    """
+    with open(manifest, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            parts = line.split()
+            if data_root and len(parts) == 2 and parts[1].isdigit() and int(parts[1]) in ONE_INDEXED_LABEL_MAP:
+                yield os.path.join(data_root, ONE_INDEXED_LABEL_MAP[int(parts[1])], parts[0])
+            else:
+                yield line if not data_root else os.path.join(data_root, line)
+
+
+class ImageStream(IterableDataset):
+    """
+    Stream gambar per batch dari daftar path yang di-enumerate sekali di proses utama (`PackedPaths`:
+    dua buffer NumPy, tidak tumbuh per worker). Worker ke-w hanya men-decode chunk ke-i dengan
+    i % num_workers == w — cukup menghitung rentang index, tanpa menelusuri folder / membaca manifest
+    lagi — sehingga DataLoader (yang mengambil hasil worker secara round-robin) tetap mengembalikan
+    urutan input asli dan memori gambar dibatasi oleh prefetch_factor.
+    Dengan `raw=True` batch berupa uint8 NHWC (untuk model ONNX dengan preprocessing di dalam graph).
+    """
+
+    def __init__(self, paths, batch_size, input_size=(224, 224), skip=0, raw=False):
+        self.paths = paths
+        self.batch_size = batch_size
+        self.input_h, self.input_w = input_size
+        self.skip = skip
+        self.raw = raw
+        self.transform = transforms.Compose([
+            transforms.Resize((self.input_h, self.input_w)),
+            transforms.ToTensor(),
+            transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225]),
+        ])
+
+    def _decode(self, paths):
+        if self.raw:
+            images = torch.zeros(len(paths), self.input_h, self.input_w, 3, dtype=torch.uint8)
+        else:
+            images = torch.zeros(len(paths), 3, self.input_h, self.input_w)
+        errors = [""] * len(paths)
+        for j, path in enumerate(paths):
+            try:
+                if self.raw:
+                    images[j] = torch.from_numpy(load_image(path, (self.input_h, self.input_w)))
+                    continue
+                with Image.open(path) as img:
+                    images[j] = self.transform(img.convert("RGB"))
+            except Exception as e:
+                errors[j] = str(e) or e.__class__.__name__
+        return {"paths": paths, "images": images, "errors": errors}
+
+    def __iter__(self):
+        info = get_worker_info()
+        worker_id, num_workers = (info.id, info.num_workers) if info else (0, 1)
+        total = len(self.paths)
+        for start in range(self.skip + worker_id * self.batch_size, total, num_workers * self.batch_size):
+            yield self._decode(self.paths[start:min(start + self.batch_size, total)])
+
+
+def prepare_resume(output_path, fmt):
+    """
+    Hitung jumlah record yang sudah tertulis dan potong baris terakhir yang tidak lengkap
+    (misal proses dihentikan saat menulis). Mengembalikan (jumlah_record, path_terakhir).
+    """
+    if not os.path.isfile(output_path):
+        return 0, None
+    # Potong ekor file sampai newline terakhir
+    with open(output_path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        pos = size
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            block = f.read(step)
+            idx = block.rfind(b"\n")
+            if idx != -1:
+                pos = pos - step + idx + 1
+                break
+            pos -= step
+        if pos != size:
+            f.truncate(pos)
+
+    count, last_path = 0, None
+    with open(output_path, 'r', newline='') as f:
+        if fmt == "csv":
+            reader = csv.reader(f)
+            next(reader, None)  # header
+            for row in reader:
+                count += 1
+                last_path = row[0]
+        else:
+            for line in f:
+                count += 1
+                last_path = json.loads(line)["path"]
+    return count, last_path
+
+
+def verify_resume_point(paths, done, last_path):
+    """Pastikan urutan input tidak berubah sejak run sebelumnya."""
+    if done == 0:
+        return
+    if done > len(paths):
+        raise RuntimeError(f"Output berisi {done} record tetapi input hanya memiliki {len(paths)} gambar.")
+    if paths[done - 1] != last_path:
+        raise RuntimeError(
+            f"Urutan input berubah: record ke-{done} di output adalah '{last_path}', "
+            f"tetapi input sekarang '{paths[done - 1]}'. Hapus output atau gunakan --no_resume."
+        )
+
+
+def load_model(checkpoint_path, device, num_classes=6):
+    checkpoint = torch.load(checkpoint_path, map_location=device, weights_only=True)
+    model = load_model_from_checkpoint(checkpoint, num_classes=num_classes)
+    model = model.to(device)
+    model.eval()
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Klasifikasi massal gambar sampah")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--folder", type=str, help="Folder gambar (ditelusuri rekursif)")
+    src.add_argument("--manifest", type=str, help="File berisi satu path per baris (atau format list file)")
+    parser.add_argument("--data_root", type=str, default=None,
+                        help="Root untuk path relatif di manifest (contoh: data/pics)")
+    parser.add_argument("--output", type=str, required=True, help="File hasil (.csv atau .jsonl)")
+    parser.add_argument("--format", type=str, default=None, choices=["csv", "jsonl"])
+    parser.add_argument("--checkpoint", type=str, default="checkpoints/final_v3/best_model.pth")
+    parser.add_argument("--onnx", type=str, default=None,
+                        help="Pakai model ONNX (onnxruntime) alih-alih --checkpoint PyTorch")
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--num_workers", type=int, default=4)
+    parser.add_argument("--prefetch_factor", type=int, default=2)
+    parser.add_argument("--input_size", type=int, nargs=2, default=[224, 224])
+    parser.add_argument("--log_every", type=int, default=20, help="Laporan throughput setiap N batch")
+    parser.add_argument("--no_resume", action="store_true", help="Timpa output lama, mulai dari awal")
+    parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.output.lower().endswith(".csv") else "jsonl")
+    device = torch.device(args.device)
+
+    # Folder / manifest dibaca sekali di sini; worker hanya menerima daftar path yang sudah dipadatkan
+    if args.folder:
+        paths = PackedPaths(iter_folder(args.folder))
+    else:
+        paths = PackedPaths(iter_manifest(args.manifest, args.data_root))
+    print_time(f"📂 {len(paths)} gambar input")
+
+    # Resume
+    done = 0
+    if args.no_resume and os.path.isfile(args.output):
+        os.remove(args.output)
+    else:
+        done, last_path = prepare_resume(args.output, fmt)
+        verify_resume_point(paths, done, last_path)
+        if done:
+            print_time(f"🔁 Melanjutkan: {done} gambar sudah diklasifikasi di {args.output}")
+
+    onnx_model = None
+    if args.onnx:
+        from waste_infer.session import OnnxClassifier
+        print_time(f"📥 Memuat model ONNX: {args.onnx}")
+        onnx_model = OnnxClassifier(args.onnx, input_size=args.input_size)
+        device = torch.device("cpu")
+    else:
+        print_time(f"📥 Memuat model: {args.checkpoint} ({device})")
+        model = load_model(args.checkpoint, device)
+
+    # Model ONNX fused menerima piksel uint8 mentah: tidak ada konversi float di worker
+    raw = onnx_model is not None and onnx_model.fused_preprocess
+    stream = ImageStream(paths, args.batch_size, input_size=args.input_size, skip=done, raw=raw)
+    loader = DataLoader(
+        stream, batch_size=None, num_workers=args.num_workers,
+        prefetch_factor=args.prefetch_factor if args.num_workers > 0 else None,
+        pin_memory=(device.type == 'cuda'),
+    )
+
+    new_file = not os.path.isfile(args.output) or os.path.getsize(args.output) == 0
+    out = open(args.output, 'a', newline='')
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(out)
+        if new_file:
+            writer.writerow(["path", "label", "confidence"] + [f"prob_{c}" for c in CLASS_NAMES] + ["error"])
+
+    processed, failed = 0, 0
+    start = last_log = time.perf_counter()
+    last_count = 0
+    try:
+        with torch.no_grad():
+            for batch_idx, batch in enumerate(loader, 1):
+                if onnx_model is not None:
+                    images = batch["images"]
+                    if not raw:
+                        # Model ONNX lama: input float32 NCHW yang sudah dinormalisasi
+                        logits = onnx_model.session.run(None, {onnx_model.input_name: images.numpy()})[0]
+                        probs = torch.softmax(torch.from_numpy(logits), dim=1)
+                    else:
+                        probs = torch.from_numpy(onnx_model.predict(images.numpy()))
+                else:
+                    images = batch["images"].to(device, non_blocking=True)
+                    probs = torch.softmax(model(images), dim=1).cpu()
+                confs, preds = probs.max(dim=1)
+
+                for path, err, p, conf, pred in zip(batch["paths"], batch["errors"], probs.tolist(),
+                                                    confs.tolist(), preds.tolist()):
+                    if err:
+                        failed += 1
+                        record = {"path": path, "label": None, "confidence": None,
+                                  "probabilities": None, "error": err}
+                    else:
+                        record = {"path": path, "label": CLASS_NAMES[pred], "confidence": conf,
+                                  "probabilities": dict(zip(CLASS_NAMES, p)), "error": ""}
+                    if writer:
+                        row = [path, record["label"] or "", "" if err else f"{conf:.6f}"]
+                        row += ([""] * len(CLASS_NAMES)) if err else [f"{v:.6f}" for v in p]
+                        writer.writerow(row + [err])
+                    else:
+                        out.write(json.dumps(record) + "\n")
+                out.flush()
+                processed += len(batch["paths"])
+
+                if batch_idx % args.log_every == 0:
+                    now = time.perf_counter()
+                    rate = (processed - last_count) / (now - last_log)
+                    print_time(f"⚡ {done + processed} gambar | {rate:.1f} img/s "
+                               f"(rata-rata {processed / (now - start):.1f} img/s) | gagal: {failed}")
+                    last_log, last_count = now, processed
+    except KeyboardInterrupt:
+        print_time("⚠️  Dihentikan pengguna. Jalankan ulang perintah yang sama untuk melanjutkan.")
+    finally:
+        out.close()
+        elapsed = time.perf_counter() - start
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        print_time(f"🏁 Selesai: {processed} gambar baru ({failed} gagal) dalam {elapsed:.1f}s → {rate:.1f} img/s")
+        print_time(f"📁 Hasil: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# coreset.py — data pruning: skor sampel dari warm-up singkat (EL2N / forgetting / loss),
+# tulis list train yang lebih kecil + kurva akurasi vs fraksi data yang dipertahankan
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import torch.optim as optim
+from torch.utils.data import DataLoader
+
+from decoded_cache import DecodedDataset, build_decoded_cache
+from model import build_model, ARCHITECTURES
+from sweep import read_list
+from train import CLASS_WEIGHTS, evaluate, train_epoch
+from utils import print_time, ensure_dir
+from waste_infer.labels import CLASS_NAMES
+
+SCORES = ("el2n", "forgetting", "loss")
+
+
+def new_model(args, seed):
+    torch.manual_seed(seed)
+    model = build_model(args.arch, num_classes=args.num_classes).to(args.device)
+    model.init_weights(method="kaiming")
+    optimizer = optim.Adam(model.parameters(), lr=args.lr, weight_decay=args.weight_decay)
+    return model, optimizer
+
+
+@torch.no_grad()
+def predict_probs(model, dataloader, device):
+    """Softmax untuk semua sampel, urutan sama dengan dataset (dataloader tanpa shuffle)."""
+    model.eval()
+    probs = [F.softmax(model(data.to(device)), dim=1).cpu() for data, _ in dataloader]
+    return torch.cat(probs).numpy()
+
+
+def score_samples(args, train_idx, labels, criterion):
+    """
+    Warm-up `args.warmup_epochs` epoch (diulang `args.runs` seed), setelah tiap epoch semua sampel
+    train diprediksi tanpa augmentasi. Mengembalikan skor per sampel (besar = informatif/sulit):
+      - el2n: ||softmax - one_hot||₂ di akhir warm-up
+      - forgetting: jumlah transisi benar → salah; sampel yang tidak pernah benar = warmup_epochs + 1
+      - loss: cross-entropy di akhir warm-up
+    """
+    train_ds = DecodedDataset(args.cache_dir, train_idx, args.input_size, augment=True)
+    score_ds = DecodedDataset(args.cache_dir, train_idx, args.input_size, augment=False)
+    train_loader = DataLoader(train_ds, batch_size=args.batch_size, shuffle=True, num_workers=args.num_workers)
+    score_loader = DataLoader(score_ds, batch_size=args.batch_size * 2, shuffle=False, num_workers=args.num_workers)
+    one_hot = np.eye(args.num_classes, dtype=np.float32)[labels]
+
+    el2n = np.zeros(len(labels))
+    loss = np.zeros(len(labels))
+    forgetting = np.zeros(len(labels))
+    for run in range(args.runs):
+        model, optimizer = new_model(args, args.seed + run)
+        prev_correct = np.zeros(len(labels), dtype=bool)
+        ever_correct = np.zeros(len(labels), dtype=bool)
+        forgotten = np.zeros(len(labels))
+        for epoch in range(args.warmup_epochs):
+            train_loss, train_acc = train_epoch(model, train_loader, criterion, optimizer, args.device)
+            probs = predict_probs(model, score_loader, args.device)
+            correct = probs.argmax(axis=1) == labels
+            forgotten += prev_correct & ~correct
+            ever_correct |= correct
+            prev_correct = correct
+            print_time(f"🔥 Warm-up run {run + 1}/{args.runs} epoch {epoch + 1}/{args.warmup_epochs}: "
+                       f"loss {train_loss:.4f} acc {train_acc:.2%} | benar (tanpa augmentasi) {correct.mean():.2%}")
+        forgotten[~ever_correct] = args.warmup_epochs + 1
+        el2n += np.linalg.norm(probs - one_hot, axis=1)
+        loss += -np.log(np.clip(probs[np.arange(len(labels)), labels], 1e-12, None))
+        forgetting += forgotten
+    return {"el2n": el2n / args.runs, "forgetting": forgetting / args.runs, "loss": loss / args.runs}
+
+
+def select_coreset(scores, labels, fraction, drop_hardest=0.0, seed=0):
+    """
+    Index (relatif ke train) yang dipertahankan: per kelas, `fraction` sampel dengan skor tertinggi,
+    setelah `drop_hardest` teratas dibuang (kemungkinan label salah). Stratified → proporsi kelas tetap.
+    `scores=None` → subset acak (baseline).
+    """
+    rng = np.random.default_rng(seed)
+    keep = []
+    for c in np.unique(labels):
+        idx = np.flatnonzero(labels == c)
+        n_keep = max(1, int(round(fraction * len(idx))))
+        if scores is None:
+            keep.append(rng.choice(idx, n_keep, replace=False))
+            continue
+        # Skor seri (misal forgetting 0) diacak agar tidak bergantung urutan list file
+        order = idx[np.lexsort((rng.random(len(idx)), -scores[idx]))]
+        n_drop = min(int(round(drop_hardest * len(idx))), len(idx) - n_keep)
+        keep.append(order[n_drop:n_drop + n_keep])
+    return np.sort(np.concatenate(keep))
+
+
+def train_subset(args, train_idx, val_idx, criterion, seed):
+    """Latih model baru `args.curve_epochs` epoch pada subset; (best val acc, detik per epoch)."""
+    model, optimizer = new_model(args, seed)
+    scheduler = optim.lr_scheduler.StepLR(optimizer, step_size=args.lr_decay_every, gamma=args.lr_decay_factor)
+    train_loader = DataLoader(DecodedDataset(args.cache_dir, train_idx, args.input_size, augment=True),
+                              batch_size=args.batch_size, shuffle=True, num_workers=args.num_workers)
+    val_loader = DataLoader(DecodedDataset(args.cache_dir, val_idx, args.input_size, augment=False),
+                            batch_size=args.batch_size * 2, shuffle=False, num_workers=args.num_workers)
+    best_acc, seconds = 0.0, 0.0
+    for epoch in range(args.curve_epochs):
+        start = time.perf_counter()
+        train_epoch(model, train_loader, criterion, optimizer, args.device)
+        seconds += time.perf_counter() - start
+        _, val_acc = evaluate(model, val_loader, criterion, args.device)
+        scheduler.step()
+        best_acc = max(best_acc, val_acc)
+    return best_acc, seconds / max(args.curve_epochs, 1)
+
+
+def write_list(path, filepaths, labels, keep):
+    """List file format train.py: <nama_file> <label_1_indexed>."""
+    ensure_dir(os.path.dirname(path) or ".")
+    with open(path, "w") as f:
+        for i in keep:
+            f.write(f"{os.path.basename(filepaths[i])} {int(labels[i]) + 1}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coreset: pangkas sampel train yang mudah/redundan")
+    parser.add_argument("--train_list", type=str, default="data/one-indexed-files-notrash_train.txt")
+    parser.add_argument("--val_list", type=str, default="data/one-indexed-files-notrash_val.txt")
+    parser.add_argument("--data_folder", type=str, default="data/pics")
+    parser.add_argument("--cache_dir", type=str, default="data/cache/decoded")
+    parser.add_argument("--cache_size", type=int, default=256, help="Sisi gambar di cache ter-decode")
+    parser.add_argument("--input_size", type=int, nargs=2, default=[224, 224])
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--num_workers", type=int, default=4)
+    parser.add_argument("--arch", type=str, default="resnet18", choices=list(ARCHITECTURES))
+    parser.add_argument("--num_classes", type=int, default=6)
+    parser.add_argument("--lr", type=float, default=1e-4)
+    parser.add_argument("--weight_decay", type=float, default=1e-4)
+    parser.add_argument("--lr_decay_factor", type=float, default=0.5)
+    parser.add_argument("--lr_decay_every", type=int, default=8)
+    parser.add_argument("--no_class_weights", action="store_true", help="Loss tanpa CLASS_WEIGHTS train.py")
+
+    parser.add_argument("--score", type=str, default="el2n", choices=SCORES)
+    parser.add_argument("--warmup_epochs", type=int, default=3, help="Epoch warm-up untuk menghitung skor")
+    parser.add_argument("--runs", type=int, default=1, help="Warm-up diulang dengan seed berbeda, skor dirata-rata")
+    parser.add_argument("--keep", type=float, default=0.5, help="Fraksi sampel train yang ditulis ke --out_list")
+    parser.add_argument("--drop_hardest", type=float, default=0.0,
+                        help="Fraksi skor tertinggi per kelas yang dibuang (outlier / label salah)")
+    parser.add_argument("--out_list", type=str, default=None,
+                        help="Default: <train_list>_coreset<keep>.txt")
+    parser.add_argument("--fractions", type=float, nargs="*", default=[0.3, 0.5, 0.7, 1.0],
+                        help="Fraksi untuk kurva akurasi (kosong = lewati kurva)")
+    parser.add_argument("--curve_epochs", type=int, default=10, help="Epoch per titik kurva")
+    parser.add_argument("--random_baseline", action="store_true", help="Kurva juga untuk subset acak")
+    parser.add_argument("--report", type=str, default="data/coreset_report.json")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+    args.device = torch.device(args.device)
+
+    train_paths, train_labels = read_list(args.train_list, args.data_folder)
+    val_paths, val_labels = read_list(args.val_list, args.data_folder)
+    build_decoded_cache(train_paths + val_paths, train_labels + val_labels, args.cache_dir, size=args.cache_size)
+    train_idx = np.arange(len(train_paths))
+    val_idx = np.arange(len(train_paths), len(train_paths) + len(val_paths))
+    labels = np.asarray(train_labels)
+
+    weights = None if args.no_class_weights else torch.tensor(CLASS_WEIGHTS, dtype=torch.float32).to(args.device)
+    criterion = nn.CrossEntropyLoss(weight=weights)
+
+    print_time(f"📊 Skor {len(train_paths)} sampel train: {args.score}, warm-up {args.warmup_epochs} epoch × {args.runs} run")
+    all_scores = score_samples(args, train_idx, labels, criterion)
+    scores = all_scores[args.score]
+
+    keep = select_coreset(scores, labels, args.keep, args.drop_hardest, seed=args.seed)
+    out_list = args.out_list or f"{os.path.splitext(args.train_list)[0]}_coreset{int(round(args.keep * 100))}.txt"
+    write_list(out_list, train_paths, labels, keep)
+    per_class = {cls: int((labels[keep] == i).sum()) for i, cls in enumerate(CLASS_NAMES[:args.num_classes])}
+    print_time(f"✂️  {len(keep)}/{len(labels)} sampel ({len(keep) / len(labels):.0%}) → {out_list}")
+    print(f"   per kelas: {per_class}")
+
+    curve = []
+    for fraction in sorted(args.fractions):
+        subsets = [("coreset", select_coreset(scores, labels, fraction, args.drop_hardest, seed=args.seed))]
+        if args.random_baseline and fraction < 1.0:
+            subsets.append(("random", select_coreset(None, labels, fraction, seed=args.seed)))
+        for kind, subset in subsets:
+            acc, sec = train_subset(args, train_idx[subset], val_idx, criterion, args.seed)
+            curve.append({"fraction": fraction, "kind": kind, "num_samples": int(len(subset)),
+                          "best_val_acc": acc, "seconds_per_epoch": sec})
+            print_time(f"📈 {kind:7} {fraction:4.0%} ({len(subset)} sampel): val acc {acc:.2%}, {sec:.1f} s/epoch")
+
+    kept = np.zeros(len(labels), dtype=bool)
+    kept[keep] = True
+    report = {
+        "score": args.score, "warmup_epochs": args.warmup_epochs, "runs": args.runs,
+        "keep": args.keep, "drop_hardest": args.drop_hardest, "out_list": out_list,
+        "num_train": int(len(labels)), "num_kept": int(len(keep)), "kept_per_class": per_class,
+        "curve_epochs": args.curve_epochs, "curve": curve,
+        "samples": [
+            {"path": os.path.relpath(train_paths[i], args.data_folder), "label": int(labels[i]),
+             **{name: float(s[i]) for name, s in all_scores.items()}, "kept": bool(kept[i])}
+            for i in np.argsort(-scores)
+        ],
+    }
+    ensure_dir(os.path.dirname(args.report) or ".")
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print_time(f"📁 Laporan: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# data_pipeline.py — DataLoader persisten + prefetch batch ke device + ukur waktu tunggu data
+import time
+
+import torch
+from torch.utils.data import DataLoader
+
+
+def make_loader(dataset, batch_size, shuffle, num_workers, device, persistent_workers=True,
+                prefetch_factor=2, sampler=None, generator=None):
+    """
+    DataLoader dengan worker yang hidup selama seluruh run (persistent_workers), sehingga
+    worker tidak di-fork ulang dan dataset tidak di-pickle ulang setiap epoch.
+    """
+    return DataLoader(
+        dataset, batch_size=batch_size, shuffle=shuffle if sampler is None else False, sampler=sampler,
+        num_workers=num_workers, pin_memory=(device.type == 'cuda'),
+        persistent_workers=persistent_workers if num_workers > 0 else False,
+        prefetch_factor=prefetch_factor if num_workers > 0 else None,
+        generator=generator,
+    )
+
+
+class DevicePrefetcher:
+    """
+    Bungkus DataLoader untuk satu fase (train/val):
+    - `start()` memanggil iter(loader) lebih awal agar worker mulai menyiapkan batch
+      (misal: batch validasi disiapkan saat langkah-langkah terakhir training masih berjalan);
+    - batch berikutnya disalin ke device (non_blocking, CUDA stream terpisah) selagi batch
+      sekarang diproses;
+    - mencatat waktu menunggu data (`first_wait` = idle di awal fase, `wait_time` = total).
+    """
+
+    def __init__(self, loader, device, on_near_end=None, near_end=1):
+        self.loader = loader
+        self.device = device
+        self.on_near_end = on_near_end
+        self.near_end = near_end
+        self._iterator = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.first_wait = None
+        self.wait_time = 0.0
+
+    def start(self):
+        if self._iterator is None:
+            self._iterator = iter(self.loader)
+
+    def __len__(self):
+        return len(self.loader)
+
+    def _to_device(self, batch, stream):
+        # Hanya data & target yang disalin; elemen lain (index sampel) tetap di CPU karena dipakai
+        # untuk mengindeks tensor CPU (teacher_logits, loss cache HardExampleSampler)
+        if stream is None:
+            return batch
+        with torch.cuda.stream(stream):
+            return [t.to(self.device, non_blocking=True) if i < 2 and torch.is_tensor(t) else t
+                    for i, t in enumerate(batch)]
+
+    def _fetch(self, stream):
+        t0 = time.perf_counter()
+        try:
+            batch = next(self._iterator)
+        except StopIteration:
+            return None
+        wait = time.perf_counter() - t0
+        self.wait_time += wait
+        if self.first_wait is None:
+            self.first_wait = wait
+        return self._to_device(batch, stream)
+
+    def __iter__(self):
+        self.start()
+        stream = torch.cuda.Stream(self.device) if self.device.type == 'cuda' else None
+        total = len(self.loader)
+        try:
+            batch = self._fetch(stream)
+            i = 0
+            near_end_fired = False
+            while batch is not None:
+                if stream is not None:
+                    torch.cuda.current_stream(self.device).wait_stream(stream)
+                    for t in batch[:2]:
+                        if torch.is_tensor(t):
+                            t.record_stream(torch.cuda.current_stream(self.device))
+                i += 1
+                # `<=` + sekali per epoch: epoch yang lebih pendek dari near_end batch tetap memicu hook
+                if self.on_near_end is not None and not near_end_fired and total - i <= self.near_end:
+                    near_end_fired = True
+                    self.on_near_end()
+                # Ambil & salin batch berikutnya sebelum batch sekarang dihitung
+                next_batch = self._fetch(stream) if i < total else None
+                yield batch
+                batch = next_batch
+        finally:
+            # Loop yang berhenti lebih awal (break/exception) tidak boleh meninggalkan iterator basi
+            self._iterator = None
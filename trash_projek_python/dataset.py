@@ -1,25 +1,75 @@
 # dataset.py
 import os
+import random
+import numpy as np
 import torch
-from torch.utils.data import Dataset
+from torch.utils.data import Dataset, get_worker_info
 from torchvision import transforms
 from PIL import Image
 
-# Label mapping (1-indexed → folder name)
+from waste_infer.labels import ONE_INDEXED_LABEL_MAP
+
+# Label mapping (1-indexed → folder name), sumber tunggal di waste_infer/labels.py
 GLASS = 1
 PAPER = 2
 CARDBOARD = 3
 PLASTIC = 4
 METAL = 5
 TRASH = 6
-LABEL_MAP = {
-    GLASS: "glass",
-    PAPER: "paper",
-    CARDBOARD: "cardboard",
-    PLASTIC: "plastic",
-    METAL: "metal",
-    TRASH: "trash"
-}
+LABEL_MAP = ONE_INDEXED_LABEL_MAP
+
+def build_transform(input_size, augment, mean, std):
+    input_h, input_w = input_size
+    if augment:
+        return transforms.Compose([
+            transforms.Resize(
+                (int(input_h * 1.1), int(input_w * 1.1)),
+                interpolation=transforms.InterpolationMode.LANCZOS
+            ),
+            transforms.RandomHorizontalFlip(p=0.5),
+            transforms.RandomRotation(degrees=10),
+            transforms.ColorJitter(brightness=0.2, contrast=0.2, saturation=0.1),
+            transforms.RandomAdjustSharpness(sharpness_factor=2, p=0.3),
+            transforms.RandomAutocontrast(p=0.3),
+            transforms.RandomPerspective(distortion_scale=0.1, p=0.2),
+            transforms.RandomCrop((input_h, input_w)),
+            transforms.ToTensor(),
+            transforms.Normalize(mean=mean, std=std),
+        ])
+    return transforms.Compose([
+        transforms.Resize((input_h, input_w)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=mean, std=std),
+    ])
+
+
+class PackedPaths:
+    """
+    Daftar path string yang disimpan sebagai satu buffer byte UTF-8 + array offset.
+    Hanya dua objek NumPy (bukan ratusan ribu objek str), sehingga worker DataLoader hasil fork
+    tidak menyalin halaman memori akibat update refcount (copy-on-write).
+    """
+
+    def __init__(self, paths):
+        encoded = [p.encode("utf-8") for p in paths]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=self.offsets[1:])
+        self.buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        return self.buffer[self.offsets[idx]:self.offsets[idx + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
 
 class WasteDataset(Dataset):
     def __init__(self, list_file: str, data_root: str,
@@ -32,9 +82,9 @@ class WasteDataset(Dataset):
         self.input_h, self.input_w = input_size
         self.augment = augment
         
-        # Load file paths and labels
-        self.filepaths = []
-        self.labels = []
+        # Load file paths and labels (list sementara, lalu dipadatkan ke array NumPy)
+        filepaths = []
+        labels = []
         with open(list_file, 'r') as f:
             for line_num, line in enumerate(f, 1):
                 line = line.strip()
@@ -58,47 +108,80 @@ class WasteDataset(Dataset):
                 if not os.path.isfile(full_path):
                     print(f"❌ File tidak ditemukan: {full_path}")
                     continue
-                self.filepaths.append(full_path)
-                self.labels.append(label - 1)  # 0-indexed untuk PyTorch
+                filepaths.append(full_path)
+                labels.append(label - 1)  # 0-indexed untuk PyTorch
+
+        # Index sampel ringkas & read-only: dibagi bersama oleh semua worker tanpa tumbuh per worker
+        self.filepaths = PackedPaths(filepaths)
+        self.labels = np.array(labels, dtype=np.int8)
+        self.labels.setflags(write=False)
+        del filepaths, labels
 
         # Normalisasi ImageNet default
-        if mean is None:
-            mean = [0.485, 0.456, 0.406]
-        if std is None:
-            std = [0.229, 0.224, 0.225]
-
-        # Transform
-        if augment:
-            self.transform = transforms.Compose([
-                transforms.Resize(
-                    (int(self.input_h * 1.1), int(self.input_w * 1.1)),
-                    interpolation=transforms.InterpolationMode.LANCZOS
-                ),
-                transforms.RandomHorizontalFlip(p=0.5),
-                transforms.RandomRotation(degrees=10),
-                transforms.ColorJitter(brightness=0.2, contrast=0.2, saturation=0.1),
-                transforms.RandomAdjustSharpness(sharpness_factor=2, p=0.3),
-                transforms.RandomAutocontrast(p=0.3),
-                transforms.RandomPerspective(distortion_scale=0.1, p=0.2),
-                transforms.RandomCrop((self.input_h, self.input_w)),
-                transforms.ToTensor(),
-                transforms.Normalize(mean=mean, std=std),
-            ])
-        else:
-            self.transform = transforms.Compose([
-                transforms.Resize((self.input_h, self.input_w)),
-                transforms.ToTensor(),
-                transforms.Normalize(mean=mean, std=std),
-            ])
+        self.mean = mean if mean is not None else [0.485, 0.456, 0.406]
+        self.std = std if std is not None else [0.229, 0.224, 0.225]
+        self.transform = build_transform((self.input_h, self.input_w), augment, self.mean, self.std)
+
+    def set_input_size(self, input_size):
+        """Ganti resolusi input (progressive resizing). Transform dibangun ulang."""
+        self.input_h, self.input_w = input_size
+        self.transform = build_transform((self.input_h, self.input_w), self.augment, self.mean, self.std)
 
     def __len__(self):
         return len(self.filepaths)
 
     def __getitem__(self, idx):
+        path = self.filepaths[idx]
         try:
-            img = Image.open(self.filepaths[idx]).convert("RGB")
+            img = Image.open(path).convert("RGB")
         except Exception as e:
-            raise RuntimeError(f"Gagal memuat {self.filepaths[idx]}: {e}")
-        label = self.labels[idx]
+            raise RuntimeError(f"Gagal memuat {path}: {e}")
+        label = int(self.labels[idx])  # int Python → collate menjadi tensor int64
         img = self.transform(img)
-        return img, label
\ No newline at end of file
+        return img, label
+
+
+class IndexedDataset(Dataset):
+    """Bungkus dataset agar __getitem__ juga mengembalikan index sampel: (img, label, idx)."""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, idx):
+        img, label = self.dataset[idx]
+        return img, label, idx
+
+
+class SeededDataset(Dataset):
+    """
+    Bungkus dataset untuk item (idx, seed) dari `samplers.ResumableSampler`: RNG torch, NumPy dan
+    Python di-seed per sampel sebelum transform, sehingga augmentasi sampel yang sama selalu identik
+    (resume di tengah epoch menghasilkan batch yang sama persis, berapa pun jumlah worker).
+    Di proses utama (num_workers=0) state RNG global dikembalikan setelahnya.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def _load(self, idx, seed):
+        torch.manual_seed(seed)
+        random.seed(seed)
+        np.random.seed(seed % (2 ** 32))
+        return self.dataset[idx]
+
+    def __getitem__(self, item):
+        idx, seed = item
+        if get_worker_info() is not None:
+            return self._load(idx, seed)
+        py_state, np_state = random.getstate(), np.random.get_state()
+        with torch.random.fork_rng(devices=[]):
+            sample = self._load(idx, seed)
+        random.setstate(py_state)
+        np.random.set_state(np_state)
+        return sample
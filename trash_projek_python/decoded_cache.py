@@ -0,0 +1,92 @@
+# decoded_cache.py — cache gambar ter-decode (uint8, memmap) yang dibagi banyak proses training
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+from torch.utils.data import Dataset
+
+from dataset import build_transform
+from utils import print_time
+
+
+def _decode(path, size):
+    with Image.open(path) as img:
+        img.draft("RGB", (size, size))
+        return np.asarray(img.convert("RGB").resize((size, size), Image.BILINEAR), dtype=np.uint8)
+
+
+def build_decoded_cache(filepaths, labels, cache_dir, size=256, workers=8):
+    """
+    Decode semua gambar sekali ke `cache_dir/images.npy` (N, size, size, 3) uint8 + labels.npy.
+    Cache dipakai ulang hanya jika ukuran, daftar path, label, dan (ukuran file, mtime) tiap gambar sama —
+    relabel atau gambar yang diganti dengan nama sama membangun ulang cache. Semua proses membuka file
+    yang sama dengan mmap read-only, jadi data hanya ada sekali di page cache OS.
+    """
+    filepaths = list(filepaths)
+    meta_path = os.path.join(cache_dir, "meta.json")
+    stats = [os.stat(p) for p in filepaths]
+    meta = {"size": size, "paths": filepaths, "labels": [int(label) for label in labels],
+            "files": [[st.st_size, st.st_mtime] for st in stats]}
+    if os.path.isfile(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == meta:
+                return cache_dir
+        # Cache lama tidak valid lagi selama dibangun ulang (jika proses terhenti di tengah jalan)
+        os.remove(meta_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    print_time(f"🗜️  Decode {len(filepaths)} gambar → {cache_dir} ({size}×{size})")
+    images = np.lib.format.open_memmap(os.path.join(cache_dir, "images.npy"), mode="w+",
+                                       dtype=np.uint8, shape=(len(filepaths), size, size, 3))
+    # Decode & resize Pillow melepas GIL → thread cukup
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, pixels in enumerate(pool.map(lambda p: _decode(p, size), filepaths)):
+            images[i] = pixels
+    images.flush()
+    del images
+    np.save(os.path.join(cache_dir, "labels.npy"), np.asarray(labels, dtype=np.int8))
+    # meta.json ditulis terakhir: cache yang setengah jadi tidak akan dianggap valid
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return cache_dir
+
+
+def cache_fingerprint(cache_dir):
+    """Hash isi meta.json: berubah setiap kali cache dibangun dari data/label yang berbeda."""
+    with open(os.path.join(cache_dir, "meta.json"), "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class DecodedDataset(Dataset):
+    """Subset `indices` dari cache ter-decode, dengan transform yang sama seperti WasteDataset."""
+
+    def __init__(self, cache_dir, indices=None, input_size=(224, 224), augment=False,
+                 mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225)):
+        self.cache_dir = cache_dir
+        self.all_labels = np.load(os.path.join(cache_dir, "labels.npy"))
+        self.indices = np.arange(len(self.all_labels)) if indices is None else np.asarray(indices, dtype=np.int64)
+        self.labels = self.all_labels[self.indices]
+        self.transform = build_transform(tuple(input_size), augment, list(mean), list(std))
+        self._images = None
+
+    @property
+    def images(self):
+        # Dibuka lazy di setiap proses/worker (memmap tidak ikut di-pickle)
+        if self._images is None:
+            self._images = np.load(os.path.join(self.cache_dir, "images.npy"), mmap_mode="r")
+        return self._images
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_images"] = None
+        return state
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, idx):
+        i = self.indices[idx]
+        img = Image.fromarray(np.array(self.images[i]))
+        return self.transform(img), int(self.all_labels[i])
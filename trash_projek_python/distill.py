@@ -0,0 +1,75 @@
+# distill.py — knowledge distillation: cache logits teacher + loss soft target
+import os
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.utils.data import DataLoader
+from tqdm import tqdm
+
+from dataset import WasteDataset
+from model import load_model_from_checkpoint
+from utils import print_time
+
+
+def compute_teacher_logits(teacher_checkpoint, list_file, data_root, input_size, device,
+                           cache_path, batch_size=64, num_workers=4, num_classes=6):
+    """
+    Hitung logits teacher untuk setiap sampel di `list_file` (tanpa augmentasi) sekali saja,
+    lalu simpan ke `cache_path`. Cache dipakai ulang selama checkpoint teacher, list file,
+    dan input_size tidak berubah. Mengembalikan tensor (N, num_classes) di CPU.
+    """
+    key = {
+        "teacher": os.path.abspath(teacher_checkpoint),
+        "teacher_mtime": os.path.getmtime(teacher_checkpoint),
+        "list_file": os.path.abspath(list_file),
+        "list_mtime": os.path.getmtime(list_file),
+        "input_size": list(input_size),
+    }
+    if os.path.isfile(cache_path):
+        cache = torch.load(cache_path, map_location='cpu', weights_only=True)
+        if cache.get("key") == key:
+            print_time(f"♻️  Memakai cache logits teacher: {cache_path}")
+            return cache["logits"]
+        print_time("🔄 Cache logits teacher kedaluwarsa — menghitung ulang")
+
+    print_time(f"🎓 Menghitung logits teacher: {teacher_checkpoint}")
+    checkpoint = torch.load(teacher_checkpoint, map_location='cpu', weights_only=True)
+    teacher = load_model_from_checkpoint(checkpoint, num_classes=num_classes).to(device)
+    teacher.eval()
+
+    dataset = WasteDataset(list_file, data_root, input_size=input_size, augment=False)
+    loader = DataLoader(dataset, batch_size=batch_size, shuffle=False,
+                        num_workers=num_workers, pin_memory=(device.type == 'cuda'))
+    logits = []
+    with torch.no_grad():
+        for data, _ in tqdm(loader, desc="Teacher", leave=False):
+            logits.append(teacher(data.to(device)).float().cpu())
+    logits = torch.cat(logits)
+
+    torch.save({"key": key, "logits": logits}, cache_path)
+    print_time(f"💾 Logits teacher disimpan: {cache_path} ({tuple(logits.shape)})")
+    return logits
+
+
+class DistillationLoss(nn.Module):
+    """
+    alpha * T² * KL(softmax(teacher/T) || softmax(student/T)) + (1 - alpha) * CE(student, label)
+    `hard_criterion` adalah CE yang sudah ada (termasuk class weight).
+    """
+
+    def __init__(self, hard_criterion, temperature=4.0, alpha=0.7):
+        super().__init__()
+        self.hard_criterion = hard_criterion
+        self.temperature = temperature
+        self.alpha = alpha
+
+    def forward(self, student_logits, target, teacher_logits):
+        t = self.temperature
+        soft = F.kl_div(
+            F.log_softmax(student_logits / t, dim=1),
+            F.softmax(teacher_logits / t, dim=1),
+            reduction="batchmean",
+        ) * (t * t)
+        hard = self.hard_criterion(student_logits, target)
+        return self.alpha * soft + (1.0 - self.alpha) * hard
@@ -0,0 +1,24 @@
+# embeddings.py — ekstraksi fitur penultimate (embedding) secara batch
+import numpy as np
+import torch
+
+
+def extract_embeddings(model, dataloader, device, normalize=True):
+    """
+    Jalankan `model.forward_features` pada seluruh dataloader (batch (img, label)).
+    Mengembalikan (fitur float32 (N, D), label int64 (N,)) sesuai urutan dataset.
+    Jika `normalize`, fitur di-L2-normalisasi (siap untuk cosine similarity).
+    """
+    model.eval()
+    features, labels = [], []
+    with torch.no_grad():
+        for batch in dataloader:
+            data, target = batch[0], batch[1]
+            feats = model.forward_features(data.to(device, non_blocking=True)).float()
+            if normalize:
+                feats = torch.nn.functional.normalize(feats, dim=1)
+            features.append(feats.cpu().numpy())
+            labels.append(np.asarray(target, dtype=np.int64))
+    if not features:
+        return np.empty((0, 0), dtype=np.float32), np.empty((0,), dtype=np.int64)
+    return np.concatenate(features), np.concatenate(labels)
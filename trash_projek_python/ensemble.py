@@ -0,0 +1,68 @@
+# ensemble.py — ensemble beberapa checkpoint berarsitektur sama dalam satu forward pass (torch.func vmap)
+import copy
+
+import torch
+import torch.nn as nn
+from torch.func import functional_call, stack_module_state, vmap
+
+from model import load_model_from_checkpoint
+
+
+def _signature(model):
+    return [(name, tuple(t.shape)) for name, t in model.state_dict().items()]
+
+
+class VectorizedEnsemble(nn.Module):
+    """
+    Parameter N model disusun menjadi tensor (N, ...) lalu dijalankan dengan `vmap`,
+    sehingga satu panggilan = satu forward batched, bukan N forward berurutan.
+    Semua model harus memiliki arsitektur dan ukuran layer yang sama (termasuk channel_config hasil prune).
+    Output `forward` adalah log rata-rata softmax: softmax(output) = rata-rata probabilitas semua model,
+    jadi bisa dipakai langsung di tempat logits model tunggal (argmax, CrossEntropyLoss, threshold).
+    """
+
+    def __init__(self, models):
+        super().__init__()
+        models = list(models)
+        if not models:
+            raise ValueError("Ensemble butuh minimal satu model")
+        signature = _signature(models[0])
+        for i, m in enumerate(models[1:], 1):
+            if _signature(m) != signature:
+                raise ValueError(f"Model ke-{i} berbeda arsitektur/ukuran layer dengan model ke-0")
+        for m in models:
+            m.eval()
+        params, buffers = stack_module_state(models)
+        self.params = {k: v.detach() for k, v in params.items()}
+        self.buffers = buffers
+        # Model "kosong" di device meta: hanya struktur, bobot diambil dari tensor bertumpuk
+        self.base = copy.deepcopy(models[0]).to("meta").eval()
+        self.num_models = len(models)
+
+    def _call(self, params, buffers, x):
+        return functional_call(self.base, (params, buffers), (x,))
+
+    def member_logits(self, x):
+        """Logits tiap model: (N, B, num_classes)."""
+        return vmap(self._call, in_dims=(0, 0, None))(self.params, self.buffers, x)
+
+    def forward(self, x):
+        probs = torch.softmax(self.member_logits(x), dim=-1).mean(dim=0)
+        return torch.log(probs.clamp_min(1e-12))
+
+
+def load_members(paths, num_classes=6, device="cpu"):
+    """Muat checkpoint-checkpoint anggota ensemble (mode eval, di `device`)."""
+    models = []
+    for path in paths:
+        ckpt = torch.load(path, map_location=device, weights_only=True)
+        models.append(load_model_from_checkpoint(ckpt, num_classes=num_classes).to(device).eval())
+    return models
+
+
+def max_member_diff(ensemble, models, x):
+    """Selisih absolut maksimum logits vmap vs menjalankan tiap model satu per satu."""
+    with torch.no_grad():
+        stacked = ensemble.member_logits(x)
+        sequential = torch.stack([m(x) for m in models])
+    return (stacked - sequential).abs().max().item()
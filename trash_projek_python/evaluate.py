@@ -6,7 +6,8 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from tqdm import tqdm
 
-from dataset import WasteDataset, LABEL_MAP
+from dataset import WasteDataset
+from waste_infer.labels import CLASS_NAMES
 from model import WasteClassifier
 
 def evaluate_model(model_path, test_list, data_folder, device='cuda'):
@@ -34,7 +35,7 @@ def evaluate_model(model_path, test_list, data_folder, device='cuda'):
             all_labels.extend(target.numpy())
     
     # Metrics
-    class_names = [LABEL_MAP[i+1] for i in range(6)]
+    class_names = list(CLASS_NAMES)
     print("\n" + "="*60)
     print("CLASSIFICATION REPORT")
     print("="*60)
@@ -1,24 +1,81 @@
 # export_onnx.py — versi aman
+import argparse
 import torch
-from model import WasteClassifier
-
-ckpt = torch.load("checkpoints/final_v2/best_model.pth", map_location="cpu")
-model = WasteClassifier(num_classes=6)
-model.load_state_dict(ckpt["model_state_dict"])
-model.eval()
-
-dummy_input = torch.randn(1, 3, 224, 224, dtype=torch.float32)  # <-- eksplisit float32
-
-torch.onnx.export(
-    model,
-    dummy_input,
-    "waste_classifier.onnx",
-    input_names=["input"],
-    output_names=["output"],
-    opset_version=18,
-    export_params=True,
-    do_constant_folding=True,
-    dynamic_axes={"input": {0: "batch_size"}},
-)
-
-print("✅ Model ONNX tersimpan sebagai satu file: waste_classifier.onnx")
\ No newline at end of file
+import torch.nn as nn
+import torch.nn.functional as F
+from model import load_model_from_checkpoint
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+class FusedPreprocess(nn.Module):
+    """
+    Bungkus model agar graph menerima gambar mentah uint8 NHWC:
+    cast → (opsional) resize bilinear ke `input_size` → normalisasi ImageNet → model.
+    (x / 255 - mean) / std ditulis sebagai x * scale + shift (satu Mul + satu Add).
+    """
+
+    def __init__(self, model, input_size=(224, 224), resize=False):
+        super().__init__()
+        self.model = model
+        self.input_size = tuple(input_size)
+        self.resize = resize
+        mean = torch.tensor(IMAGENET_MEAN).view(1, 3, 1, 1)
+        std = torch.tensor(IMAGENET_STD).view(1, 3, 1, 1)
+        self.register_buffer("scale", 1.0 / (255.0 * std))
+        self.register_buffer("shift", -mean / std)
+
+    def forward(self, x):
+        x = x.permute(0, 3, 1, 2).float()
+        if self.resize:
+            x = F.interpolate(x, size=self.input_size, mode="bilinear", align_corners=False)
+        return self.model(x * self.scale + self.shift)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export checkpoint (arsitektur apa pun di model.py, termasuk hasil prune.py) ke ONNX")
+    parser.add_argument("--checkpoint", type=str, default="checkpoints/final_v2/best_model.pth")
+    parser.add_argument("--output", type=str, default="waste_classifier.onnx")
+    parser.add_argument("--num_classes", type=int, default=6)
+    parser.add_argument("--input_size", type=int, nargs=2, default=[224, 224])
+    parser.add_argument("--fused_preprocess", action="store_true",
+                        help="Input graph berupa uint8 NHWC mentah; cast + normalisasi dilakukan di dalam graph")
+    parser.add_argument("--resize", action="store_true",
+                        help="(dengan --fused_preprocess) terima H×W sembarang dan resize bilinear di dalam graph")
+    args = parser.parse_args()
+
+    ckpt = torch.load(args.checkpoint, map_location="cpu", weights_only=True)
+    model = load_model_from_checkpoint(ckpt, num_classes=args.num_classes)
+    model.eval()
+
+    h, w = args.input_size
+    dynamic_axes = {"input": {0: "batch_size"}}
+    if args.fused_preprocess:
+        model = FusedPreprocess(model, input_size=(h, w), resize=args.resize).eval()
+        dummy_input = torch.randint(0, 256, (1, h, w, 3), dtype=torch.uint8)
+        if args.resize:
+            dynamic_axes["input"].update({1: "height", 2: "width"})
+    else:
+        if args.resize:
+            parser.error("--resize hanya berlaku bersama --fused_preprocess")
+        dummy_input = torch.randn(1, 3, h, w, dtype=torch.float32)  # <-- eksplisit float32
+
+    torch.onnx.export(
+        model,
+        dummy_input,
+        args.output,
+        input_names=["input"],
+        output_names=["output"],
+        opset_version=18,
+        export_params=True,
+        do_constant_folding=True,
+        dynamic_axes=dynamic_axes,
+    )
+
+    layout = "uint8 NHWC" if args.fused_preprocess else "float32 NCHW ternormalisasi"
+    print(f"✅ Model ONNX tersimpan sebagai satu file: {args.output} (input {layout})")
+
+
+if __name__ == "__main__":
+    main()
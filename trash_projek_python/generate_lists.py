@@ -1,52 +1,186 @@
-# generate_lists.py
+# generate_lists.py — split train/val/test inkremental berbasis manifest
+import argparse
+import hashlib
+import json
 import os
-import random
-from collections import defaultdict
-
-data_root = "data/pics"
-classes = ["glass", "paper", "cardboard", "plastic", "metal", "trash"]
-label_map = {cls: i+1 for i, cls in enumerate(classes)}  # 1-indexed
-
-# Kumpulkan semua file per kelas (hanya .jpg/.jpeg/.png)
-all_files = defaultdict(list)
-for cls in classes:
-    cls_dir = os.path.join(data_root, cls)
-    if not os.path.isdir(cls_dir):
-        raise FileNotFoundError(f"Folder tidak ditemukan: {cls_dir}")
-    for fname in os.listdir(cls_dir):
-        if fname.lower().endswith(('.jpg', '.jpeg', '.png')):
-            all_files[cls].append(fname)
-
-# Verifikasi jumlah file
-print("✅ Jumlah file per kelas (harus sesuai data mentah):")
-true_counts = {"glass": 501, "paper": 594, "cardboard": 403, "plastic": 482, "metal": 410, "trash": 137}
-for cls in classes:
-    count = len(all_files[cls])
-    mark = "✅" if count == true_counts[cls] else "❌"
-    print(f"{mark} {cls:10}: {count} / {true_counts[cls]}")
-
-# Bagi train/val/test → 70% / 20% / 10% (stratified)
-splits = {"train": [], "val": [], "test": []}
-ratios = {"train": 0.7, "val": 0.2, "test": 0.1}
-
-random.seed(42)  # reproducible
-for cls in classes:
-    files = sorted(all_files[cls])  # sort agar konsisten
-    n = len(files)
-    n_train = int(n * 0.7)
-    n_val = int(n * 0.2)
-    splits["train"].extend([(f, label_map[cls]) for f in files[:n_train]])
-    splits["val"].extend([(f, label_map[cls]) for f in files[n_train:n_train+n_val]])
-    splits["test"].extend([(f, label_map[cls]) for f in files[n_train+n_val:]])
-
-# Simpan ke file
-os.makedirs("data", exist_ok=True)
-total = 0
-for split, items in splits.items():
-    with open(f"data/one-indexed-files-notrash_{split}.txt", "w") as f:
-        for fname, label in sorted(items):  # sort agar mudah dicek
-            f.write(f"{fname} {label}\n")
-    print(f"✅ {split:5}: {len(items)} sampel")
-    total += len(items)
-
-print(f"\n🎯 Total dataset: {total} gambar (137 trash terpakai semua)")
\ No newline at end of file
+import time
+
+from manifest import MANIFEST_PATH, list_images, read_manifest, read_split_assignments, write_manifest
+from waste_infer.labels import CLASS_NAMES, ONE_INDEXED_LABEL_MAP
+
+SPLITS = ("train", "val", "test")
+RATIOS = {"train": 0.7, "val": 0.2, "test": 0.1}
+label_map = {cls: i for i, cls in ONE_INDEXED_LABEL_MAP.items()}  # 1-indexed
+
+
+def file_sha1(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def split_for_hash(sha1, ratios=RATIOS):
+    """
+    Split deterministik dari hash isi file: 32 bit pertama → angka di [0, 1) → train/val/test.
+    Tidak bergantung pada file lain, jadi menambah file tidak pernah memindahkan file lama,
+    dan file dengan isi identik selalu jatuh ke split yang sama.
+    """
+    u = int(sha1[:8], 16) / 2 ** 32
+    edge = 0.0
+    for split in SPLITS:
+        edge += ratios[split]
+        if u < edge:
+            return split
+    return SPLITS[-1]
+
+
+def sync_manifest(records, data_root):
+    """
+    Cocokkan manifest dengan isi folder. Hanya file baru/berubah (ukuran atau mtime beda) yang di-hash.
+    Mengembalikan delta {"added", "removed", "changed"} (list path relatif).
+    """
+    delta = {"added": [], "removed": [], "changed": []}
+    on_disk = set(list_images(data_root))
+    for rel_path in sorted(set(records) - on_disk):
+        delta["removed"].append(dict(path=rel_path, split=records.pop(rel_path).get("split")))
+    for rel_path in sorted(on_disk):
+        full_path = os.path.join(data_root, rel_path)
+        st = os.stat(full_path)
+        record = records.get(rel_path)
+        if record and record.get("bytes") == st.st_size and record.get("mtime") == st.st_mtime and record.get("sha1"):
+            continue
+        sha1 = file_sha1(full_path)
+        if record is None:
+            record = records[rel_path] = {"path": rel_path, "class": rel_path.split("/", 1)[0]}
+            delta["added"].append(rel_path)
+        elif record.get("sha1") not in (None, sha1):
+            delta["changed"].append(rel_path)
+            # Isi berubah → hasil audit lama tidak berlaku lagi
+            for key in ("ok", "error", "dhash", "width", "height", "format"):
+                record.pop(key, None)
+        record.update(bytes=st.st_size, mtime=st.st_mtime, sha1=sha1)
+    return delta
+
+
+def write_if_changed(path, lines):
+    """Tulis list file hanya jika isinya berubah (mtime tetap → cache turunan tidak ikut dibangun ulang)."""
+    content = "".join(lines)
+    if os.path.isfile(path):
+        with open(path) as f:
+            if f.read() == content:
+                return False
+    with open(path, "w") as f:
+        f.write(content)
+    return True
+
+
+def read_deltas(path):
+    """Log delta: {"next_seq": n, "deltas": [{"seq", "generated_at", "added", "removed", "changed"}, ...]}."""
+    if not os.path.isfile(path):
+        return {"next_seq": 1, "deltas": []}
+    with open(path) as f:
+        log = json.load(f)
+    if "deltas" not in log:
+        # Format lama: satu delta (ditimpa setiap run) → entri pertama log
+        log = {"next_seq": 2, "deltas": [dict(log, seq=1)]}
+    return log
+
+
+def write_deltas(path, log):
+    """Tulis log delta secara atomik (file sementara lalu os.replace), seperti write_manifest."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(log, f, indent=2)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate list train/val/test dari manifest (inkremental)")
+    parser.add_argument("--data_root", type=str, default="data/pics")
+    parser.add_argument("--manifest", type=str, default=MANIFEST_PATH)
+    parser.add_argument("--list_prefix", type=str, default="data/one-indexed-files-notrash")
+    parser.add_argument("--delta", type=str, default="data/split_delta.json",
+                        help="Log perubahan per run (seq naik), untuk update cache inkremental")
+    parser.add_argument("--ack", type=int, default=None,
+                        help="Hapus delta dengan seq <= ACK dari log (sudah diproses consumer), lalu keluar")
+    args = parser.parse_args()
+
+    if args.ack is not None:
+        log = read_deltas(args.delta)
+        log["deltas"] = [d for d in log["deltas"] if d["seq"] > args.ack]
+        write_deltas(args.delta, log)
+        print(f"🧾 Delta seq <= {args.ack} di-ack, {len(log['deltas'])} delta tersisa → {args.delta}")
+        return
+
+    split_lists = {split: f"{args.list_prefix}_{split}.txt" for split in SPLITS}
+    listed_before = read_split_assignments(split_lists)
+    records = read_manifest(args.manifest)
+    if not records:
+        print("ℹ️  Manifest kosong: split yang sudah ada di list file dipertahankan, file lain di-assign dari hash")
+        for rel_path, split in listed_before.items():
+            records[rel_path] = {"path": rel_path, "class": rel_path.split("/", 1)[0], "split": split}
+
+    delta = sync_manifest(records, args.data_root)
+
+    # Assign split hanya untuk file yang belum punya split; file lama tidak pernah dipindah
+    assigned = []
+    for rel_path, record in sorted(records.items()):
+        if record.get("split") not in SPLITS:
+            record["split"] = split_for_hash(record["sha1"])
+            assigned.append({"path": rel_path, "split": record["split"]})
+    write_manifest(records, args.manifest)
+
+    # Tulis list file; gambar yang ditandai rusak oleh audit_data.py tidak dimasukkan
+    splits = {split: [] for split in SPLITS}
+    listed_now = {}
+    skipped = 0
+    for record in records.values():
+        if record.get("ok") is False:
+            skipped += 1
+            continue
+        fname = record["path"].split("/", 1)[1]
+        splits[record["split"]].append((fname, label_map[record["class"]]))
+        listed_now[record["path"]] = record["split"]
+
+    os.makedirs(os.path.dirname(args.list_prefix) or ".", exist_ok=True)
+    total = 0
+    for split, items in splits.items():
+        list_file = f"{args.list_prefix}_{split}.txt"
+        changed = write_if_changed(list_file, [f"{fname} {label}\n" for fname, label in sorted(items)])
+        counts = ", ".join(f"{cls} {sum(label == label_map[cls] for _, label in items)}" for cls in CLASS_NAMES)
+        print(f"✅ {split:5}: {len(items)} sampel ({counts}){'' if changed else ' — tidak berubah'}")
+        total += len(items)
+
+    # Delta ditambahkan ke log (bukan menimpa): run berikutnya sebelum cache di-update tidak menghilangkan
+    # perubahan run ini. Consumer memproses delta dengan seq > seq terakhirnya, lalu `--ack <seq>`.
+    # Semua kunci delta mengacu ke isi list file: file yang masih ada tetapi keluar dari list (ditandai
+    # rusak oleh audit_data.py) → "excluded"; file lama yang masuk lagi (sudah diperbaiki) → "restored".
+    new_paths = {a["path"] for a in assigned}
+    delta_out = {
+        "generated_at": time.time(),
+        "added": [a for a in assigned if a["path"] in listed_now],
+        "removed": delta["removed"],
+        "changed": [{"path": p, "split": listed_now[p]} for p in delta["changed"] if p in listed_now],
+        "excluded": [{"path": p, "split": split} for p, split in sorted(listed_before.items())
+                     if p in records and p not in listed_now],
+        "restored": [{"path": p, "split": split} for p, split in sorted(listed_now.items())
+                     if p not in listed_before and p not in new_paths],
+    }
+    log = read_deltas(args.delta)
+    if any(delta_out[key] for key in ("added", "removed", "changed", "excluded", "restored")):
+        delta_out["seq"] = log["next_seq"]
+        log["next_seq"] += 1
+        log["deltas"].append(delta_out)
+    write_deltas(args.delta, log)
+
+    print(f"\n🎯 Total dataset: {total} gambar ({skipped} rusak dilewati)")
+    print(f"🧾 Delta: +{len(delta_out['added'])} / -{len(delta_out['removed'])} / ~{len(delta_out['changed'])} "
+          f"/ dikecualikan {len(delta_out['excluded'])} / kembali {len(delta_out['restored'])} "
+          f"({len(log['deltas'])} delta belum di-ack) → {args.delta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# manifest.py — manifest dataset (satu record JSON per gambar), dipakai audit_data.py & generate_lists.py
+import json
+import os
+
+from utils import print_time
+from waste_infer.labels import CLASS_NAMES, ONE_INDEXED_LABEL_MAP
+
+MANIFEST_PATH = "data/manifest.jsonl"
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png')
+
+
+def read_manifest(path=MANIFEST_PATH):
+    """Baca manifest → dict {path_relatif: record}. File tidak ada → dict kosong."""
+    records = {}
+    if not os.path.isfile(path):
+        return records
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                records[record["path"]] = record
+    return records
+
+
+def write_manifest(records, path=MANIFEST_PATH):
+    """Tulis manifest (urut path) secara atomik: file sementara lalu os.replace."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        for key in sorted(records):
+            f.write(json.dumps(records[key], sort_keys=True) + "\n")
+    os.replace(tmp, path)
+
+
+def list_images(data_root):
+    """Path relatif <kelas>/<file> untuk semua gambar di folder kelas."""
+    paths = []
+    for cls in CLASS_NAMES:
+        cls_dir = os.path.join(data_root, cls)
+        if not os.path.isdir(cls_dir):
+            print_time(f"⚠️  Folder tidak ditemukan: {cls_dir}")
+            continue
+        with os.scandir(cls_dir) as it:
+            paths.extend(f"{cls}/{e.name}" for e in it if e.is_file() and e.name.lower().endswith(IMAGE_EXTS))
+    return sorted(paths)
+
+
+def read_split_assignments(split_lists):
+    """{<kelas>/<file>: split} dari list file (`split_lists` = {split: path}) yang ada."""
+    assignments = {}
+    for split, list_file in split_lists.items():
+        if not os.path.isfile(list_file):
+            continue
+        with open(list_file) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit() and int(parts[1]) in ONE_INDEXED_LABEL_MAP:
+                    assignments[f"{ONE_INDEXED_LABEL_MAP[int(parts[1])]}/{parts[0]}"] = split
+    return assignments
@@ -2,7 +2,7 @@ import torch
 from PIL import Image
 from torchvision import transforms
 from model import WasteClassifier
-from dataset import LABEL_MAP
+from waste_infer.labels import LABEL_MAP  # 0-indexed
 
 def predict_image(image_path, model_path, device='cuda'):
     # Load model
@@ -29,13 +29,13 @@ def predict_image(image_path, model_path, device='cuda'):
         pred_idx = probs.argmax().item()
         confidence = probs[pred_idx].item()
     
-    pred_label = LABEL_MAP[pred_idx + 1]
+    pred_label = LABEL_MAP[pred_idx]
     
     print(f"\n🎯 Prediksi: {pred_label.upper()}")
     print(f"📊 Confidence: {confidence:.2%}\n")
     print("Probabilitas per kelas:")
     for i in range(6):
-        print(f"  {LABEL_MAP[i+1]:10s}: {probs[i].item():.2%}")
+        print(f"  {LABEL_MAP[i]:10s}: {probs[i].item():.2%}")
     
     return pred_label, confidence
 
@@ -0,0 +1,105 @@
+# prototype_head.py — kelas baru tanpa retraining: head prototipe (imprinted weights) di atas fitur backbone
+import os
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+# Artefak head disimpan di sebelah checkpoint: checkpoints/final_v3/prototype_head.pt
+HEAD_FILENAME = "prototype_head.pt"
+
+
+def head_path_for(checkpoint_path):
+    return os.path.join(os.path.dirname(checkpoint_path) or ".", HEAD_FILENAME)
+
+
+def _base_linear(model):
+    """Layer Linear terakhir model (head 6 kelas yang sudah dilatih)."""
+    linears = [m for m in model.modules() if isinstance(m, nn.Linear)]
+    if not linears:
+        raise ValueError("Model tidak memiliki layer Linear")
+    return linears[-1]
+
+
+class PrototypeHead:
+    """
+    Head diperluas: logits kelas bawaan tetap dari head checkpoint, lalu ditambah satu baris
+    per kelas baru. Bobot kelas baru = rata-rata fitur contoh (ter-L2-normalisasi) yang diskalakan
+    ke norma rata-rata bobot head bawaan, bias = rata-rata bias bawaan (weight imprinting),
+    sehingga logits kelas baru sebanding dengan kelas lama. Mendaftarkan kelas cukup satu
+    forward pass atas contoh-contohnya.
+    """
+
+    def __init__(self, base_checkpoint, base_classes, classes=(), weight=None, bias=None, num_examples=None):
+        self.base_checkpoint = base_checkpoint
+        self.base_classes = list(base_classes)
+        self.extra_classes = list(classes)
+        self.weight = weight if weight is not None else torch.empty(0)
+        self.bias = bias if bias is not None else torch.empty(0)
+        self.num_examples = dict(num_examples or {})
+
+    @property
+    def class_names(self):
+        return self.base_classes + self.extra_classes
+
+    def clone(self):
+        """Salinan independen (dipakai backend: ubah salinan, lalu tukar referensi)."""
+        return PrototypeHead(self.base_checkpoint, self.base_classes, self.extra_classes,
+                             self.weight.clone(), self.bias.clone(), self.num_examples)
+
+    def register(self, model, name, features):
+        """Tambah/ganti kelas `name` dari fitur contoh (N, D) hasil `model.forward_features`."""
+        if name in self.base_classes:
+            raise ValueError(f"'{name}' adalah kelas bawaan checkpoint; tidak bisa diganti")
+        if len(features) == 0:
+            raise ValueError("Butuh minimal satu gambar contoh")
+        linear = _base_linear(model)
+        with torch.no_grad():
+            prototype = F.normalize(F.normalize(features.float(), dim=1).mean(dim=0), dim=0)
+            w = (prototype * linear.weight.norm(dim=1).mean()).cpu()
+            b = linear.bias.mean().cpu() if linear.bias is not None else torch.tensor(0.0)
+        if name in self.extra_classes:
+            i = self.extra_classes.index(name)
+            self.weight[i], self.bias[i] = w, b
+        else:
+            self.extra_classes.append(name)
+            self.weight = torch.cat([self.weight.view(-1, w.numel()), w[None]])
+            self.bias = torch.cat([self.bias.view(-1), b.view(1)])
+        self.num_examples[name] = len(features)
+
+    def remove(self, name):
+        if name not in self.extra_classes:
+            raise KeyError(name)
+        i = self.extra_classes.index(name)
+        self.extra_classes.pop(i)
+        keep = [j for j in range(len(self.weight)) if j != i]
+        self.weight, self.bias = self.weight[keep], self.bias[keep]
+        self.num_examples.pop(name, None)
+
+    def logits_from_features(self, model, features):
+        logits = model.classify_features(features)
+        if not self.extra_classes:
+            return logits
+        w = self.weight.to(features.device, features.dtype)
+        b = self.bias.to(features.device, features.dtype)
+        return torch.cat([logits, features @ w.T + b], dim=1)
+
+    def logits(self, model, x):
+        """Forward penuh: gambar → logits (B, jumlah kelas bawaan + kelas baru)."""
+        return self.logits_from_features(model, model.forward_features(x))
+
+    def save(self, path):
+        torch.save({
+            "base_checkpoint": self.base_checkpoint,
+            "base_classes": self.base_classes,
+            "classes": self.extra_classes,
+            "weight": self.weight,
+            "bias": self.bias,
+            "num_examples": self.num_examples,
+        }, path)
+
+    @classmethod
+    def load(cls, path):
+        state = torch.load(path, map_location="cpu", weights_only=True)
+        return cls(state["base_checkpoint"], state["base_classes"], state["classes"],
+                   state["weight"], state["bias"], state.get("num_examples"))
@@ -0,0 +1,228 @@
+# prune.py — structured channel pruning untuk WasteClassifier (ResNet18) + fine-tuning + laporan
+#
+# Contoh:
+#   python prune.py --checkpoint checkpoints/final_v3/best_model.pth --ratios 0.25 0.5 --finetune_epochs 3
+#   python train.py --init_checkpoint checkpoints/pruned/pruned_50/best_model.pth ...   # fine-tune lebih lama
+#   python export_onnx.py --checkpoint checkpoints/pruned/pruned_50/best_model.pth --output pruned_50.onnx
+import argparse
+import json
+import os
+import time
+
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import DataLoader
+
+from dataset import WasteDataset
+from model import load_model_from_checkpoint
+from train import train_epoch, evaluate, CLASS_WEIGHTS
+from utils import print_time, ensure_dir
+
+
+def resnet_blocks(model):
+    """Semua BasicBlock di backbone ResNet: [(nama, block), ...]."""
+    blocks = []
+    for layer_name in ("layer1", "layer2", "layer3", "layer4"):
+        layer = getattr(model.backbone, layer_name)
+        for i, block in enumerate(layer):
+            blocks.append((f"{layer_name}.{i}", block))
+    return blocks
+
+
+def channel_importance(block):
+    """Skor L1 filter conv1 dikali |gamma| bn1 untuk setiap channel tengah block."""
+    l1 = block.conv1.weight.detach().abs().sum(dim=(1, 2, 3))
+    return l1 * block.bn1.weight.detach().abs()
+
+
+def prune_block(block, keep):
+    """Buang channel tengah block secara fisik, hanya menyisakan index `keep`."""
+    keep = torch.sort(keep).values
+    conv1, bn1, conv2 = block.conv1, block.bn1, block.conv2
+    new_conv1 = nn.Conv2d(conv1.in_channels, len(keep), conv1.kernel_size,
+                          stride=conv1.stride, padding=conv1.padding, bias=False)
+    new_conv1.weight.data = conv1.weight.data[keep].clone()
+    new_bn1 = nn.BatchNorm2d(len(keep), eps=bn1.eps, momentum=bn1.momentum)
+    for attr in ("weight", "bias"):
+        getattr(new_bn1, attr).data = getattr(bn1, attr).data[keep].clone()
+    new_bn1.running_mean = bn1.running_mean[keep].clone()
+    new_bn1.running_var = bn1.running_var[keep].clone()
+    new_conv2 = nn.Conv2d(len(keep), conv2.out_channels, conv2.kernel_size,
+                          stride=conv2.stride, padding=conv2.padding, bias=False)
+    new_conv2.weight.data = conv2.weight.data[:, keep].clone()
+    block.conv1, block.bn1, block.conv2 = new_conv1, new_bn1, new_conv2
+
+
+def prune_model(model, ratio, original_widths, min_channels=8):
+    """
+    Pangkas channel tengah setiap BasicBlock hingga lebarnya (1 - ratio) × lebar asli.
+    Mengembalikan channel_config {nama_block: jumlah_channel} untuk disimpan di checkpoint.
+    """
+    channel_config = {}
+    for name, block in resnet_blocks(model):
+        target = max(min_channels, int(round(original_widths[name] * (1.0 - ratio))))
+        current = block.conv1.out_channels
+        if target < current:
+            keep = torch.topk(channel_importance(block), target).indices
+            prune_block(block, keep)
+        channel_config[name] = block.conv1.out_channels
+    return channel_config
+
+
+def count_flops(model, input_size=(224, 224)):
+    """Jumlah multiply-accumulate (MAC) Conv2d + Linear untuk satu gambar."""
+    macs = 0
+
+    def conv_hook(module, inputs, output):
+        nonlocal macs
+        k = module.kernel_size[0] * module.kernel_size[1] * (module.in_channels // module.groups)
+        macs += output.numel() * k
+
+    def linear_hook(module, inputs, output):
+        nonlocal macs
+        macs += output.numel() * module.in_features
+
+    hooks = []
+    for m in model.modules():
+        if isinstance(m, nn.Conv2d):
+            hooks.append(m.register_forward_hook(conv_hook))
+        elif isinstance(m, nn.Linear):
+            hooks.append(m.register_forward_hook(linear_hook))
+    was_training = model.training
+    model.eval()
+    device = next(model.parameters()).device
+    with torch.no_grad():
+        model(torch.zeros((1, 3) + tuple(input_size), device=device))
+    for h in hooks:
+        h.remove()
+    model.train(was_training)
+    return macs
+
+
+def measure_latency(model, input_size=(224, 224), batch_size=1, iters=30, warmup=5):
+    """Latency median (ms) forward di CPU."""
+    model = model.to("cpu").eval()
+    x = torch.randn((batch_size, 3) + tuple(input_size))
+    timings = []
+    with torch.no_grad():
+        for i in range(warmup + iters):
+            t0 = time.perf_counter()
+            model(x)
+            if i >= warmup:
+                timings.append((time.perf_counter() - t0) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def report_row(name, model, val_loader, criterion, device, input_size):
+    val_loss, val_acc = evaluate(model.to(device), val_loader, criterion, device)
+    row = {
+        "name": name,
+        "params_m": sum(p.numel() for p in model.parameters()) / 1e6,
+        "gmacs": count_flops(model, input_size) / 1e9,
+        "latency_ms_cpu": measure_latency(model, input_size),
+        "val_acc": val_acc,
+        "val_loss": val_loss,
+    }
+    model.to(device)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Structured pruning WasteClassifier (ResNet18)")
+    parser.add_argument("--checkpoint", type=str, default="checkpoints/final_v3/best_model.pth")
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.25, 0.5],
+                        help="Rasio channel yang dibuang (kumulatif, relatif terhadap lebar asli)")
+    parser.add_argument("--finetune_epochs", type=int, default=3, help="Fine-tuning per langkah pruning")
+    parser.add_argument("--lr", type=float, default=5e-5)
+    parser.add_argument("--weight_decay", type=float, default=1e-4)
+    parser.add_argument("--train_list", type=str, default="data/one-indexed-files-notrash_train.txt")
+    parser.add_argument("--val_list", type=str, default="data/one-indexed-files-notrash_val.txt")
+    parser.add_argument("--data_folder", type=str, default="data/pics")
+    parser.add_argument("--input_size", type=int, nargs=2, default=[224, 224])
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--num_workers", type=int, default=4)
+    parser.add_argument("--num_classes", type=int, default=6)
+    parser.add_argument("--output_dir", type=str, default="checkpoints/pruned")
+    parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    ensure_dir(args.output_dir)
+
+    ckpt = torch.load(args.checkpoint, map_location="cpu", weights_only=True)
+    arch = ckpt.get('arch') or ckpt.get('args', {}).get('arch', 'resnet18')
+    if arch != "resnet18":
+        raise ValueError(f"Pruning hanya mendukung resnet18 (checkpoint: {arch})")
+    model = load_model_from_checkpoint(ckpt, num_classes=args.num_classes).to(device)
+
+    train_dataset = WasteDataset(args.train_list, args.data_folder, input_size=args.input_size, augment=True)
+    val_dataset = WasteDataset(args.val_list, args.data_folder, input_size=args.input_size, augment=False)
+    train_loader = DataLoader(train_dataset, batch_size=args.batch_size, shuffle=True,
+                              num_workers=args.num_workers, pin_memory=(device.type == 'cuda'))
+    val_loader = DataLoader(val_dataset, batch_size=args.batch_size, shuffle=False,
+                            num_workers=args.num_workers, pin_memory=(device.type == 'cuda'))
+    criterion = nn.CrossEntropyLoss(weight=torch.tensor(CLASS_WEIGHTS).to(device))
+
+    # Lebar asli channel tengah BasicBlock = channel output block (tidak ikut di-prune),
+    # sehingga checkpoint yang sudah di-prune pun dihitung relatif terhadap ResNet18 penuh
+    original_widths = {name: block.conv2.out_channels for name, block in resnet_blocks(model)}
+
+    report = [report_row("baseline", model, val_loader, criterion, device, args.input_size)]
+    print_time(f"📏 Baseline: {report[0]['gmacs']:.3f} GMACs, {report[0]['latency_ms_cpu']:.1f} ms, "
+               f"Acc {report[0]['val_acc']:.3%}")
+
+    for ratio in sorted(args.ratios):
+        print_time(f"✂️  Pruning {ratio:.0%} channel tengah setiap block...")
+        channel_config = prune_model(model, ratio, original_widths)
+        model = model.to(device)
+
+        # Fine-tuning singkat (loss & loop yang sama dengan train.py)
+        optimizer = optim.Adam(model.parameters(), lr=args.lr, weight_decay=args.weight_decay)
+        best_state, best_loss, best_acc = None, float('inf'), 0.0
+        for epoch in range(1, args.finetune_epochs + 1):
+            train_loss, train_acc = train_epoch(model, train_loader, criterion, optimizer, device)
+            val_loss, val_acc = evaluate(model, val_loader, criterion, device)
+            print_time(f"   Fine-tune {epoch}/{args.finetune_epochs} | Train Acc: {train_acc:.3%} | "
+                       f"Val Loss: {val_loss:.5f}, Acc: {val_acc:.3%}")
+            if val_loss < best_loss:
+                best_loss, best_acc = val_loss, val_acc
+                best_state = {k: v.detach().clone() for k, v in model.state_dict().items()}
+        if best_state is not None:
+            model.load_state_dict(best_state)
+
+        name = f"pruned_{int(round(ratio * 100))}"
+        out_dir = os.path.join(args.output_dir, name)
+        ensure_dir(out_dir)
+        torch.save({
+            'epoch': args.finetune_epochs,
+            'arch': arch,
+            'channel_config': channel_config,
+            'model_state_dict': model.state_dict(),
+            'val_loss': best_loss,
+            'val_acc': best_acc,
+            'pruned_from': args.checkpoint,
+            'prune_ratio': ratio,
+        }, os.path.join(out_dir, "best_model.pth"))
+
+        row = report_row(name, model, val_loader, criterion, device, args.input_size)
+        report.append(row)
+        print_time(f"💾 {name}: {row['gmacs']:.3f} GMACs, {row['params_m']:.2f}M params, "
+                   f"{row['latency_ms_cpu']:.1f} ms, Acc {row['val_acc']:.3%}")
+
+    # Laporan akurasi vs FLOPs vs latency (split val)
+    base = report[0]
+    print("\n" + "=" * 78)
+    print(f"{'Model':14s} {'Params(M)':>10s} {'GMACs':>8s} {'CPU ms':>8s} {'Speedup':>8s} {'Val Acc':>9s} {'ΔAcc':>8s}")
+    print("=" * 78)
+    for row in report:
+        print(f"{row['name']:14s} {row['params_m']:10.2f} {row['gmacs']:8.3f} {row['latency_ms_cpu']:8.1f} "
+              f"{base['latency_ms_cpu'] / row['latency_ms_cpu']:7.2f}x {row['val_acc']:9.3%} "
+              f"{row['val_acc'] - base['val_acc']:+8.3%}")
+    with open(os.path.join(args.output_dir, "prune_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    print_time(f"📊 Laporan disimpan: {os.path.join(args.output_dir, 'prune_report.json')}")
+
+
+if __name__ == "__main__":
+    main()
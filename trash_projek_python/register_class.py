@@ -0,0 +1,94 @@
+# register_class.py — daftarkan kelas sampah baru dari beberapa gambar contoh, tanpa retraining
+import argparse
+import os
+
+import torch
+from PIL import Image
+
+from classify_folder import IMAGE_EXTS, iter_folder
+from dataset import build_transform
+from model import load_model_from_checkpoint
+from prototype_head import HEAD_FILENAME, PrototypeHead, head_path_for
+from utils import print_time
+from waste_infer.labels import CLASS_NAMES
+
+
+def collect_images(sources):
+    """File gambar dari daftar file dan/atau folder (folder ditelusuri rekursif)."""
+    paths = []
+    for src in sources:
+        if os.path.isdir(src):
+            paths.extend(iter_folder(src))
+        elif src.lower().endswith(IMAGE_EXTS):
+            paths.append(src)
+    return paths
+
+
+def extract_features(model, paths, device, input_size=(224, 224), batch_size=32):
+    """Fitur penultimate (N, D) untuk daftar path gambar."""
+    transform = build_transform(input_size, False, [0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
+    features = []
+    with torch.no_grad():
+        for i in range(0, len(paths), batch_size):
+            batch = []
+            for path in paths[i:i + batch_size]:
+                with Image.open(path) as img:
+                    batch.append(transform(img.convert("RGB")))
+            features.append(model.forward_features(torch.stack(batch).to(device)).cpu())
+    return torch.cat(features) if features else torch.empty(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Daftarkan kelas baru (prototype head) tanpa retraining")
+    parser.add_argument("--checkpoint", type=str, default="checkpoints/final_v3/best_model.pth")
+    parser.add_argument("--head", type=str, default=None,
+                        help=f"Artefak head (default: {HEAD_FILENAME} di folder checkpoint)")
+    parser.add_argument("--name", type=str, help="Nama kelas baru, misal organic")
+    parser.add_argument("--images", type=str, nargs="+", default=[], help="File dan/atau folder gambar contoh")
+    parser.add_argument("--remove", action="store_true", help="Hapus kelas --name dari head")
+    parser.add_argument("--list", action="store_true", help="Tampilkan kelas di head lalu keluar")
+    parser.add_argument("--num_classes", type=int, default=6)
+    parser.add_argument("--input_size", type=int, nargs=2, default=[224, 224])
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    head_path = args.head or head_path_for(args.checkpoint)
+    if os.path.isfile(head_path):
+        head = PrototypeHead.load(head_path)
+        if os.path.abspath(head.base_checkpoint) != os.path.abspath(args.checkpoint):
+            print_time(f"⚠️  Head dibuat untuk {head.base_checkpoint}, bukan {args.checkpoint}")
+    else:
+        head = PrototypeHead(args.checkpoint, CLASS_NAMES[:args.num_classes])
+
+    if args.list:
+        for name in head.class_names:
+            note = f" ({head.num_examples[name]} contoh)" if name in head.num_examples else " (bawaan)"
+            print(f"  {name}{note}")
+        return
+    if not args.name:
+        parser.error("--name wajib diisi (kecuali --list)")
+
+    if args.remove:
+        head.remove(args.name)
+        head.save(head_path)
+        print_time(f"🗑️  Kelas '{args.name}' dihapus dari {head_path}")
+        return
+
+    paths = collect_images(args.images)
+    if not paths:
+        parser.error("Tidak ada gambar contoh di --images")
+
+    device = torch.device(args.device)
+    ckpt = torch.load(args.checkpoint, map_location=device, weights_only=True)
+    model = load_model_from_checkpoint(ckpt, num_classes=args.num_classes).to(device).eval()
+
+    print_time(f"🧮 Ekstraksi fitur {len(paths)} gambar contoh untuk '{args.name}'")
+    features = extract_features(model, paths, device, args.input_size, args.batch_size)
+    head.register(model, args.name, features)
+    head.save(head_path)
+    print_time(f"✅ Kelas '{args.name}' terdaftar → {head_path} (kelas: {', '.join(head.class_names)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# samplers.py — sampler class-balanced & hard-example mining (pengganti duplikasi list / bobot loss manual)
+from itertools import islice
+
+import numpy as np
+import torch
+from torch.utils.data import Sampler
+
+SAMPLER_MODES = ("balanced", "sqrt", "effective", "hard")
+
+
+def class_sampling_weights(counts, mode="balanced", beta=0.999):
+    """
+    Bobot per sampel untuk setiap kelas:
+    - balanced : 1 / n_c            (setiap kelas muncul sama sering)
+    - sqrt     : 1 / sqrt(n_c)      (setengah jalan antara natural & balanced)
+    - effective: (1 - beta) / (1 - beta^n_c)   (effective number of samples, Cui dkk. 2019)
+    """
+    counts = counts.astype(np.float64)
+    safe = np.maximum(counts, 1.0)
+    if mode == "balanced":
+        w = 1.0 / safe
+    elif mode == "sqrt":
+        w = 1.0 / np.sqrt(safe)
+    elif mode == "effective":
+        w = (1.0 - beta) / (1.0 - np.power(beta, safe))
+    else:
+        raise ValueError(f"Mode sampler tidak dikenal: {mode}")
+    w[counts == 0] = 0.0
+    return w
+
+
+class ClassBalancedSampler(Sampler):
+    """
+    Sampling dengan pengembalian: pilih kelas menurut distribusi hasil `mode`, lalu pilih sampel
+    acak (uniform) di kelas itu. Index dibangkitkan per chunk secara lazy, jadi memori per epoch
+    O(chunk) — tidak ada list index yang diduplikasi. `set_epoch` membuat urutan reproducible.
+    """
+
+    def __init__(self, labels, mode="balanced", num_samples=None, beta=0.999, seed=0, chunk_size=1024):
+        labels = np.asarray(labels, dtype=np.int64)
+        self.num_samples = num_samples or len(labels)
+        self.seed = seed
+        self.epoch = 0
+        self.chunk_size = chunk_size
+        counts = np.bincount(labels)
+        self.counts = torch.from_numpy(counts)
+        class_mass = counts * class_sampling_weights(counts, mode, beta)
+        self.class_probs = torch.from_numpy(class_mass / class_mass.sum()).float()
+        # Index sampel dikelompokkan per kelas: sorted_idx[offsets[c] : offsets[c] + counts[c]]
+        self.sorted_idx = torch.from_numpy(np.argsort(labels, kind="stable"))
+        self.offsets = torch.from_numpy(np.concatenate([[0], np.cumsum(counts)[:-1]]))
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _generator(self):
+        g = torch.Generator()
+        g.manual_seed(self.seed + self.epoch)
+        return g
+
+    def __iter__(self):
+        g = self._generator()
+        remaining = self.num_samples
+        while remaining > 0:
+            n = min(self.chunk_size, remaining)
+            classes = torch.multinomial(self.class_probs, n, replacement=True, generator=g)
+            pos = self.offsets[classes] + (torch.rand(n, generator=g) * self.counts[classes]).long()
+            yield from self.sorted_idx[pos].tolist()
+            remaining -= n
+
+    def __len__(self):
+        return self.num_samples
+
+
+class HardExampleSampler(ClassBalancedSampler):
+    """
+    Hard-example mining: bobot sampel = bobot kelas × (loss_cache + eps)^power, dicampur dengan
+    bobot kelas murni (`uniform_mix`) agar sampel mudah tetap sesekali terlihat.
+    Loss per sampel di-cache (float32, N) dan diperbarui dari training lewat `update`.
+    Bobot dibekukan di `set_epoch` (dari cache saat awal epoch): urutan index satu epoch tidak
+    bergantung pada seberapa jauh worker DataLoader sudah prefetch, sehingga bisa dibangkitkan ulang
+    persis saat resume (`state_dict` / `load_state_dict` menyimpan bobot awal epoch).
+    """
+
+    def __init__(self, labels, class_mode="sqrt", power=1.0, uniform_mix=0.3, momentum=0.7,
+                 num_samples=None, beta=0.999, seed=0, chunk_size=1024):
+        super().__init__(labels, mode=class_mode, num_samples=num_samples, beta=beta,
+                         seed=seed, chunk_size=chunk_size)
+        labels = torch.as_tensor(np.asarray(labels, dtype=np.int64))
+        counts = self.counts.double().clamp(min=1)
+        self.base_weights = (self.class_probs.double() / counts)[labels].float()
+        self.loss_cache = torch.ones(len(labels), dtype=torch.float32)
+        self.power = power
+        self.uniform_mix = uniform_mix
+        self.momentum = momentum
+        self.weights_epoch = None
+        self.epoch_weights = None
+
+    def update(self, indices, losses):
+        """Perbarui cache loss per sampel (EMA) dari batch training."""
+        indices = torch.as_tensor(indices, dtype=torch.long)
+        losses = torch.as_tensor(losses, dtype=torch.float32).detach().cpu()
+        self.loss_cache[indices] = self.momentum * self.loss_cache[indices] + (1 - self.momentum) * losses
+
+    def _weights(self):
+        hard = self.base_weights * (self.loss_cache + 1e-3).pow(self.power)
+        hard = hard / hard.sum()
+        base = self.base_weights / self.base_weights.sum()
+        return (1 - self.uniform_mix) * hard + self.uniform_mix * base
+
+    def set_epoch(self, epoch):
+        super().set_epoch(epoch)
+        # Bobot epoch yang dipulihkan dari checkpoint (resume di tengah epoch) tidak dihitung ulang
+        if self.weights_epoch != epoch:
+            self.epoch_weights = self._weights()
+            self.weights_epoch = epoch
+
+    def state_dict(self):
+        return {"loss_cache": self.loss_cache.clone(), "weights_epoch": self.weights_epoch,
+                "epoch_weights": self.epoch_weights}
+
+    def load_state_dict(self, state):
+        self.loss_cache.copy_(state["loss_cache"])
+        self.weights_epoch = state.get("weights_epoch")
+        self.epoch_weights = state.get("epoch_weights")
+
+    def __iter__(self):
+        if self.weights_epoch != self.epoch:
+            self.set_epoch(self.epoch)
+        g = self._generator()
+        remaining = self.num_samples
+        while remaining > 0:
+            n = min(self.chunk_size, remaining)
+            yield from torch.multinomial(self.epoch_weights, n, replacement=True, generator=g).tolist()
+            remaining -= n
+
+
+class EpochRandomSampler(Sampler):
+    """Permutasi acak dari generator (seed + epoch): pengganti shuffle=True yang reproducible."""
+
+    def __init__(self, num_samples, seed=0):
+        self.num_samples = num_samples
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __iter__(self):
+        g = torch.Generator()
+        g.manual_seed(self.seed + self.epoch)
+        yield from torch.randperm(self.num_samples, generator=g).tolist()
+
+    def __len__(self):
+        return self.num_samples
+
+
+class ResumableSampler(Sampler):
+    """
+    Bungkus sampler ber-`set_epoch` agar training bisa dilanjutkan di tengah epoch:
+    - `skip(n)` melewati n sampel pertama epoch berjalan; sisa urutannya identik dengan run awal
+      karena sampler dasar membangkitkan ulang urutan yang sama dari (seed, epoch) — untuk
+      HardExampleSampler dengan syarat bobot awal epoch ikut dipulihkan (`load_state_dict`);
+    - setiap index dipasangkan dengan seed augmentasi turunan (seed, epoch, posisi), dipakai
+      `SeededDataset`, sehingga augmentasi tidak bergantung pada worker mana yang memuat sampel.
+    Skip berlaku sampai `set_epoch` berikutnya (len() ikut berkurang).
+    """
+
+    def __init__(self, sampler, seed=0):
+        self.sampler = sampler
+        self.seed = seed
+        self.epoch = 0
+        self.skipped = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+        self.skipped = 0
+        self.sampler.set_epoch(epoch)
+
+    def skip(self, num_samples):
+        self.skipped = num_samples
+
+    def __iter__(self):
+        base = (self.seed * 1_000_003 + self.epoch) * 1_000_003
+        for pos, idx in enumerate(islice(iter(self.sampler), self.skipped, None), self.skipped):
+            yield idx, (base + pos) % (2 ** 63)
+
+    def __len__(self):
+        return max(0, len(self.sampler) - self.skipped)
+
+
+def build_sampler(mode, labels, beta=0.999, hard_power=1.0, seed=0):
+    if mode in (None, "none"):
+        return None
+    if mode == "hard":
+        return HardExampleSampler(labels, power=hard_power, beta=beta, seed=seed)
+    return ClassBalancedSampler(labels, mode=mode, beta=beta, seed=seed)
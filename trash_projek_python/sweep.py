@@ -0,0 +1,305 @@
+# sweep.py — sweep hyperparameter paralel (grid / random / successive halving) + k-fold, satu dataset ter-decode bersama
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import DataLoader
+
+from dataset import WasteDataset
+from decoded_cache import DecodedDataset, build_decoded_cache, cache_fingerprint
+from model import build_model
+from train import CLASS_WEIGHTS, evaluate, train_epoch
+from utils import print_time, ensure_dir
+
+DEFAULT_SPACE = {
+    "lr": [1e-4, 3e-4, 1e-3],
+    "weight_decay": [1e-5, 1e-4],
+    "lr_decay_every": [4, 8],
+    "class_weights": [None, "default"],  # None = rata, "default" = CLASS_WEIGHTS di train.py
+}
+
+
+def load_space(spec):
+    """`spec`: path file JSON atau string JSON. Tanpa spec → DEFAULT_SPACE."""
+    if not spec:
+        return DEFAULT_SPACE
+    if os.path.isfile(spec):
+        with open(spec) as f:
+            return json.load(f)
+    return json.loads(spec)
+
+
+def grid_configs(space):
+    keys = sorted(space)
+    values = [v if isinstance(v, list) else [v] for v in (space[k] for k in keys)]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def sample_value(rng, spec):
+    """List → pilih salah satu; {"uniform": [a, b]}, {"log_uniform": [a, b]}, {"int": [a, b]}."""
+    if isinstance(spec, list):
+        return spec[rng.randrange(len(spec))]
+    if isinstance(spec, dict):
+        if "uniform" in spec:
+            return rng.uniform(*spec["uniform"])
+        if "log_uniform" in spec:
+            lo, hi = spec["log_uniform"]
+            return math.exp(rng.uniform(math.log(lo), math.log(hi)))
+        if "int" in spec:
+            return rng.randint(*spec["int"])
+    return spec
+
+
+def random_configs(space, n, seed=0):
+    rng = random.Random(seed)
+    return [{k: sample_value(rng, space[k]) for k in sorted(space)} for _ in range(n)]
+
+
+def read_list(list_file, data_root):
+    """(path lengkap, label 0-indexed) dari list file, dengan format & validasi WasteDataset."""
+    ds = WasteDataset(list_file, data_root, augment=False)
+    return list(ds.filepaths), [int(label) for label in ds.labels]
+
+
+def make_folds(labels, k, seed=0):
+    """Fold stratified: per kelas diacak (seed), lalu dibagi bergiliran ke k fold."""
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+    fold_of = np.empty(len(labels), dtype=np.int64)
+    for c in np.unique(labels):
+        idx = np.flatnonzero(labels == c)
+        rng.shuffle(idx)
+        fold_of[idx] = np.arange(len(idx)) % k
+    return [(np.flatnonzero(fold_of != f), np.flatnonzero(fold_of == f)) for f in range(k)]
+
+
+def state_key(task, data_fingerprint):
+    """
+    Hash semua yang menentukan isi state trial: konfigurasi, arsitektur, ukuran input, fold (index
+    train/val), dan data cache. Sweep lain di --sweep_dir yang sama tidak akan melanjutkan state ini.
+    """
+    h = hashlib.sha1()
+    h.update(json.dumps({k: task[k] for k in ("config", "arch", "num_classes", "input_size", "batch_size",
+                                              "patience", "seed")}, sort_keys=True).encode())
+    h.update(np.asarray(task["train_idx"], dtype=np.int64).tobytes())
+    h.update(b"|")
+    h.update(np.asarray(task["val_idx"], dtype=np.int64).tobytes())
+    h.update(data_fingerprint.encode())
+    return h.hexdigest()[:12]
+
+
+def _init_worker(threads):
+    # Batas thread per trial agar trial paralel tidak saling berebut core
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+
+def run_trial(task):
+    """
+    Latih satu (konfigurasi, fold) dari epoch terakhir yang tersimpan sampai `task["epochs"]`.
+    State disimpan ke `task["state_path"]` sehingga rung successive halving berikutnya melanjutkan,
+    bukan mengulang dari awal.
+    """
+    cfg = task["config"]
+    torch.manual_seed(task["seed"])
+    device = torch.device("cpu")
+    train_ds = DecodedDataset(task["cache_dir"], task["train_idx"], task["input_size"], augment=True)
+    val_ds = DecodedDataset(task["cache_dir"], task["val_idx"], task["input_size"], augment=False)
+    loader_kwargs = dict(batch_size=task["batch_size"], num_workers=task["num_workers"],
+                         persistent_workers=task["num_workers"] > 0)
+    train_loader = DataLoader(train_ds, shuffle=True, **loader_kwargs)
+    val_loader = DataLoader(val_ds, shuffle=False, **loader_kwargs)
+
+    model = build_model(task["arch"], num_classes=task["num_classes"])
+    model.init_weights(method="kaiming")
+    optimizer = optim.Adam(model.parameters(), lr=cfg.get("lr", 1e-4), weight_decay=cfg.get("weight_decay", 1e-4))
+    scheduler = optim.lr_scheduler.StepLR(optimizer, step_size=cfg.get("lr_decay_every", 8),
+                                          gamma=cfg.get("lr_decay_factor", 0.5))
+    weights = cfg.get("class_weights")
+    if weights == "default":
+        weights = CLASS_WEIGHTS
+    criterion = nn.CrossEntropyLoss(weight=torch.tensor(weights, dtype=torch.float32) if weights else None)
+
+    state = {"epoch": 0, "history": [], "best_val_loss": float("inf"), "best_val_acc": 0.0,
+             "patience_counter": 0, "stopped_early": False}
+    if os.path.isfile(task["state_path"]):
+        saved = torch.load(task["state_path"], map_location="cpu", weights_only=True)
+        model.load_state_dict(saved["model_state_dict"])
+        optimizer.load_state_dict(saved["optimizer_state_dict"])
+        scheduler.load_state_dict(saved["scheduler_state_dict"])
+        state = saved["state"]
+
+    start = time.perf_counter()
+    while state["epoch"] < task["epochs"] and not state["stopped_early"]:
+        train_loss, train_acc = train_epoch(model, train_loader, criterion, optimizer, device)
+        val_loss, val_acc = evaluate(model, val_loader, criterion, device)
+        scheduler.step()
+        state["epoch"] += 1
+        state["history"].append({"epoch": state["epoch"], "train_loss": train_loss, "train_acc": train_acc,
+                                 "val_loss": val_loss, "val_acc": val_acc})
+        state["best_val_acc"] = max(state["best_val_acc"], val_acc)
+        if val_loss < state["best_val_loss"]:
+            state["best_val_loss"] = val_loss
+            state["patience_counter"] = 0
+        else:
+            state["patience_counter"] += 1
+            # Trial yang tidak membaik dalam `patience` epoch dihentikan lebih awal
+            state["stopped_early"] = state["patience_counter"] >= task["patience"]
+
+    torch.save({
+        "model_state_dict": model.state_dict(),
+        "optimizer_state_dict": optimizer.state_dict(),
+        "scheduler_state_dict": scheduler.state_dict(),
+        "state": state,
+    }, task["state_path"])
+    return {"trial_id": task["trial_id"], "fold": task["fold"], "seconds": time.perf_counter() - start, **state}
+
+
+def score(results):
+    """Rata-rata best val acc semua fold (tie-break: val loss lebih kecil)."""
+    accs = [r["best_val_acc"] for r in results]
+    losses = [r["best_val_loss"] for r in results]
+    return float(np.mean(accs)), -float(np.mean(losses))
+
+
+def write_leaderboard(sweep_dir, rows):
+    rows = sorted(rows, key=lambda r: (r["mean_val_acc"], -r["mean_val_loss"]), reverse=True)
+    with open(os.path.join(sweep_dir, "leaderboard.json"), "w") as f:
+        json.dump(rows, f, indent=2)
+    with open(os.path.join(sweep_dir, "leaderboard.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "trial_id", "mean_val_acc", "std_val_acc", "mean_val_loss",
+                         "epochs", "status", "config"])
+        for rank, r in enumerate(rows, 1):
+            writer.writerow([rank, r["trial_id"], f"{r['mean_val_acc']:.4f}", f"{r['std_val_acc']:.4f}",
+                             f"{r['mean_val_loss']:.5f}", r["epochs"], r["status"], json.dumps(r["config"])])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep hyperparameter train.py secara paralel")
+    parser.add_argument("--space", type=str, default=None,
+                        help="Search space (file/string JSON): {param: [nilai...] | {uniform|log_uniform|int: [a, b]}}")
+    parser.add_argument("--strategy", type=str, default="grid", choices=["grid", "random", "halving"])
+    parser.add_argument("--num_trials", type=int, default=16, help="Jumlah konfigurasi (random / halving)")
+    parser.add_argument("--epochs", type=int, default=12, help="Epoch maksimum per trial")
+    parser.add_argument("--min_epochs", type=int, default=2, help="Epoch rung pertama (halving)")
+    parser.add_argument("--eta", type=int, default=3, help="Halving: simpan 1/eta terbaik, epoch × eta")
+    parser.add_argument("--patience", type=int, default=4, help="Hentikan trial jika val loss tidak turun N epoch")
+    parser.add_argument("--folds", type=int, default=1,
+                        help="k-fold cross-validation atas gabungan train+val (1 = pakai split train/val apa adanya)")
+    parser.add_argument("--train_list", type=str, default="data/one-indexed-files-notrash_train.txt")
+    parser.add_argument("--val_list", type=str, default="data/one-indexed-files-notrash_val.txt")
+    parser.add_argument("--data_folder", type=str, default="data/pics")
+    parser.add_argument("--cache_dir", type=str, default="data/cache/decoded")
+    parser.add_argument("--cache_size", type=int, default=256, help="Sisi gambar di cache ter-decode")
+    parser.add_argument("--input_size", type=int, nargs=2, default=[224, 224])
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--arch", type=str, default="resnet18")
+    parser.add_argument("--num_classes", type=int, default=6)
+    parser.add_argument("--parallel", type=int, default=max(1, (os.cpu_count() or 1) // 4),
+                        help="Jumlah trial yang berjalan bersamaan")
+    parser.add_argument("--threads_per_trial", type=int, default=None,
+                        help="Thread intra-op per trial (default: cpu_count / parallel)")
+    parser.add_argument("--trial_workers", type=int, default=0, help="num_workers DataLoader per trial")
+    parser.add_argument("--sweep_dir", type=str, default="checkpoints/sweep")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    ensure_dir(args.sweep_dir)
+    threads = args.threads_per_trial or max(1, (os.cpu_count() or 1) // args.parallel)
+
+    # Data: decode sekali ke memmap bersama
+    train_paths, train_labels = read_list(args.train_list, args.data_folder)
+    val_paths, val_labels = read_list(args.val_list, args.data_folder)
+    paths, labels = train_paths + val_paths, train_labels + val_labels
+    build_decoded_cache(paths, labels, args.cache_dir, size=args.cache_size)
+    if args.folds > 1:
+        folds = make_folds(labels, args.folds, seed=args.seed)
+    else:
+        folds = [(np.arange(len(train_paths)), np.arange(len(train_paths), len(paths)))]
+
+    space = load_space(args.space)
+    if args.strategy == "grid":
+        configs = grid_configs(space)
+    else:
+        configs = random_configs(space, args.num_trials, seed=args.seed)
+    with open(os.path.join(args.sweep_dir, "configs.json"), "w") as f:
+        json.dump(configs, f, indent=2)
+
+    if args.strategy == "halving":
+        rung_epochs = min(args.min_epochs, args.epochs)
+    else:
+        rung_epochs = args.epochs
+    print_time(f"🧪 {len(configs)} konfigurasi × {len(folds)} fold | {args.parallel} paralel × {threads} thread")
+
+    data_fingerprint = cache_fingerprint(args.cache_dir)
+    alive = list(range(len(configs)))
+    rows = {}
+    ctx = mp.get_context("spawn")  # fork + thread pool torch rawan deadlock
+    # Diwarisi proses trial: batas thread BLAS/OpenMP & progress bar tqdm dimatikan
+    os.environ.update(OMP_NUM_THREADS=str(threads), MKL_NUM_THREADS=str(threads), TQDM_DISABLE="1")
+    with ProcessPoolExecutor(max_workers=args.parallel, mp_context=ctx,
+                             initializer=_init_worker, initargs=(threads,)) as pool:
+        while alive:
+            tasks = [{
+                "trial_id": t, "fold": f, "config": configs[t], "epochs": rung_epochs,
+                "train_idx": folds[f][0], "val_idx": folds[f][1], "cache_dir": args.cache_dir,
+                "input_size": args.input_size, "batch_size": args.batch_size, "arch": args.arch,
+                "num_classes": args.num_classes, "num_workers": args.trial_workers, "patience": args.patience,
+                "seed": args.seed + t,
+            } for t in alive for f in range(len(folds))]
+            # State hanya dilanjutkan oleh trial yang identik (bukan sekadar nomor trial yang sama)
+            for task in tasks:
+                task["state_path"] = os.path.join(
+                    args.sweep_dir, f"trial{task['trial_id']:03d}_fold{task['fold']}_{state_key(task, data_fingerprint)}.pt")
+            print_time(f"🏃 Rung {rung_epochs} epoch: {len(alive)} konfigurasi ({len(tasks)} task)")
+
+            results = {}
+            for r in pool.map(run_trial, tasks):
+                results.setdefault(r["trial_id"], []).append(r)
+            for t, rs in results.items():
+                accs = [r["best_val_acc"] for r in rs]
+                rows[t] = {
+                    "trial_id": t, "config": configs[t],
+                    "mean_val_acc": float(np.mean(accs)), "std_val_acc": float(np.std(accs)),
+                    "mean_val_loss": float(np.mean([r["best_val_loss"] for r in rs])),
+                    "epochs": max(r["epoch"] for r in rs),
+                    "status": "early_stopped" if all(r["stopped_early"] for r in rs) else "completed",
+                    "folds": [{k: r[k] for k in ("fold", "best_val_acc", "best_val_loss", "epoch", "seconds")}
+                              for r in sorted(rs, key=lambda r: r["fold"])],
+                }
+            write_leaderboard(args.sweep_dir, list(rows.values()))
+
+            if args.strategy != "halving" or rung_epochs >= args.epochs or len(alive) <= 1:
+                break
+            # Successive halving: hanya 1/eta terbaik lanjut ke rung berikutnya dengan epoch × eta
+            ranked = sorted(alive, key=lambda t: score(results[t]), reverse=True)
+            keep = max(1, len(alive) // args.eta)
+            for t in ranked[keep:]:
+                rows[t]["status"] = f"halved@{rung_epochs}"
+            alive = [t for t in ranked[:keep] if rows[t]["status"] != "early_stopped"]
+            rung_epochs = min(rung_epochs * args.eta, args.epochs)
+
+    leaderboard = write_leaderboard(args.sweep_dir, list(rows.values()))
+    print_time("🏆 Leaderboard:")
+    for rank, r in enumerate(leaderboard[:10], 1):
+        print(f"  {rank:2}. trial {r['trial_id']:3} acc {r['mean_val_acc']:.4f} ± {r['std_val_acc']:.4f} "
+              f"loss {r['mean_val_loss']:.4f} ({r['epochs']} ep, {r['status']}) {json.dumps(r['config'])}")
+    print_time(f"📁 {os.path.join(args.sweep_dir, 'leaderboard.csv')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,30 @@ from sklearn.metrics import classification_report, confusion_matrix
 import numpy as np
 import json
 import os
+import time
 
 from dataset import WasteDataset
-from model import WasteClassifier
+from model import load_model_from_checkpoint
 from utils import print_time
+from tta import tta_logits, MAX_VIEWS
+from cascade import evaluate_cascade, calibrate_threshold
+from ensemble import VectorizedEnsemble, load_members, max_member_diff
+from waste_infer.labels import CLASS_NAMES
 import matplotlib.pyplot as plt
 import seaborn as sns
 
 
+def apply_trash_threshold(probs, threshold, trash_idx=5):
+    """
+    Prediksi trash hanya jika probabilitasnya > threshold & maksimum;
+    jika tidak, pilih dari kelas non-trash (0–4). Versi vektor dari loop per sampel.
+    """
+    pred = torch.argmax(probs[:, :trash_idx], dim=1)
+    is_trash = (probs[:, trash_idx] > threshold) & (probs[:, trash_idx] == probs.max(dim=1).values)
+    pred[is_trash] = trash_idx
+    return pred
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--checkpoint", type=str, required=True)
@@ -27,6 +43,19 @@ def main():
     parser.add_argument("--num_classes", type=int, default=6)
     parser.add_argument("--threshold_trash", type=float, default=0.6,
                         help="Threshold probabilitas untuk prediksi trash (label=5)")
+    parser.add_argument("--tta_views", type=int, default=1,
+                        help=f"Jumlah view test-time augmentation (1 = nonaktif, maks {MAX_VIEWS})")
+    # Cascade: model kecil dulu, model --checkpoint hanya untuk input yang tidak yakin
+    parser.add_argument("--small_checkpoint", type=str, default=None,
+                        help="Checkpoint model kecil (misal --arch mobilenet_v3_small) untuk evaluasi cascade")
+    parser.add_argument("--cascade_threshold", type=float, default=0.9,
+                        help="Confidence minimum model kecil; di bawahnya diteruskan ke model besar")
+    parser.add_argument("--calibrate_cascade", action="store_true",
+                        help="Kalibrasi threshold cascade di split val (butuh --small_checkpoint)")
+    parser.add_argument("--cascade_max_acc_drop", type=float, default=0.0,
+                        help="Penurunan akurasi maksimum vs model besar saat kalibrasi")
+    parser.add_argument("--ensemble", type=str, nargs="+", default=None,
+                        help="Checkpoint tambahan (arsitektur sama) untuk di-ensemble bersama --checkpoint")
     
     args = parser.parse_args()
     device = torch.device(args.device)
@@ -35,12 +64,29 @@ def main():
     # Muat checkpoint tanpa asumsi 'args'
     ckpt = torch.load(args.checkpoint, map_location=device, weights_only=True)
     
-    # Bangun model secara eksplisit
-    model = WasteClassifier(num_classes=args.num_classes)
-    model.load_state_dict(ckpt["model_state_dict"])
+    # Bangun model sesuai arsitektur di checkpoint (default resnet18)
+    model = load_model_from_checkpoint(ckpt, num_classes=args.num_classes)
     model = model.to(device)
     model.eval()
     
+    small_model = None
+    if args.small_checkpoint:
+        print_time(f"Loading small checkpoint (cascade): {args.small_checkpoint}")
+        small_ckpt = torch.load(args.small_checkpoint, map_location=device, weights_only=True)
+        small_model = load_model_from_checkpoint(small_ckpt, num_classes=args.num_classes)
+        small_model = small_model.to(device)
+        small_model.eval()
+    ensemble = None
+    if args.ensemble:
+        if args.tta_views > 1:
+            parser.error("--ensemble belum bisa digabung dengan --tta_views")
+        ensemble_models = [model] + load_members(args.ensemble, args.num_classes, device)
+        ensemble = VectorizedEnsemble(ensemble_models)
+        print_time(f"🧩 Ensemble {ensemble.num_models} model (satu forward vmap)")
+    if args.calibrate_cascade and args.split not in ("val", "all"):
+        print_time("⚠️  --calibrate_cascade diabaikan: split val tidak dievaluasi")
+    cascade_data = {}
+    
     splits = ["train", "val", "test"] if args.split == "all" else [args.split]
     results = {}
     
@@ -72,26 +118,64 @@ def main():
         criterion = torch.nn.CrossEntropyLoss()
         total_loss = 0.0
         correct = 0
+        correct_single = 0
+        time_single = 0.0
+        time_tta = 0.0
+        time_small = 0.0
+        time_ensemble = 0.0
         all_preds, all_labels = [], []
+        small_probs_all, large_probs_all = [], []
         
         with torch.no_grad():
             for data, target in dataloader:
                 data, target = data.to(device), target.to(device)
+                
+                t0 = time.perf_counter()
                 output = model(data)
+                if device.type == "cuda":
+                    torch.cuda.synchronize()
+                time_single += time.perf_counter() - t0
+                
+                if args.tta_views > 1:
+                    # Semua view dalam satu batch → satu forward pass, logits dirata-rata
+                    t0 = time.perf_counter()
+                    tta_output = tta_logits(model, data, args.tta_views)
+                    if device.type == "cuda":
+                        torch.cuda.synchronize()
+                    time_tta += time.perf_counter() - t0
+                    pred_single = apply_trash_threshold(torch.softmax(output, dim=1), args.threshold_trash)
+                    correct_single += pred_single.eq(target).sum().item()
+                    output = tta_output
+                
+                if ensemble is not None:
+                    if not all_labels:
+                        # Cek sekali per split: hasil vmap harus sama dengan model dijalankan terpisah
+                        diff = max_member_diff(ensemble, ensemble_models, data)
+                        print_time(f"   Ensemble vs per-model: selisih logits maks {diff:.2e}")
+                    t0 = time.perf_counter()
+                    ensemble_output = ensemble(data)
+                    if device.type == "cuda":
+                        torch.cuda.synchronize()
+                    time_ensemble += time.perf_counter() - t0
+                    pred_single = apply_trash_threshold(torch.softmax(output, dim=1), args.threshold_trash)
+                    correct_single += pred_single.eq(target).sum().item()
+                    output = ensemble_output
+                
+                if small_model is not None:
+                    t0 = time.perf_counter()
+                    small_output = small_model(data)
+                    if device.type == "cuda":
+                        torch.cuda.synchronize()
+                    time_small += time.perf_counter() - t0
+                    small_probs_all.append(torch.softmax(small_output, dim=1).cpu())
+                    large_probs_all.append(torch.softmax(output, dim=1).cpu())
+                
                 loss = criterion(output, target)
                 total_loss += loss.item()
                 
                 # 🔥 Thresholding khusus untuk trash
                 probs = torch.softmax(output, dim=1)
-                pred = torch.argmax(probs, dim=1)
-                
-                # Jika probabilitas trash > threshold & maksimum → prediksi trash
-                # Jika tidak, abaikan kelas trash dan pilih dari 5 kelas lain
-                for i in range(len(pred)):
-                    if probs[i, 5] > args.threshold_trash and probs[i, 5] == probs[i].max():
-                        pred[i] = 5
-                    else:
-                        pred[i] = torch.argmax(probs[i, :5])  # hanya 0–4 (non-trash)
+                pred = apply_trash_threshold(probs, args.threshold_trash)
                 
                 correct += pred.eq(target).sum().item()
                 all_preds.extend(pred.cpu().numpy())
@@ -99,18 +183,57 @@ def main():
         
         acc = correct / len(dataset)
         avg_loss = total_loss / len(dataloader)
-        results[split] = {"acc": acc, "loss": avg_loss}
+        ms_single = time_single * 1000 / len(dataset)
+        results[split] = {"acc": acc, "loss": avg_loss, "ms_per_image": ms_single}
         
         print_time(f"{split.capitalize()} → Acc: {acc:.4f}, Loss: {avg_loss:.4f}")
+        if args.tta_views > 1:
+            acc_single = correct_single / len(dataset)
+            ms_tta = time_tta * 1000 / len(dataset)
+            results[split].update({
+                "tta_views": args.tta_views,
+                "acc_single": acc_single,
+                "ms_per_image": ms_tta,
+                "ms_per_image_single": ms_single,
+            })
+            print_time(f"   TTA x{args.tta_views}: Acc {acc_single:.4f} → {acc:.4f} "
+                       f"({acc - acc_single:+.4f}), latency {ms_single:.2f} → {ms_tta:.2f} ms/img "
+                       f"(x{ms_tta / max(ms_single, 1e-9):.2f})")
+        elif ensemble is not None:
+            acc_single = correct_single / len(dataset)
+            ms_ensemble = time_ensemble * 1000 / len(dataset)
+            results[split].update({
+                "ensemble_models": [args.checkpoint] + args.ensemble,
+                "acc_single": acc_single,
+                "ms_per_image": ms_ensemble,
+                "ms_per_image_single": ms_single,
+            })
+            print_time(f"   Ensemble x{ensemble.num_models}: Acc {acc_single:.4f} → {acc:.4f} "
+                       f"({acc - acc_single:+.4f}), latency {ms_single:.2f} → {ms_ensemble:.2f} ms/img "
+                       f"(x{ms_ensemble / max(ms_single, 1e-9):.2f})")
+        else:
+            print_time(f"   Latency: {ms_single:.2f} ms/img")
+        
+        if small_model is not None:
+            cascade_data[split] = {
+                "small": torch.cat(small_probs_all),
+                "large": torch.cat(large_probs_all),
+                "labels": torch.tensor(all_labels),
+                "ms_small": time_small * 1000 / len(dataset),
+                "ms_large": results[split]["ms_per_image"],
+            }
         
         # Simpan confusion matrix hanya untuk test
         if split == "test":
-            labels = ["glass", "paper", "cardboard", "plastic", "metal", "trash"]
+            labels = list(CLASS_NAMES)
             cm = confusion_matrix(all_labels, all_preds)
             plt.figure(figsize=(8, 6))
             sns.heatmap(cm, annot=True, fmt="d", cmap="Blues",
                         xticklabels=labels, yticklabels=labels)
-            plt.title(f"Confusion Matrix (Test Set, trash_threshold={args.threshold_trash})")
+            tta_note = f", TTA x{args.tta_views}" if args.tta_views > 1 else ""
+            if ensemble is not None:
+                tta_note = f", ensemble x{ensemble.num_models}"
+            plt.title(f"Confusion Matrix (Test Set, trash_threshold={args.threshold_trash}{tta_note})")
             plt.ylabel("True Label")
             plt.xlabel("Predicted Label")
             plt.tight_layout()
@@ -128,6 +251,34 @@ def main():
             print("="*50)
             print(report)
     
+    # Evaluasi cascade (model kecil → model besar jika confidence < threshold)
+    if small_model is not None and cascade_data:
+        pred_fn = lambda p: apply_trash_threshold(p, args.threshold_trash)
+        threshold = args.cascade_threshold
+        if args.calibrate_cascade and "val" in cascade_data:
+            val = cascade_data["val"]
+            threshold, val_acc, val_frac = calibrate_threshold(
+                val["small"], val["large"], val["labels"],
+                max_acc_drop=args.cascade_max_acc_drop, pred_fn=pred_fn
+            )
+            print_time(f"🎯 Threshold cascade terkalibrasi (val): {threshold:.3f} "
+                       f"→ Acc {val_acc:.4f}, {val_frac:.1%} ke model besar")
+        for split, d in cascade_data.items():
+            acc, frac = evaluate_cascade(d["small"], d["large"], d["labels"], threshold, pred_fn)
+            small_acc = pred_fn(d["small"]).eq(d["labels"]).float().mean().item()
+            # Biaya rata-rata: semua lewat model kecil + sebagian lewat model besar
+            ms_cascade = d["ms_small"] + frac * d["ms_large"]
+            results[split]["cascade"] = {
+                "threshold": threshold,
+                "acc": acc,
+                "small_acc": small_acc,
+                "routed_to_large": frac,
+                "ms_per_image": ms_cascade,
+                "ms_per_image_small": d["ms_small"],
+            }
+            print_time(f"🔀 Cascade {split}: Acc {acc:.4f} (kecil {small_acc:.4f}, besar {results[split]['acc']:.4f}) | "
+                       f"{frac:.1%} ke model besar | {ms_cascade:.2f} vs {d['ms_large']:.2f} ms/img")
+    
     # Simpan hasil
     with open("test_results.json", "w") as f:
         json.dump(results, f, indent=2)
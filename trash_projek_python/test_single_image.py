@@ -6,7 +6,7 @@ import sys
 import os
 
 from model import WasteClassifier
-from dataset import LABEL_MAP
+from waste_infer.labels import LABEL_MAP  # 0-indexed
 
 def predict_single_image(image_path, model_path, device='cuda'):
     """
@@ -69,7 +69,7 @@ def predict_single_image(image_path, model_path, device='cuda'):
         pred_idx = probs.argmax().item()
         confidence = probs[pred_idx].item()
     
-    pred_label = LABEL_MAP[pred_idx + 1]
+    pred_label = LABEL_MAP[pred_idx]
     
     # Tampilkan hasil utama
     print("\n" + "=" * 70)
@@ -88,7 +88,7 @@ def predict_single_image(image_path, model_path, device='cuda'):
     sorted_indices = probs.argsort(descending=True)
     
     for rank, idx in enumerate(sorted_indices, 1):
-        label = LABEL_MAP[idx.item() + 1]
+        label = LABEL_MAP[idx.item()]
         prob = probs[idx].item()
         
         # Bar chart sederhana dengan ASCII
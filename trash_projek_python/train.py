@@ -2,51 +2,83 @@
 import argparse
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import torch.optim as optim
-from torch.utils.data import DataLoader
 from tqdm import tqdm
 import os
 import json
+import random
+import time
 from datetime import datetime
 
-from dataset import WasteDataset
-from model import WasteClassifier
+import numpy as np
+
+from dataset import WasteDataset, IndexedDataset, SeededDataset
+from distill import compute_teacher_logits, DistillationLoss
+from autotune import auto_tune
+from data_pipeline import make_loader, DevicePrefetcher
+from samplers import build_sampler, HardExampleSampler, SAMPLER_MODES, EpochRandomSampler, ResumableSampler
+from model import build_model, load_model_from_checkpoint, ARCHITECTURES
 from utils import print_time, ensure_dir
+from waste_infer.labels import CLASS_NAMES
+
+# ⚖️ Bobot class-weighted loss untuk mengurangi bias (glass & metal lebih berat)
+CLASS_WEIGHTS = [1.5, 1.0, 1.0, 1.0, 1.5, 4.0]
 
 
-def train_epoch(model, dataloader, criterion, optimizer, device):
+def train_epoch(model, dataloader, criterion, optimizer, device, teacher_logits=None, hard_sampler=None,
+                start_step=0, totals=None, on_step=None):
+    """
+    Jika `teacher_logits` diberikan (mode distilasi), dataloader harus mengembalikan
+    (data, target, idx) dan criterion dipanggil sebagai criterion(output, target, teacher_logits[idx]).
+    Jika `hard_sampler` diberikan, loss per sampel dikirim ke sampler (hard-example mining).
+    Resume di tengah epoch: `start_step` batch sudah dilatih dengan akumulator `totals`
+    (loss, correct, total); `on_step(step, totals)` dipanggil setelah setiap batch.
+    """
     model.train()
-    total_loss = 0.0
-    correct = 0
-    total = 0
-    pbar = tqdm(dataloader, desc="Training", leave=False)
-    for data, target in pbar:
-        data, target = data.to(device), target.to(device)
+    total_loss, correct, total = totals or (0.0, 0, 0)
+    step = start_step
+    pbar = tqdm(dataloader, desc="Training", leave=False, initial=start_step,
+                total=start_step + len(dataloader))
+    for batch in pbar:
+        data, target = batch[0].to(device), batch[1].to(device)
         optimizer.zero_grad()
         output = model(data)
-        loss = criterion(output, target)
+        if teacher_logits is not None:
+            loss = criterion(output, target, teacher_logits[batch[2].cpu()].to(device))
+        else:
+            loss = criterion(output, target)
         loss.backward()
         optimizer.step()
+        if hard_sampler is not None:
+            with torch.no_grad():
+                hard_sampler.update(batch[2].cpu(), F.cross_entropy(output, target, reduction='none'))
 
         total_loss += loss.item()
         pred = output.argmax(dim=1, keepdim=True)
         correct += pred.eq(target.view_as(pred)).sum().item()
         total += target.size(0)
+        step += 1
 
         # Update tqdm description
         pbar.set_postfix({
-            'Loss': f'{total_loss / len(pbar):.4f}',
+            'Loss': f'{total_loss / step:.4f}',
             'Acc': f'{correct / total:.3%}'
         })
+        if on_step is not None:
+            on_step(step, (total_loss, correct, total))
 
-    return total_loss / len(dataloader), correct / total
+    return total_loss / max(step, 1), correct / max(total, 1)
 
 
-def evaluate(model, dataloader, criterion, device):
+def evaluate(model, dataloader, criterion, device, num_classes=None):
+    """Mengembalikan (loss, acc), atau (loss, acc, recall_per_kelas) jika `num_classes` diberikan."""
     model.eval()
     total_loss = 0.0
     correct = 0
     total = 0
+    class_correct = torch.zeros(num_classes or 1, dtype=torch.long)
+    class_total = torch.zeros(num_classes or 1, dtype=torch.long)
     pbar = tqdm(dataloader, desc="Evaluating", leave=False)
     with torch.no_grad():
         for data, target in pbar:
@@ -57,15 +89,56 @@ def evaluate(model, dataloader, criterion, device):
             pred = output.argmax(dim=1, keepdim=True)
             correct += pred.eq(target.view_as(pred)).sum().item()
             total += target.size(0)
+            if num_classes:
+                hits = pred.view(-1).eq(target).cpu()
+                t = target.cpu()
+                class_total += torch.bincount(t, minlength=num_classes)
+                class_correct += torch.bincount(t[hits], minlength=num_classes)
 
             pbar.set_postfix({
                 'Loss': f'{total_loss / len(pbar):.4f}',
                 'Acc': f'{correct / total:.3%}'
             })
+    if num_classes:
+        recall = (class_correct.float() / class_total.clamp(min=1).float()).tolist()
+        return total_loss / len(dataloader), correct / total, recall
     return total_loss / len(dataloader), correct / total
 
 
-def load_checkpoint_if_exists(checkpoint_path, model, optimizer, scheduler):
+def progressive_stage(epoch, sizes, start_epochs):
+    """Index tahap progressive resizing yang berlaku di `epoch` (start_epochs urut naik, mulai 1)."""
+    stage = 0
+    for i, start in enumerate(start_epochs):
+        if epoch >= start:
+            stage = i
+    return stage
+
+
+def capture_rng_state():
+    """State RNG proses utama (torch, CUDA, NumPy, Python) dalam bentuk yang aman untuk weights_only."""
+    np_state = np.random.get_state()
+    return {
+        'torch': torch.get_rng_state(),
+        'cuda': torch.cuda.get_rng_state_all() if torch.cuda.is_available() else [],
+        'numpy': (np_state[0], torch.from_numpy(np_state[1].astype(np.int64)), *np_state[2:]),
+        'python': random.getstate(),
+    }
+
+
+def restore_rng_state(state):
+    torch.set_rng_state(state['torch'])
+    if state['cuda'] and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+    name, keys, *rest = state['numpy']
+    np.random.set_state((name, keys.numpy().astype(np.uint32), *rest))
+    random.setstate(state['python'])
+
+
+def load_checkpoint_if_exists(checkpoint_path, model, optimizer, scheduler, sampler=None):
+    """
+    Mengembalikan juga `resume`: None, atau {'epoch', 'step', 'totals'} jika checkpoint disimpan
+    di tengah epoch (--checkpoint_every_steps / Ctrl+C), serta state RNG yang tersimpan.
+    """
     if os.path.isfile(checkpoint_path):
         print_time(f"🔁 Memuat checkpoint: {checkpoint_path}")
         checkpoint = torch.load(checkpoint_path, map_location='cpu', weights_only=True)
@@ -77,17 +150,29 @@ def load_checkpoint_if_exists(checkpoint_path, model, optimizer, scheduler):
             'epochs': [], 'train_loss': [], 'train_acc': [],
             'val_loss': [], 'val_acc': []
         })
+        if isinstance(sampler, HardExampleSampler):
+            if checkpoint.get('sampler_state') is not None:
+                sampler.load_state_dict(checkpoint['sampler_state'])
+            elif checkpoint.get('loss_cache') is not None:
+                # Checkpoint lama: hanya cache loss, urutan epoch yang dilanjutkan bisa berbeda
+                sampler.loss_cache.copy_(checkpoint['loss_cache'])
         start_epoch = checkpoint.get('epoch', 0) + 1
         best_val_loss = checkpoint.get('best_val_loss', float('inf'))
         patience_counter = checkpoint.get('patience_counter', 0)
-        print_time(f"▶️  Lanjut dari epoch {start_epoch}, best val loss: {best_val_loss:.5f}")
-        return model, optimizer, scheduler, history, start_epoch, best_val_loss, patience_counter
+        resume = checkpoint.get('resume')
+        if resume:
+            print_time(f"▶️  Lanjut dari epoch {start_epoch}, batch {resume['step'] + 1}, "
+                       f"best val loss: {best_val_loss:.5f}")
+        else:
+            print_time(f"▶️  Lanjut dari epoch {start_epoch}, best val loss: {best_val_loss:.5f}")
+        return (model, optimizer, scheduler, history, start_epoch, best_val_loss, patience_counter,
+                resume, checkpoint.get('rng_state'))
     else:
         print_time("🆕 Tidak ada checkpoint — mulai dari awal.")
         return model, optimizer, scheduler, {
             'epochs': [], 'train_loss': [], 'train_acc': [],
             'val_loss': [], 'val_acc': []
-        }, 1, float('inf'), 0
+        }, 1, float('inf'), 0, None, None
 
 
 def main():
@@ -98,9 +183,38 @@ def main():
     parser.add_argument("--data_folder", type=str, default="data/pics")
     parser.add_argument("--input_size", type=int, nargs=2, default=[224, 224])
     parser.add_argument("--batch_size", type=int, default=8)
+    # Progressive resizing: resolusi kecil di epoch awal, naik sampai --input_size
+    parser.add_argument("--progressive_sizes", type=int, nargs="+", default=None,
+                        help="Sisi input per tahap, misal 128 160 224 (tahap terakhir sebaiknya = --input_size)")
+    parser.add_argument("--progressive_epochs", type=int, nargs="+", default=None,
+                        help="Epoch mulai setiap tahap, misal 1 6 12 (default: dibagi rata di 2/3 awal)")
+    parser.add_argument("--progressive_max_batch", type=int, default=256,
+                        help="Batas batch size saat batch diskalakan (batch × (input_size/sisi)²)")
     parser.add_argument("--num_workers", type=int, default=4)
+    parser.add_argument("--persistent_workers", action=argparse.BooleanOptionalAction, default=True,
+                        help="Pertahankan worker DataLoader selama seluruh run (default: aktif)")
+    parser.add_argument("--prefetch_factor", type=int, default=2)
+    parser.add_argument("--auto_tune", action="store_true",
+                        help="Ukur & pilih batch size, num_workers, persistent_workers, prefetch_factor tercepat")
+    parser.add_argument("--auto_tune_lr_scaling", type=str, default="linear", choices=["linear", "sqrt", "none"],
+                        help="Skala --lr terhadap batch size hasil auto-tune (relatif ke --batch_size)")
+    parser.add_argument("--auto_tune_headroom", type=float, default=0.8,
+                        help="Fraksi memori bebas yang boleh dipakai saat probing batch size")
     # Model
+    parser.add_argument("--arch", type=str, default="resnet18", choices=list(ARCHITECTURES),
+                        help="resnet18 (default) atau mobilenet_v3_small (model kecil untuk cascade)")
     parser.add_argument("--num_classes", type=int, default=6)
+    parser.add_argument("--init_checkpoint", type=str, default=None,
+                        help="Mulai dari bobot checkpoint ini (misal hasil prune.py; arsitektur & channel ikut checkpoint)")
+    # Sampler (pengganti duplikasi list & bobot loss manual)
+    parser.add_argument("--sampler", type=str, default="none", choices=("none",) + SAMPLER_MODES,
+                        help="balanced / sqrt / effective (class-balanced) atau hard (hard-example mining)")
+    parser.add_argument("--sampler_beta", type=float, default=0.999, help="Beta untuk mode effective")
+    parser.add_argument("--hard_power", type=float, default=1.0, help="Eksponen loss untuk mode hard")
+    parser.add_argument("--class_weights", type=float, nargs="+", default=None,
+                        help="Bobot CE per kelas (default: CLASS_WEIGHTS tanpa sampler, rata jika pakai sampler)")
+    parser.add_argument("--target_recall", type=float, default=None,
+                        help="Catat epoch pertama saat semua kelas mencapai recall val ini")
     parser.add_argument("--init_method", type=str, default="kaiming",
                         choices=["kaiming", "xavier", "xavier_caffe", "heuristic"])
     # Training
@@ -112,9 +226,21 @@ def main():
     # Early Stopping
     parser.add_argument("--patience", type=int, default=7,
                         help="Jumlah epoch menunggu sebelum berhenti jika val loss tidak turun")
+    # Knowledge distillation (student = --arch)
+    parser.add_argument("--teacher_checkpoint", type=str, default=None,
+                        help="Checkpoint teacher (misal best_model.pth ResNet18) untuk mode distilasi")
+    parser.add_argument("--distill_alpha", type=float, default=0.7,
+                        help="Bobot loss soft target (sisanya class-weighted CE)")
+    parser.add_argument("--distill_temperature", type=float, default=4.0)
+    parser.add_argument("--teacher_cache", type=str, default=None,
+                        help="File cache logits teacher (default: <checkpoint_dir>/teacher_logits.pt)")
     # Output
     parser.add_argument("--checkpoint_dir", type=str, default="checkpoints/final_v3")
     parser.add_argument("--save_every", type=int, default=5)
+    parser.add_argument("--checkpoint_every_steps", type=int, default=0,
+                        help="Simpan last_checkpoint.pth setiap N batch (resume di tengah epoch; 0 = per epoch)")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Seed urutan data & augmentasi (resume menghasilkan batch yang sama persis)")
     # Device
     parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
 
@@ -136,31 +262,162 @@ def main():
         args.val_list, args.data_folder,
         input_size=args.input_size, augment=False
     )
-    train_loader = DataLoader(
-        train_dataset, batch_size=args.batch_size, shuffle=True,
-        num_workers=args.num_workers, pin_memory=(device.type == 'cuda')
-    )
-    val_loader = DataLoader(
-        val_dataset, batch_size=args.batch_size, shuffle=False,
-        num_workers=args.num_workers, pin_memory=(device.type == 'cuda')
-    )
+    teacher_logits = None
+    if args.teacher_checkpoint:
+        # Logits teacher dihitung sekali (tanpa augmentasi) & di-cache, bukan setiap epoch
+        teacher_logits = compute_teacher_logits(
+            args.teacher_checkpoint, args.train_list, args.data_folder, args.input_size, device,
+            cache_path=args.teacher_cache or os.path.join(args.checkpoint_dir, "teacher_logits.pt"),
+            num_workers=args.num_workers, num_classes=args.num_classes,
+        )
+        if len(teacher_logits) != len(train_dataset):
+            raise RuntimeError(f"Jumlah logits teacher ({len(teacher_logits)}) != jumlah sampel train "
+                               f"({len(train_dataset)})")
+        train_dataset = IndexedDataset(train_dataset)
+
+    sampler = build_sampler(args.sampler, train_dataset.dataset.labels if isinstance(train_dataset, IndexedDataset)
+                            else train_dataset.labels, beta=args.sampler_beta, hard_power=args.hard_power,
+                            seed=args.seed)
+    hard_sampler = sampler if isinstance(sampler, HardExampleSampler) else None
+    if hard_sampler is not None and not isinstance(train_dataset, IndexedDataset):
+        train_dataset = IndexedDataset(train_dataset)  # butuh index sampel untuk cache loss
+    if sampler is not None:
+        print_time(f"🎲 Sampler: {args.sampler}")
+    base_train_dataset = train_dataset.dataset if isinstance(train_dataset, IndexedDataset) else train_dataset
+    # Urutan data & seed augmentasi per sampel ditentukan (seed, epoch, posisi) → bisa di-resume per batch
+    train_sampler = ResumableSampler(sampler or EpochRandomSampler(len(train_dataset), seed=args.seed),
+                                     seed=args.seed)
+    loader_train_dataset = SeededDataset(train_dataset)
 
     # Model
     print_time("🧠 Membangun model...")
-    model = WasteClassifier(num_classes=args.num_classes)
-    model.init_weights(method=args.init_method)
+    channel_config = None
+    if args.init_checkpoint:
+        init_ckpt = torch.load(args.init_checkpoint, map_location='cpu', weights_only=True)
+        model = load_model_from_checkpoint(init_ckpt, num_classes=args.num_classes)
+        channel_config = init_ckpt.get('channel_config')
+        args.arch = init_ckpt.get('arch', args.arch)
+        print_time(f"📥 Bobot awal dari {args.init_checkpoint} (arch={args.arch}"
+                   f"{', pruned' if channel_config else ''})")
+    else:
+        model = build_model(args.arch, num_classes=args.num_classes)
+        model.init_weights(method=args.init_method)
     model = model.to(device)
 
     # Optimizer & Scheduler
     # ⚖️ Class-weighted loss untuk mengurangi bias
-    weights = torch.tensor([1.5, 1.0, 1.0, 1.0, 1.5, 4.0]).to(device)  # glass & metal lebih berat
+    if args.class_weights is None:
+        # Sampler sudah menyeimbangkan kelas → jangan dikompensasi dua kali lewat loss
+        args.class_weights = CLASS_WEIGHTS if sampler is None else [1.0] * args.num_classes
+    weights = torch.tensor(args.class_weights).to(device)
     criterion = nn.CrossEntropyLoss(weight=weights)
+    train_criterion = criterion
+    if teacher_logits is not None:
+        train_criterion = DistillationLoss(criterion, temperature=args.distill_temperature,
+                                           alpha=args.distill_alpha)
+        print_time(f"🎓 Mode distilasi: student={args.arch}, T={args.distill_temperature}, "
+                   f"alpha={args.distill_alpha}")
+
+    saved_args = None
+    if os.path.isfile(checkpoint_path):
+        saved_args = torch.load(checkpoint_path, map_location='cpu', weights_only=True).get('args') or {}
+    if args.auto_tune and saved_args and saved_args.get('auto_tune_result'):
+        # Resume: pakai hasil auto-tune run awal — batch size lain akan menggeser batas batch setelah skip()
+        for key in ("batch_size", "num_workers", "persistent_workers", "prefetch_factor", "lr", "auto_tune_result"):
+            setattr(args, key, saved_args[key])
+        print_time(f"✅ Auto-tune dari checkpoint: batch={args.batch_size}, workers={args.num_workers}, "
+                   f"persistent={args.persistent_workers}, prefetch={args.prefetch_factor}, lr={args.lr:.2e}")
+    elif args.auto_tune:
+        # Probing memori & throughput, lalu catat pilihan di args (tersimpan di checkpoint)
+        tune_dataset = train_dataset.dataset if isinstance(train_dataset, IndexedDataset) else train_dataset
+        tuned = auto_tune(
+            model, criterion, tune_dataset, device, args.input_size, args.num_classes,
+            base_batch_size=args.batch_size, base_lr=args.lr,
+            lr_scaling=args.auto_tune_lr_scaling, headroom=args.auto_tune_headroom,
+        )
+        args.batch_size = tuned["batch_size"]
+        args.num_workers = tuned["num_workers"]
+        args.persistent_workers = tuned["persistent_workers"]
+        args.prefetch_factor = tuned["prefetch_factor"]
+        args.lr = tuned["lr"]
+        args.auto_tune_result = tuned
+        print_time(f"✅ Auto-tune: batch={args.batch_size}, workers={args.num_workers}, "
+                   f"persistent={args.persistent_workers}, prefetch={args.prefetch_factor}, "
+                   f"lr={args.lr:.2e} ({tuned['samples_per_sec']:.1f} sampel/s)")
+
+    if saved_args and saved_args.get('batch_size') not in (None, args.batch_size):
+        print_time(f"⚠️  batch_size {args.batch_size} ≠ {saved_args['batch_size']} di checkpoint: "
+                   f"batas batch epoch yang dilanjutkan tidak sama dengan run awal")
+
+    loader_kwargs = dict(num_workers=args.num_workers, device=device,
+                         persistent_workers=args.persistent_workers, prefetch_factor=args.prefetch_factor)
+    val_loader = make_loader(val_dataset, args.batch_size, shuffle=False, **loader_kwargs)
+    # Batch validasi mulai disiapkan saat `prefetch_factor` langkah training terakhir berjalan
+    val_feed = DevicePrefetcher(val_loader, device)
+
+    def build_train_feed(batch_size):
+        # Generator sendiri: seed dasar worker tidak mengambil angka dari RNG global (dropout tetap reproducible)
+        loader = make_loader(loader_train_dataset, batch_size, shuffle=True, sampler=train_sampler,
+                             generator=torch.Generator().manual_seed(args.seed), **loader_kwargs)
+        return DevicePrefetcher(loader, device, on_near_end=val_feed.start,
+                                near_end=max(1, args.prefetch_factor))
+
+    # Progressive resizing: (sisi, batch_size) per tahap; validasi selalu di --input_size
+    stages = None
+    if args.progressive_sizes:
+        if args.progressive_epochs is None:
+            span = max(1, (2 * args.epochs) // 3)
+            n = len(args.progressive_sizes)
+            args.progressive_epochs = [1 + (i * span) // n for i in range(n)]
+        if len(args.progressive_epochs) != len(args.progressive_sizes):
+            raise ValueError("--progressive_epochs harus sepanjang --progressive_sizes")
+        final_side = max(args.input_size)
+        stages = []
+        for side in args.progressive_sizes:
+            # Biaya per gambar ~ jumlah piksel → batch diskalakan dengan luas
+            bs = int(args.batch_size * (final_side / side) ** 2)
+            stages.append((side, max(args.batch_size, min(bs, args.progressive_max_batch))))
+        print_time("📐 Progressive resizing: " + ", ".join(
+            f"epoch {e}+ → {side}px (batch {bs})"
+            for e, (side, bs) in zip(args.progressive_epochs, stages)))
+    current_stage = None
+    train_feed = None if stages else build_train_feed(args.batch_size)
+
     optimizer = optim.Adam(model.parameters(), lr=args.lr, weight_decay=args.weight_decay)
     scheduler = optim.lr_scheduler.StepLR(optimizer, step_size=args.lr_decay_every, gamma=args.lr_decay_factor)
 
     # Resume or start fresh
-    model, optimizer, scheduler, history, epoch, best_val_loss, patience_counter = \
-        load_checkpoint_if_exists(checkpoint_path, model, optimizer, scheduler)
+    model, optimizer, scheduler, history, epoch, best_val_loss, patience_counter, resume, rng_state = \
+        load_checkpoint_if_exists(checkpoint_path, model, optimizer, scheduler, sampler=hard_sampler)
+    if rng_state is not None:
+        restore_rng_state(rng_state)
+
+    def save_last(completed_epoch, resume_state=None):
+        """last_checkpoint.pth: `completed_epoch` = epoch terakhir yang selesai; `resume_state` jika di tengah epoch."""
+        torch.save({
+            'epoch': completed_epoch,
+            'arch': args.arch,
+            'channel_config': channel_config,
+            'model_state_dict': model.state_dict(),
+            'optimizer_state_dict': optimizer.state_dict(),
+            'scheduler_state_dict': scheduler.state_dict() if scheduler else None,
+            'history': history,
+            'best_val_loss': best_val_loss,
+            'patience_counter': patience_counter,
+            'resume': resume_state,
+            'rng_state': capture_rng_state(),
+            'sampler_state': hard_sampler.state_dict() if hard_sampler is not None else None,
+            'args': vars(args)
+        }, checkpoint_path + ".tmp")
+        # Tulis ke file sementara dulu: checkpoint lama tetap utuh jika proses mati saat menyimpan
+        os.replace(checkpoint_path + ".tmp", checkpoint_path)
+
+    progress = {}  # posisi training terakhir di epoch berjalan (untuk checkpoint tengah epoch / Ctrl+C)
+
+    def on_step(step, totals):
+        progress.update(epoch=epoch, step=step, totals=totals)
+        if args.checkpoint_every_steps and step % args.checkpoint_every_steps == 0:
+            save_last(epoch - 1, dict(progress))
 
     print_time("✅ Siap melatih!")
 
@@ -168,9 +425,37 @@ def main():
         while epoch <= args.epochs:
             print_time(f"🔁 Epoch {epoch}/{args.epochs}")
 
+            if stages:
+                stage = progressive_stage(epoch, args.progressive_sizes, args.progressive_epochs)
+                if stage != current_stage:
+                    side, stage_bs = stages[stage]
+                    # Transform dibangun ulang; loader dibuat ulang agar worker persisten memakai transform baru
+                    base_train_dataset.set_input_size((side, side) if stage < len(stages) - 1
+                                                      else tuple(args.input_size))
+                    train_feed = build_train_feed(stage_bs)
+                    current_stage = stage
+                    print_time(f"📐 Tahap {stage + 1}/{len(stages)}: input {side}px, batch {stage_bs}")
+
             # Train & eval
-            train_loss, train_acc = train_epoch(model, train_loader, criterion, optimizer, device)
-            val_loss, val_acc = evaluate(model, val_loader, criterion, device)
+            train_sampler.set_epoch(epoch)
+            start_step, totals = 0, None
+            if resume and resume['epoch'] == epoch:
+                # Lewati sampel yang sudah dilatih; sisa urutan & augmentasi sama dengan run awal
+                start_step, totals = resume['step'], tuple(resume['totals'])
+                train_sampler.skip(totals[2])
+                print_time(f"⏩ Melewati {start_step} batch ({totals[2]} sampel) yang sudah dilatih")
+            resume = None
+            progress.clear()
+            train_feed.reset_stats()
+            val_feed.reset_stats()
+            epoch_start = time.perf_counter()
+            train_loss, train_acc = train_epoch(model, train_feed, train_criterion, optimizer, device,
+                                                teacher_logits=teacher_logits, hard_sampler=hard_sampler,
+                                                start_step=start_step, totals=totals, on_step=on_step)
+            train_time = time.perf_counter() - epoch_start
+            val_loss, val_acc, val_recall = evaluate(model, val_feed, criterion, device,
+                                                     num_classes=args.num_classes)
+            val_time = time.perf_counter() - epoch_start - train_time
 
             if scheduler:
                 scheduler.step()
@@ -178,6 +463,16 @@ def main():
             # Logging
             print_time(f"📊 Train Loss: {train_loss:.5f}, Acc: {train_acc:.3%} | "
                        f"Val Loss: {val_loss:.5f}, Acc: {val_acc:.3%}")
+            print_time("🎯 Recall val: " + " | ".join(
+                f"{name} {r:.2f}" for name, r in zip(CLASS_NAMES, val_recall)))
+            if args.target_recall is not None and min(val_recall) >= args.target_recall \
+                    and 'target_recall_epoch' not in history:
+                history['target_recall_epoch'] = epoch
+                print_time(f"🏁 Semua kelas mencapai recall ≥ {args.target_recall:.2f} di epoch {epoch}")
+
+            print_time(f"⏱️  Train {train_time:.1f}s, Val {val_time:.1f}s | idle awal train: "
+                       f"{train_feed.first_wait or 0:.2f}s, train→val: {val_feed.first_wait or 0:.2f}s | "
+                       f"tunggu data: train {train_feed.wait_time:.2f}s, val {val_feed.wait_time:.2f}s")
 
             # Update history
             history['epochs'].append(epoch)
@@ -185,6 +480,7 @@ def main():
             history['train_acc'].append(train_acc)
             history['val_loss'].append(val_loss)
             history['val_acc'].append(val_acc)
+            history.setdefault('val_recall', []).append(val_recall)
 
             # Save best model
             if val_loss < best_val_loss:
@@ -192,6 +488,8 @@ def main():
                 patience_counter = 0
                 torch.save({
                     'epoch': epoch,
+                    'arch': args.arch,
+                    'channel_config': channel_config,
                     'model_state_dict': model.state_dict(),
                     'val_loss': val_loss,
                     'val_acc': val_acc
@@ -201,16 +499,8 @@ def main():
                 patience_counter += 1
 
             # Save last checkpoint (for resume)
-            torch.save({
-                'epoch': epoch,
-                'model_state_dict': model.state_dict(),
-                'optimizer_state_dict': optimizer.state_dict(),
-                'scheduler_state_dict': scheduler.state_dict() if scheduler else None,
-                'history': history,
-                'best_val_loss': best_val_loss,
-                'patience_counter': patience_counter,
-                'args': vars(args)
-            }, checkpoint_path)
+            save_last(epoch)
+            progress.clear()
 
             # Save history separately
             with open(os.path.join(args.checkpoint_dir, "history.json"), "w") as f:
@@ -223,7 +513,13 @@ def main():
             epoch += 1
 
     except KeyboardInterrupt:
-        print_time("⚠️  Pelatihan dihentikan pengguna. Checkpoint terakhir telah disimpan.")
+        if progress:
+            # Simpan posisi batch terakhir yang selesai agar sisa epoch tidak hilang
+            save_last(progress['epoch'] - 1, dict(progress))
+            print_time(f"⚠️  Pelatihan dihentikan pengguna. Posisi disimpan: epoch {progress['epoch']}, "
+                       f"batch {progress['step']}.")
+        else:
+            print_time("⚠️  Pelatihan dihentikan pengguna. Checkpoint terakhir telah disimpan.")
     finally:
         print_time("🏁 Pelatihan selesai.")
         print_time(f"📊 Hasil akhir: Best Val Loss = {best_val_loss:.5f}")
@@ -0,0 +1,48 @@
+# tta.py — test-time augmentation: semua view satu gambar dijadikan satu batch, satu forward pass
+import torch
+import torch.nn.functional as F
+
+# Urutan view; view 0 selalu gambar asli sehingga hasil tanpa TTA bisa diambil gratis
+VIEW_NAMES = ("identity", "hflip", "center_zoom", "zoom_tl", "zoom_tr", "zoom_bl", "zoom_br", "vflip")
+MAX_VIEWS = len(VIEW_NAMES)
+
+
+def _zoom(x, top, left, crop_h, crop_w):
+    crop = x[:, :, top:top + crop_h, left:left + crop_w]
+    return F.interpolate(crop, size=x.shape[-2:], mode="bilinear", align_corners=False)
+
+
+def make_views(x, n_views, zoom=0.875):
+    """
+    x: batch (B, 3, H, W) yang sudah dinormalisasi.
+    Mengembalikan (n_views * B, 3, H, W), tersusun per view: [view0 semua gambar, view1 semua gambar, ...].
+    Multi-crop dibuat dari crop `zoom` × ukuran asli yang di-resize kembali ke H×W.
+    """
+    n_views = max(1, min(int(n_views), MAX_VIEWS))
+    h, w = x.shape[-2:]
+    ch, cw = int(round(h * zoom)), int(round(w * zoom))
+    dh, dw = h - ch, w - cw
+    builders = (
+        lambda: x,
+        lambda: torch.flip(x, dims=[3]),
+        lambda: _zoom(x, dh // 2, dw // 2, ch, cw),
+        lambda: _zoom(x, 0, 0, ch, cw),
+        lambda: _zoom(x, 0, dw, ch, cw),
+        lambda: _zoom(x, dh, 0, ch, cw),
+        lambda: _zoom(x, dh, dw, ch, cw),
+        lambda: torch.flip(x, dims=[2]),
+    )
+    if n_views == 1:
+        return x
+    return torch.cat([builders[i]() for i in range(n_views)], dim=0)
+
+
+def tta_logits(model, x, n_views, return_views=False):
+    """
+    Forward semua view dalam satu batch lalu rata-ratakan logits per gambar.
+    Jika `return_views`, juga mengembalikan logits per view (n_views, B, num_classes).
+    """
+    n_views = max(1, min(int(n_views), MAX_VIEWS))
+    logits = model(make_views(x, n_views)).view(n_views, x.size(0), -1)
+    mean = logits.mean(dim=0)
+    return (mean, logits) if return_views else mean
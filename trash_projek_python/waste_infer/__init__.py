@@ -0,0 +1,38 @@
+"""
+waste_infer — paket inferensi ringan untuk klasifikasi sampah.
+
+Hanya bergantung pada NumPy, Pillow dan ONNX Runtime (tanpa torch/torchvision).
+Submodul di-import secara lazy: `import waste_infer` hampir tidak memuat apa pun,
+sehingga worker berumur pendek bisa langsung melayani request.
+"""
+
+__all__ = [
+    "CLASS_NAMES", "LABEL_MAP", "ONE_INDEXED_LABEL_MAP", "NUM_CLASSES",
+    "load_image", "normalize_batch", "OnnxClassifier", "VectorIndex",
+]
+
+_LAZY_ATTRS = {
+    "CLASS_NAMES": "labels",
+    "LABEL_MAP": "labels",
+    "ONE_INDEXED_LABEL_MAP": "labels",
+    "NUM_CLASSES": "labels",
+    "load_image": "preprocess",
+    "normalize_batch": "preprocess",
+    "OnnxClassifier": "session",
+    "VectorIndex": "index",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'waste_infer' has no attribute '{name}'")
+    import importlib
+    module = importlib.import_module(f".{module_name}", __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,111 @@
+# index.py — pencarian nearest-neighbor atas embedding (memmap, NumPy saja)
+import json
+import os
+
+import numpy as np
+
+# Jumlah baris vektor yang di-dequantize sekaligus saat scan (membatasi memori sementara)
+SCAN_CHUNK_ROWS = 32768
+
+
+def l2_normalize(x, eps=1e-12):
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.maximum(np.linalg.norm(x, axis=-1, keepdims=True), eps)
+
+
+def _merge_topk(best_scores, best_ids, scores, ids, k):
+    """Gabungkan kandidat baru (Q, M) ke top-k berjalan (Q, ≤k) tanpa sort penuh."""
+    scores = np.concatenate([best_scores, scores], axis=1)
+    ids = np.concatenate([best_ids, ids], axis=1)
+    if scores.shape[1] > k:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, part, axis=1)
+        ids = np.take_along_axis(ids, part, axis=1)
+    return scores, ids
+
+
+class VectorIndex:
+    """
+    Index hasil `build_index.py`: vektor fitur ter-L2-normalisasi (float16 atau int8 per-dimensi)
+    di-memmap dari disk, sehingga hanya halaman yang di-scan yang masuk RAM.
+    Skor = cosine similarity. Dengan IVF, vektor tersusun per partisi dan hanya `nprobe`
+    partisi terdekat yang di-scan.
+
+    Isi direktori: meta.json, vectors.npy, labels.npy, paths.txt,
+    scale.npy (int8), ivf_centroids.npy + ivf_offsets.npy (IVF).
+    """
+
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+        self.labels = np.load(os.path.join(index_dir, "labels.npy"))
+        with open(os.path.join(index_dir, "paths.txt")) as f:
+            self.paths = f.read().splitlines()
+        self.scale = None
+        if self.meta["dtype"] == "int8":
+            self.scale = np.load(os.path.join(index_dir, "scale.npy")).astype(np.float32)
+        self.centroids = self.offsets = None
+        if self.meta.get("ivf_lists"):
+            self.centroids = np.load(os.path.join(index_dir, "ivf_centroids.npy")).astype(np.float32)
+            self.offsets = np.load(os.path.join(index_dir, "ivf_offsets.npy"))
+        self.num_classes = len(self.meta.get("classes", [])) or int(self.labels.max()) + 1
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    def _prepare(self, queries):
+        q = l2_normalize(np.atleast_2d(queries))
+        if q.shape[1] != self.dim:
+            raise ValueError(f"Dimensi query {q.shape[1]} ≠ dimensi index {self.dim}")
+        # int8: v ≈ v_q * scale  →  v · q = v_q · (scale * q), skala cukup dilipat ke query
+        return q * self.scale if self.scale is not None else q
+
+    def _scan(self, q, ranges, k):
+        """Scan baris-baris di `ranges` [(start, stop), ...] untuk query (Q, D)."""
+        best_scores = np.empty((q.shape[0], 0), dtype=np.float32)
+        best_ids = np.empty((q.shape[0], 0), dtype=np.int64)
+        for start, stop in ranges:
+            for s in range(start, stop, SCAN_CHUNK_ROWS):
+                e = min(s + SCAN_CHUNK_ROWS, stop)
+                scores = q @ self.vectors[s:e].astype(np.float32).T  # (Q, rows)
+                ids = np.broadcast_to(np.arange(s, e), scores.shape)
+                best_scores, best_ids = _merge_topk(best_scores, best_ids, scores, ids, k)
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_scores, order, 1), np.take_along_axis(best_ids, order, 1)
+
+    def search(self, queries, k=10, nprobe=8):
+        """
+        `queries`: (D,) atau (Q, D) fitur mentah (dinormalisasi di sini).
+        Mengembalikan (skor (Q, k), index baris (Q, k)), terurut dari yang paling mirip.
+        """
+        q = self._prepare(queries)
+        k = min(k, len(self))
+        if self.centroids is None:
+            return self._scan(q, [(0, len(self))], k)
+        nprobe = max(1, min(nprobe, len(self.centroids)))
+        # Pilih partisi dengan fitur ternormalisasi (tanpa skala int8)
+        probes = np.argsort(-(l2_normalize(np.atleast_2d(queries)) @ self.centroids.T), axis=1)[:, :nprobe]
+        all_scores, all_ids = [], []
+        for qi, lists in enumerate(probes):
+            ranges = [(int(self.offsets[c]), int(self.offsets[c + 1])) for c in sorted(lists)]
+            scores, ids = self._scan(q[qi:qi + 1], ranges, k)
+            # Partisi yang di-probe bisa berisi < k vektor; sisanya diisi -inf / -1
+            pad = k - scores.shape[1]
+            all_scores.append(np.pad(scores, ((0, 0), (0, pad)), constant_values=-np.inf))
+            all_ids.append(np.pad(ids, ((0, 0), (0, pad)), constant_values=-1))
+        return np.concatenate(all_scores), np.concatenate(all_ids)
+
+    def knn_probs(self, scores, ids):
+        """Voting kNN berbobot similarity dari hasil `search` → probabilitas kelas (Q, C)."""
+        valid = ids >= 0
+        weights = np.where(valid, np.maximum(scores, 0.0), 0.0)
+        labels = self.labels[np.where(valid, ids, 0)]
+        votes = np.zeros((ids.shape[0], self.num_classes), dtype=np.float64)
+        np.add.at(votes, (np.arange(ids.shape[0])[:, None], labels), weights)
+        total = votes.sum(axis=1, keepdims=True)
+        return np.divide(votes, total, out=np.full_like(votes, 1.0 / self.num_classes), where=total > 0)
@@ -0,0 +1,11 @@
+# labels.py — satu-satunya definisi label kelas (tanpa dependensi)
+
+# Urutan ini adalah urutan output model (index 0..5)
+CLASS_NAMES = ("glass", "paper", "cardboard", "plastic", "metal", "trash")
+NUM_CLASSES = len(CLASS_NAMES)
+
+# 0-indexed → nama kelas (output model / API)
+LABEL_MAP = {i: name for i, name in enumerate(CLASS_NAMES)}
+
+# 1-indexed → nama folder (format list file data/one-indexed-files-*.txt)
+ONE_INDEXED_LABEL_MAP = {i + 1: name for i, name in enumerate(CLASS_NAMES)}
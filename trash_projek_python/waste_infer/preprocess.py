@@ -0,0 +1,39 @@
+# preprocess.py — preprocessing NumPy/Pillow, setara dengan Resize + ToTensor + Normalize
+import numpy as np
+from PIL import Image
+
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def load_image(src, size=(224, 224)):
+    """
+    Decode gambar (path atau file-like) menjadi array uint8 HWC berukuran `size` (h, w).
+    Untuk JPEG, `draft` membuat decoder langsung menurunkan resolusi saat decode.
+    """
+    h, w = size
+    with Image.open(src) as img:
+        img.draft("RGB", (w, h))
+        img = img.convert("RGB")
+        if img.size != (w, h):
+            img = img.resize((w, h), Image.BILINEAR)
+        return np.asarray(img, dtype=np.uint8)
+
+
+def normalize_batch(images, out=None):
+    """
+    Ubah batch uint8 NHWC menjadi float32 NCHW ternormalisasi ImageNet.
+    `out` (opsional) adalah buffer float32 (N, 3, H, W) yang dipakai ulang.
+    """
+    images = np.asarray(images, dtype=np.uint8)
+    if images.ndim == 3:
+        images = images[None]
+    n, h, w, _ = images.shape
+    if out is None:
+        out = np.empty((n, 3, h, w), dtype=np.float32)
+    # (x / 255 - mean) / std  ==  x * scale + shift
+    scale = (1.0 / (255.0 * IMAGENET_STD)).reshape(1, 3, 1, 1)
+    shift = (-IMAGENET_MEAN / IMAGENET_STD).reshape(1, 3, 1, 1)
+    np.multiply(images.transpose(0, 3, 1, 2), scale, out=out[:n])
+    out[:n] += shift
+    return out[:n]
@@ -0,0 +1,65 @@
+# session.py — wrapper ONNX Runtime untuk model WasteClassifier hasil export_onnx.py
+import os
+
+import numpy as np
+
+from .labels import CLASS_NAMES
+from .preprocess import load_image, normalize_batch
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class OnnxClassifier:
+    def __init__(self, model_path, input_size=(224, 224), intra_op_threads=None, providers=None):
+        # onnxruntime baru di-import saat sesi dibuat, bukan saat paket di-import
+        import onnxruntime as ort
+
+        if not os.path.isfile(model_path):
+            raise FileNotFoundError(f"Model ONNX tidak ditemukan: {model_path}")
+        opts = ort.SessionOptions()
+        if intra_op_threads:
+            opts.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(
+            model_path, sess_options=opts,
+            providers=providers or ["CPUExecutionProvider"],
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Model hasil `export_onnx.py --fused_preprocess` menerima uint8 NHWC langsung
+        self.fused_preprocess = model_input.type == "tensor(uint8)"
+        self.input_size = tuple(input_size)
+        self._buffer = None
+
+    def _normalize(self, images):
+        n = len(images)
+        if self._buffer is None or self._buffer.shape[0] < n:
+            self._buffer = np.empty((n, 3) + self.input_size, dtype=np.float32)
+        return normalize_batch(images, out=self._buffer)
+
+    def predict(self, images):
+        """`images`: batch uint8 NHWC. Mengembalikan probabilitas (N, num_classes)."""
+        images = np.asarray(images, dtype=np.uint8)
+        if self.fused_preprocess:
+            batch = np.ascontiguousarray(images if images.ndim == 4 else images[None])
+        else:
+            batch = self._normalize(images)
+        logits = self.session.run(None, {self.input_name: batch})[0]
+        return softmax(logits)
+
+    def classify(self, src):
+        """Klasifikasi satu gambar (path atau file-like)."""
+        probs = self.predict(load_image(src, self.input_size)[None])[0]
+        idx = int(probs.argmax())
+        return {
+            "class": CLASS_NAMES[idx],
+            "confidence": float(probs[idx]),
+            "probabilities": {name: float(p) for name, p in zip(CLASS_NAMES, probs)},
+        }
+
+    def warmup(self, batch_size=1):
+        dummy = np.zeros((batch_size,) + self.input_size + (3,), dtype=np.uint8)
+        self.predict(dummy)
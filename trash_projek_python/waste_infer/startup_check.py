@@ -0,0 +1,72 @@
+# startup_check.py — ukur waktu import & startup waste_infer di proses baru
+#
+# Contoh:
+#   python -m waste_infer.startup_check --model waste_classifier.onnx
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+_IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import waste_infer
+t1 = time.perf_counter()
+import json, sys
+heavy = sorted(m for m in ("torch", "torchvision", "onnxruntime", "numpy", "PIL") if m in sys.modules)
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "heavy_modules": heavy}))
+"""
+
+_STARTUP_SNIPPET = """
+import time
+t0 = time.perf_counter()
+from waste_infer import OnnxClassifier
+clf = OnnxClassifier({model!r})
+t1 = time.perf_counter()
+clf.warmup()
+t2 = time.perf_counter()
+import json
+print(json.dumps({{"load_ms": (t1 - t0) * 1000, "first_predict_ms": (t2 - t1) * 1000}}))
+"""
+
+
+def _run(snippet, cwd):
+    out = subprocess.run([sys.executable, "-c", snippet], cwd=cwd,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cek budget waktu import/startup waste_infer")
+    parser.add_argument("--model", type=str, default=None, help="Model ONNX (opsional, untuk cek startup penuh)")
+    parser.add_argument("--import_budget_ms", type=float, default=50.0)
+    parser.add_argument("--startup_budget_ms", type=float, default=1500.0)
+    parser.add_argument("--repeat", type=int, default=3, help="Ambil nilai median dari N proses")
+    args = parser.parse_args()
+
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    failed = False
+
+    runs = [_run(_IMPORT_SNIPPET, cwd) for _ in range(args.repeat)]
+    import_ms = sorted(r["import_ms"] for r in runs)[len(runs) // 2]
+    heavy = runs[0]["heavy_modules"]
+    ok = import_ms <= args.import_budget_ms and not heavy
+    failed |= not ok
+    print(f"{'✅' if ok else '❌'} import waste_infer: {import_ms:.1f} ms "
+          f"(budget {args.import_budget_ms:.0f} ms), modul berat ter-import: {heavy or '-'}")
+
+    if args.model:
+        snippet = _STARTUP_SNIPPET.format(model=os.path.abspath(args.model))
+        runs = [_run(snippet, cwd) for _ in range(args.repeat)]
+        total = sorted(r["load_ms"] + r["first_predict_ms"] for r in runs)[len(runs) // 2]
+        ok = total <= args.startup_budget_ms
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} startup (load + prediksi pertama): {total:.1f} ms "
+              f"(budget {args.startup_budget_ms:.0f} ms)")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()